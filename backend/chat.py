@@ -1,20 +1,51 @@
+import math
+from html import escape
+from typing import Awaitable, Callable, Hashable, Optional, Tuple
+
 from aiogram import F, Router
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.types import CallbackQuery, Message
+from aiogram.types import CallbackQuery, FSInputFile, Message
 
-from model.main import ResumeProfile, extract_resume_info
-from model.matcher import JobMatcher
+from model.main import ExtractionTrace, ResumeProfile, extract_resume_info
+from model.matcher import JobMatcher, city_key
 from model.preferences import PreferenceVector
-from model.job_repository import JobRepository
-from .keyboards import job_feedback_keyboard, main_menu
+from model.job_repository import JobRepository, Vacancy
+from .concurrency import KeyedLock, SingleFlight
+from .config import settings
+from .delivery import RecommendationDelivery
+from .keyboards import main_menu
+from .metrics import metrics
+from .profiling import profile_for, tracer
+from .scheduler import LatencyBudgetScheduler
 from .storage import UserStorage
 
 router = Router()
 storage = UserStorage()
 job_repository = JobRepository()
-matcher = JobMatcher(job_repository)
+matcher = JobMatcher(job_repository, low_memory=settings.MATCHER_LOW_MEMORY)
+delivery = RecommendationDelivery()
+scheduler = LatencyBudgetScheduler(
+    matcher,
+    budget=settings.RECOMMEND_BUDGET_MS / 1000,
+    max_encoder_queue=settings.ENCODER_MAX_QUEUE,
+    max_queue=settings.MATCHER_MAX_QUEUE,
+)
+# Repeated taps share the request already running; per-user state writes are serialised.
+request_flights: SingleFlight[None] = SingleFlight()
+user_locks = KeyedLock()
+
+RELAXATION_NOTES = {
+    "no_salary": "Вакансий с нужной зарплатой немного, поэтому мы не учитывали зарплатный фильтр.",
+    "no_format": "Вакансий в выбранном формате немного, поэтому мы не учитывали формат работы.",
+    "region": "В вашем городе вакансий немного, поэтому мы добавили соседние города региона и удалёнку.",
+    "anywhere": "По вашим фильтрам вакансий почти нет, поэтому мы искали по всей базе.",
+}
+TIER_NOTES = {
+    "precomputed": "Сейчас много запросов, поэтому показываем вашу последнюю подборку.",
+    "lexical": "Сейчас много запросов, поэтому подборка составлена только по ключевым словам.",
+}
 
 
 class Form(StatesGroup):
@@ -45,42 +76,135 @@ async def ask_resume(message: Message, state: FSMContext):
 
 @router.message(Form.waiting_for_resume)
 async def process_resume(message: Message, state: FSMContext):
-    profile = extract_resume_info(message.text)
-    storage.save_profile(message.from_user.id, profile)
-    await state.clear()
-    await message.answer(
-        "Резюме сохранено ✅\n\n" + profile.to_message(),
-        reply_markup=main_menu,
-    )
+    with tracer.request("process_resume"):
+        trace = ExtractionTrace()
+        with tracer.span("extract"):
+            profile = extract_resume_info(message.text, trace=trace)
+        for tier, seconds in trace.seconds.items():
+            tracer.record(f"extract.{tier}", seconds * 1000)
+        with tracer.span("save_profile"):
+            async with user_locks.hold(message.from_user.id):
+                storage.save_profile(message.from_user.id, profile)
+            scheduler.forget(message.from_user.id)
+        await state.clear()
+        with tracer.span("reply"):
+            await message.answer(
+                "Резюме сохранено ✅\n\n" + profile.to_message(),
+                reply_markup=main_menu,
+            )
 
 
 @router.message(F.text == "Получить рекомендации")
 @router.message(Command("recommend"))
 async def recommend(message: Message):
-    await send_recommendations(message)
+    await coalesced("recommend", message.from_user.id, lambda: send_recommendations(message))
+
+
+async def coalesced(handler: str, key: Hashable, factory: Callable[[], Awaitable[None]]) -> None:
+    if request_flights.in_flight((handler, key)):
+        metrics.increment("coalesced_request", handler=handler)
+    await request_flights.run((handler, key), factory)
 
 
 async def send_recommendations(message: Message):
+    with tracer.request("recommend"):
+        await _send_recommendations(message)
+
+
+async def _send_recommendations(message: Message):
     user_id = message.from_user.id
-    profile = storage.get_profile(user_id)
+    with tracer.span("load_state"):
+        profile = storage.get_profile(user_id)
+        preferences = storage.get_preferences(user_id) if profile else None
     if not profile:
         await message.answer("Сначала отправьте резюме, чтобы мы узнали ваши навыки.", reply_markup=main_menu)
         return
 
-    preferences = storage.get_preferences(user_id)
-    matches = matcher.recommend(profile, preferences, limit=10)
+    cached_embedding = storage.get_profile_embedding(user_id)
+    # Off the event loop and within the latency budget; under load the tier degrades.
+    with tracer.span("matcher"):
+        scheduled = await scheduler.recommend(user_id, profile, preferences, cached_embedding, limit=10)
+    metrics.increment("recommendation_tier", tier=scheduled.tier)
+    if scheduled.embedding is not None and cached_embedding is None:
+        async with user_locks.hold(user_id):
+            # Skip if the résumé was replaced while it was being encoded.
+            if storage.get_profile(user_id) == profile:
+                storage.save_profile_embedding(user_id, scheduled.embedding.tolist())
+    if scheduled.result is None:
+        await message.answer("Сейчас очень много запросов. Попробуйте, пожалуйста, через минуту.")
+        return
+    result = scheduled.result
+    metrics.increment("recommendation_relaxation", step=result.relaxation)
+    matches = result.matches
 
     if not matches:
         await message.answer("Пока нет вакансий, удовлетворяющих фильтрам. Попробуйте позже.")
         return
 
-    await message.answer("Вот топ-10 вакансий, подходящих под ваше резюме и предпочтения:")
-    for vacancy, score in matches:
-        formatted_score = f"\n⚖️ Рейтинг соответствия: {score:.2f}"
-        await message.answer(
-            vacancy.to_message() + formatted_score,
-            reply_markup=job_feedback_keyboard(vacancy.id),
-        )
+    job_repository.remember(vacancy for vacancy, _ in matches)
+
+    header = "Вот топ-10 вакансий, подходящих под ваше резюме и предпочтения:"
+    if result.relaxed:
+        header = f"{RELAXATION_NOTES[result.relaxation]}\n\n{header}"
+    if scheduled.tier in TIER_NOTES:
+        header = f"{TIER_NOTES[scheduled.tier]}\n\n{header}"
+    with tracer.span("delivery"):
+        await delivery.send_recommendations(message.bot, message.chat.id, matches, header=header)
+
+
+def split_city(query: str) -> Tuple[str, Optional[str]]:
+    """Pull a known city out of a free-text query: "python стажировка Казань"."""
+    words = query.split()
+    for size in (3, 2, 1):
+        for start in range(len(words) - size + 1):
+            candidate = " ".join(words[start : start + size])
+            if city_key(candidate) in matcher.city_ranges:
+                rest = words[:start] + words[start + size :]
+                return " ".join(rest), candidate
+    return query, None
+
+
+@router.message(Command("search"))
+async def search(message: Message, command: CommandObject):
+    if not command.args:
+        await message.answer("Напишите запрос после команды, например: /search python стажировка Казань")
+        return
+    user_id = message.from_user.id
+    await coalesced("search", (user_id, command.args), lambda: send_search_results(message, command.args))
+
+
+async def send_search_results(message: Message, query: str):
+    text, city = split_city(query)
+    preferences = storage.get_preferences(message.from_user.id)
+    matches = job_repository.search(
+        text or query,
+        filters={"city": city} if city and text else None,
+        limit=10,
+        preferences=preferences,
+    )
+    if not matches:
+        await message.answer("По этому запросу ничего не нашлось. Попробуйте другие слова.")
+        return
+
+    job_repository.remember(vacancy for vacancy, _ in matches)
+    await delivery.send_recommendations(
+        message.bot,
+        message.chat.id,
+        matches,
+        header=f"Результаты поиска по запросу «{escape(query)}»:",
+    )
+
+
+@router.callback_query(F.data.startswith("jmp:"))
+async def recommendations_page(callback: CallbackQuery):
+    page = callback.data.split(":", 1)[1]
+    if not page.isdigit():
+        await callback.answer()
+        return
+    if not await delivery.show_page(callback.message, int(page)):
+        await callback.answer("Подборка устарела, запросите рекомендации заново.", show_alert=True)
+        return
+    await callback.answer()
 
 
 @router.message(F.text == "Избранное")
@@ -92,10 +216,8 @@ async def favorites(message: Message):
     if not favorites_ids:
         await message.answer("У вас пока нет избранных вакансий.", reply_markup=main_menu)
         return
-    for vacancy_id in favorites_ids:
-        vacancy = job_repository.get(vacancy_id)
-        if vacancy:
-            await message.answer(vacancy.to_message())
+    for vacancy in job_repository.get_many(favorites_ids):
+        await message.answer(vacancy.to_message())
 
 
 @router.callback_query(F.data.startswith("jm_"))
@@ -107,25 +229,61 @@ async def feedback_handler(callback: CallbackQuery):
         await callback.answer("Вакансия не найдена", show_alert=True)
         return
 
+    async with user_locks.hold(user_id):
+        response = update_preferences(user_id, action, vacancy)
+    await callback.answer(response, show_alert=False)
+
+
+def update_preferences(user_id: int, action: str, vacancy: Vacancy) -> str:
+    vacancy_id = vacancy.id
+    embedding = matcher.embedding_of(vacancy_id)
     preferences = storage.get_preferences(user_id)
     if action == "jm_like":
-        preferences.update_from_vacancy(vacancy, "like")
+        preferences.update_from_vacancy(vacancy, "like", embedding)
         response = "Отмечено как понравившееся."
     elif action == "jm_dislike":
-        preferences.update_from_vacancy(vacancy, "dislike")
+        preferences.update_from_vacancy(vacancy, "dislike", embedding)
         response = "Больше не будем показывать похожие вакансии."
     elif action == "jm_favorite":
         if vacancy_id in preferences.favorite_vacancies:
-            preferences.remove_favorite(vacancy_id)
+            preferences.remove_favorite(vacancy_id, embedding)
             response = "Удалено из избранного."
         else:
-            preferences.update_from_vacancy(vacancy, "favorite")
+            preferences.update_from_vacancy(vacancy, "favorite", embedding)
             response = "Добавлено в избранное."
     else:
         response = "Неизвестное действие"
 
     storage.save_preferences(user_id, preferences)
-    await callback.answer(response, show_alert=False)
+    return response
+
+
+@router.message(Command("profile"))
+async def profile_command(message: Message, command: CommandObject):
+    """Operator-only: ``/profile [seconds] [sample_rate]`` samples stacks and traces requests."""
+    if message.from_user.id not in settings.ADMIN_IDS:
+        return
+    args = (command.args or "").split()
+    try:
+        seconds = float(args[0]) if args else 30.0
+        sample_rate = float(args[1]) if len(args) > 1 else 1.0
+    except ValueError:
+        seconds = sample_rate = math.nan
+    # float() accepts "nan", "inf" and negatives; none of them is a profiling window.
+    if not math.isfinite(seconds) or seconds <= 0 or not math.isfinite(sample_rate):
+        await message.answer("Использование: /profile [секунды] [доля запросов 0..1]")
+        return
+    seconds = min(seconds, settings.PROFILE_MAX_SECONDS)
+    sample_rate = min(max(sample_rate, 0.0), 1.0)
+    await message.answer(f"Профилирование: {seconds:.0f} с, трассируется {sample_rate:.0%} запросов.")
+    try:
+        report = await profile_for(seconds, sample_rate)
+    except RuntimeError as exc:
+        await message.answer(str(exc))
+        return
+    await message.answer(f"<pre>{escape(report.to_text())}</pre>")
+    await message.answer_document(FSInputFile(report.collapsed_path), caption="Collapsed stacks (flamegraph.pl, speedscope)")
+    await message.answer_document(FSInputFile(report.traces_path), caption="Per-request spans, JSON lines")
 
 
 def register_handlers(dp):
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class KeyedLock:
+    """One ``asyncio.Lock`` per key, forgotten again once nobody holds or awaits it."""
+
+    def __init__(self) -> None:
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+        self._waiters: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    @asynccontextmanager
+    async def hold(self, key: Hashable) -> AsyncIterator[None]:
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+                del self._locks[key]
+
+
+class SingleFlight(Generic[T]):
+    """Coalesces concurrent calls with the same key into one running task.
+
+    The first caller starts ``factory()``; callers arriving while it runs
+    await the same result (or exception). A caller being cancelled does
+    not cancel the shared task.
+    """
+
+    def __init__(self) -> None:
+        self._running: Dict[Hashable, asyncio.Future] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._running
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        task = self._running.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._running[key] = task
+            task.add_done_callback(lambda _: self._running.pop(key, None))
+        return await asyncio.shield(task)
+
+
+class TokenBucket:
+    """Asyncio token bucket: ``rate`` tokens per second, at most ``capacity`` banked."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated: Optional[float] = None
+        self._blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        if self._updated is None:
+            self._updated = now
+        elapsed = max(0.0, now - max(self._updated, self._blocked_until))
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            if now < self._blocked_until:
+                await asyncio.sleep(self._blocked_until - now)
+                continue
+            self._refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Drain the bucket and block it, e.g. after a ``retry_after`` from Telegram
+        or a ``Retry-After`` from a vacancy source."""
+        now = asyncio.get_running_loop().time()
+        self.tokens = 0.0
+        self._updated = now
+        self._blocked_until = max(self._blocked_until, now + seconds)
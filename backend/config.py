@@ -10,7 +10,25 @@ load_dotenv()
 @dataclass
 class Settings:
     BOT_TOKEN: str = os.getenv("BOT_TOKEN", "")
-    
+    DELIVERY_MODE: str = os.getenv("DELIVERY_MODE", "concurrent")
+    DELIVERY_CONCURRENCY: int = int(os.getenv("DELIVERY_CONCURRENCY", "5"))
+    DELIVERY_PAGE_SIZE: int = int(os.getenv("DELIVERY_PAGE_SIZE", "5"))
+    GLOBAL_RATE_LIMIT: float = float(os.getenv("GLOBAL_RATE_LIMIT", "25"))
+    CHAT_RATE_LIMIT: float = float(os.getenv("CHAT_RATE_LIMIT", "1"))
+    CHAT_BURST: int = int(os.getenv("CHAT_BURST", "3"))
+    MATCHER_LOW_MEMORY: bool = os.getenv("MATCHER_LOW_MEMORY", "0").lower() in ("1", "true", "yes")
+    # /recommend latency budget; past it, or with this many encodings/matcher jobs
+    # in flight, answers degrade (cached embedding, last result, BM25 only).
+    RECOMMEND_BUDGET_MS: int = int(os.getenv("RECOMMEND_BUDGET_MS", "1500"))
+    ENCODER_MAX_QUEUE: int = int(os.getenv("ENCODER_MAX_QUEUE", "4"))
+    MATCHER_MAX_QUEUE: int = int(os.getenv("MATCHER_MAX_QUEUE", "16"))
+    # How often the bot picks up catalog changes written by the ingestor; 0 disables it.
+    CATALOG_SYNC_SECONDS: float = float(os.getenv("CATALOG_SYNC_SECONDS", "60"))
+    # Telegram user ids allowed to run operator commands such as /profile.
+    ADMIN_IDS: frozenset = frozenset(
+        int(user_id) for user_id in os.getenv("ADMIN_IDS", "").split(",") if user_id.strip()
+    )
+    PROFILE_MAX_SECONDS: int = int(os.getenv("PROFILE_MAX_SECONDS", "300"))
 
 
 settings = Settings()
\ No newline at end of file
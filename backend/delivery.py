@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional, Tuple, TypeVar
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.types import Message
+
+from model.job_repository import Vacancy
+from .concurrency import TokenBucket
+from .config import settings
+from .keyboards import job_feedback_keyboard, recommendation_page_keyboard
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+Match = Tuple[Vacancy, float]
+
+
+class RateLimiter:
+    """Global plus per-chat token buckets; per-chat buckets are kept in a bounded LRU."""
+
+    def __init__(
+        self,
+        global_rate: float = settings.GLOBAL_RATE_LIMIT,
+        chat_rate: float = settings.CHAT_RATE_LIMIT,
+        chat_burst: int = settings.CHAT_BURST,
+        max_chats: int = 10_000,
+    ):
+        self.global_bucket = TokenBucket(global_rate, max(1.0, global_rate))
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_chats = max_chats
+        self._chats: "OrderedDict[int, TokenBucket]" = OrderedDict()
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = self._chats[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+            if len(self._chats) > self.max_chats:
+                self._chats.popitem(last=False)
+        else:
+            self._chats.move_to_end(chat_id)
+        return bucket
+
+    async def acquire(self, chat_id: int) -> None:
+        await self._chat_bucket(chat_id).acquire()
+        await self.global_bucket.acquire()
+
+    def penalize(self, chat_id: int, seconds: float) -> None:
+        self._chat_bucket(chat_id).pause(seconds)
+
+
+class RecommendationDelivery:
+    """Sends recommendation batches with bounded concurrency and flood-control backoff.
+
+    ``compact=True`` replaces the per-vacancy messages with one paginated
+    message; pages are kept per sent message, so ``jmp:<page>`` callbacks on
+    an older recommendation keep paging through their own list.
+    """
+
+    def __init__(
+        self,
+        limiter: Optional[RateLimiter] = None,
+        concurrency: int = settings.DELIVERY_CONCURRENCY,
+        compact: bool = settings.DELIVERY_MODE == "compact",
+        page_size: int = settings.DELIVERY_PAGE_SIZE,
+        max_retries: int = 3,
+        max_cached_messages: int = 10_000,
+    ):
+        self.limiter = limiter or RateLimiter()
+        self.concurrency = concurrency
+        self.compact = compact
+        self.page_size = page_size
+        self.max_retries = max_retries
+        self.max_cached_messages = max_cached_messages
+        self._pages: "OrderedDict[Tuple[int, int], List[Match]]" = OrderedDict()
+
+    async def call(self, chat_id: int, request: Callable[[], Awaitable[T]]) -> T:
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(chat_id)
+            try:
+                return await request()
+            except TelegramRetryAfter as exc:
+                if attempt == self.max_retries:
+                    raise
+                logger.warning(
+                    "Flood control for chat %s, retrying in %ss (attempt %s)",
+                    chat_id,
+                    exc.retry_after,
+                    attempt + 1,
+                )
+                self.limiter.penalize(chat_id, exc.retry_after)
+        raise RuntimeError("unreachable")
+
+    async def send_text(self, bot: Bot, chat_id: int, text: str, **kwargs) -> Message:
+        return await self.call(chat_id, lambda: bot.send_message(chat_id, text, **kwargs))
+
+    async def send_recommendations(
+        self, bot: Bot, chat_id: int, matches: List[Match], header: str
+    ) -> None:
+        if self.compact:
+            text, keyboard = self._render_page(matches, 0)
+            sent = await self.send_text(bot, chat_id, f"{header}\n\n{text}", reply_markup=keyboard)
+            self._remember((chat_id, sent.message_id), matches)
+            return
+
+        await self.send_text(bot, chat_id, header)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def send_one(rank: int, vacancy: Vacancy, score: float) -> None:
+            # Messages may arrive out of order, so each one carries its rank.
+            text = f"#{rank} " + vacancy.to_message() + f"\n⚖️ Рейтинг соответствия: {score:.2f}"
+            async with semaphore:
+                await self.send_text(
+                    bot, chat_id, text, reply_markup=job_feedback_keyboard(vacancy.id)
+                )
+
+        await asyncio.gather(
+            *(
+                send_one(rank, vacancy, score)
+                for rank, (vacancy, score) in enumerate(matches, start=1)
+            )
+        )
+
+    async def show_page(self, message: Message, page: int) -> bool:
+        """Edit a compact recommendation message in place; ``False`` if the batch expired."""
+        chat_id = message.chat.id
+        matches = self._pages.get((chat_id, message.message_id))
+        if matches is None:
+            return False
+        text, keyboard = self._render_page(matches, page)
+        await self.call(chat_id, lambda: message.edit_text(text, reply_markup=keyboard))
+        return True
+
+    def _remember(self, key: Tuple[int, int], matches: List[Match]) -> None:
+        self._pages[key] = matches
+        self._pages.move_to_end(key)
+        if len(self._pages) > self.max_cached_messages:
+            self._pages.popitem(last=False)
+
+    def _render_page(self, matches: List[Match], page: int):
+        total_pages = max(1, math.ceil(len(matches) / self.page_size))
+        page = min(max(page, 0), total_pages - 1)
+        start = page * self.page_size
+        chunk = matches[start : start + self.page_size]
+        lines = [
+            f"{rank}. {vacancy.to_summary_line()}\n⚖️ {score:.2f}"
+            for rank, (vacancy, score) in enumerate(chunk, start=start + 1)
+        ]
+        keyboard = recommendation_page_keyboard(
+            [vacancy.id for vacancy, _ in chunk], start + 1, page, total_pages
+        )
+        return "\n\n".join(lines), keyboard
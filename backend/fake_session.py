@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import Chat, Message, User
+
+
+@dataclass
+class RecordedCall:
+    method: str
+    chat_id: Optional[int]
+    payload: Dict[str, Any]
+    started_at: float
+    finished_at: float = 0.0
+
+
+class FakeBotSession(BaseSession):
+    """In-process stand-in for the Telegram Bot API.
+
+    Records every call, answers with plausible objects after a configurable
+    latency and can inject ``429 Too Many Requests`` every ``flood_every``
+    calls, so delivery and load tests never touch the real API.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        flood_every: int = 0,
+        retry_after: int = 1,
+    ):
+        super().__init__()
+        self.latency = latency
+        self.jitter = jitter
+        self.flood_every = flood_every
+        self.retry_after = retry_after
+        self.calls: List[RecordedCall] = []
+        self._message_id = 0
+
+    @staticmethod
+    def make_bot(**kwargs: Any) -> Bot:
+        return Bot(token="42:FAKE-TOKEN", session=FakeBotSession(**kwargs))
+
+    async def make_request(
+        self,
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+        timeout: Optional[int] = None,
+    ) -> TelegramType:
+        payload = method.model_dump(exclude_none=True, exclude={"reply_markup"})
+        call = RecordedCall(
+            method=type(method).__name__,
+            chat_id=payload.get("chat_id"),
+            payload=payload,
+            started_at=time.perf_counter(),
+        )
+        self.calls.append(call)
+        call_number = len(self.calls)
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        call.finished_at = time.perf_counter()
+        if self.flood_every and call_number % self.flood_every == 0:
+            raise TelegramRetryAfter(
+                method=method,
+                message="Too Many Requests: retry after",
+                retry_after=self.retry_after,
+            )
+        return self._fake_result(bot, method, payload)
+
+    def _fake_result(self, bot: Bot, method: TelegramMethod, payload: Dict[str, Any]) -> Any:
+        returning = getattr(method, "__returning__", None)
+        if returning is bool:
+            return True
+        if returning is User:
+            return User(id=42, is_bot=True, first_name="FakeBot")
+        chat_id = payload.get("chat_id")
+        if chat_id is None:
+            return True
+        self._message_id += 1
+        return Message(
+            message_id=payload.get("message_id") or self._message_id,
+            date=datetime.now(),
+            chat=Chat(id=int(chat_id), type="private"),
+            text=payload.get("text") or payload.get("caption"),
+        ).as_(bot)
+
+    async def stream_content(
+        self,
+        url: str,
+        headers: Optional[Dict[str, Any]] = None,
+        timeout: int = 30,
+        chunk_size: int = 65536,
+        raise_for_status: bool = True,
+    ) -> AsyncGenerator[bytes, None]:
+        yield b""
+
+    async def close(self) -> None:
+        return None
+
+    def calls_for(self, chat_id: int) -> List[RecordedCall]:
+        return [call for call in self.calls if call.chat_id == chat_id]
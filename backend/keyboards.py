@@ -1,3 +1,5 @@
+from typing import List
+
 from aiogram.types import (
     InlineKeyboardButton,
     InlineKeyboardMarkup,
@@ -33,4 +35,28 @@ def job_feedback_keyboard(vacancy_id: str) -> InlineKeyboardMarkup:
                 ),
             ],
         ]
-    )
\ No newline at end of file
+    )
+
+
+def recommendation_page_keyboard(
+    vacancy_ids: List[str], first_rank: int, page: int, total_pages: int
+) -> InlineKeyboardMarkup:
+    rows = [
+        [
+            InlineKeyboardButton(text=f"{rank}. 👍", callback_data=f"jm_like:{vacancy_id}"),
+            InlineKeyboardButton(text="👎", callback_data=f"jm_dislike:{vacancy_id}"),
+            InlineKeyboardButton(text="⭐", callback_data=f"jm_favorite:{vacancy_id}"),
+        ]
+        for rank, vacancy_id in enumerate(vacancy_ids, start=first_rank)
+    ]
+    if total_pages > 1:
+        navigation = []
+        if page > 0:
+            navigation.append(InlineKeyboardButton(text="◀️", callback_data=f"jmp:{page - 1}"))
+        navigation.append(
+            InlineKeyboardButton(text=f"{page + 1}/{total_pages}", callback_data="jmp:-")
+        )
+        if page + 1 < total_pages:
+            navigation.append(InlineKeyboardButton(text="▶️", callback_data=f"jmp:{page + 1}"))
+        rows.append(navigation)
+    return InlineKeyboardMarkup(inline_keyboard=rows)
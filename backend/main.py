@@ -7,6 +7,7 @@ from aiogram.enums import ParseMode
 from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.types import BotCommand
 
+from .chat import matcher, scheduler
 from .chat import register_handlers as chat
 from .config import settings
 
@@ -22,6 +23,16 @@ def register_handlers(dp: Dispatcher):
     chat(dp)
 
 
+async def sync_catalog(interval: float) -> None:
+    """Feed vacancies the ingestor wrote since the last pass into the matcher."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await scheduler.exclusive(matcher.sync)
+        except Exception:
+            logger.exception("Catalog sync failed")
+
+
 async def main():
 
 
@@ -29,6 +40,7 @@ async def main():
         [
             BotCommand(command="start", description="Запуск бота"),
             BotCommand(command="recommend", description="Получить топ-10 вакансий"),
+            BotCommand(command="search", description="Поиск вакансий по ключевым словам"),
             BotCommand(command="favorites", description="Показать избранные вакансии"),
         ]
     )
@@ -36,7 +48,14 @@ async def main():
     register_handlers(dp)
 
     logger.info("Бот запущен")
-    await dp.start_polling(bot)
+    sync = None
+    if settings.CATALOG_SYNC_SECONDS > 0:
+        sync = asyncio.create_task(sync_catalog(settings.CATALOG_SYNC_SECONDS))
+    try:
+        await dp.start_polling(bot)
+    finally:
+        if sync is not None:
+            sync.cancel()
 
 if __name__ == "__main__":
     asyncio.run(main())
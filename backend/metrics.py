@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import json
+import logging
+from collections import Counter
+from typing import Dict, Tuple
+
+logger = logging.getLogger("jobmatcher.metrics")
+
+
+class MetricsRegistry:
+    """Process-local counters; every increment is also emitted as a JSON log line."""
+
+    def __init__(self):
+        self._counters: Counter = Counter()
+
+    def increment(self, name: str, value: int = 1, **labels: str) -> None:
+        key: Tuple = (name, tuple(sorted(labels.items())))
+        self._counters[key] += value
+        logger.info(json.dumps({"metric": name, "value": value, **labels}, ensure_ascii=False))
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Counter values grouped by metric name, keyed by ``label=value`` strings."""
+        result: Dict[str, Dict[str, int]] = {}
+        for (name, labels), value in self._counters.items():
+            label_key = ",".join(f"{k}={v}" for k, v in labels) or "total"
+            result.setdefault(name, {})[label_key] = value
+        return result
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,261 @@
+"""On-demand sampling profiler and per-request span tracing.
+
+Nothing runs until an operator starts a session (``/profile`` in the bot):
+the sampler thread does not exist and ``tracer.request``/``tracer.span``
+return a shared no-op context, so the hot path pays one attribute check.
+During a session a daemon thread samples every thread's stack and a
+fraction of requests record how long each stage took. The session writes
+collapsed stacks (``flamegraph.pl``/speedscope input) and one JSON line per
+traced request to ``data/profiles``.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+PROFILE_DIR = BASE_DIR / "data" / "profiles"
+SAMPLE_INTERVAL = 0.005
+MAX_TRACES = 10_000
+
+
+class StackSampler:
+    """Samples the stacks of all other threads every ``interval`` seconds into collapsed-stack counts."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    self.counts[self._collapse(frame, names.get(ident, str(ident)))] += 1
+            self.samples += 1
+
+    @staticmethod
+    def _collapse(frame, thread_name: str) -> str:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+            frame = frame.f_back
+        stack.append(thread_name)
+        return ";".join(reversed(stack))
+
+    def write_collapsed(self, path: Path) -> None:
+        with path.open("w", encoding="utf-8") as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+@dataclass
+class RequestTrace:
+    name: str
+    started_at: float
+    total_ms: float = 0.0
+    spans: Dict[str, float] = field(default_factory=dict)
+
+
+_current: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+
+
+class _Noop:
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+
+_NOOP = _Noop()
+
+
+class _Span:
+    def __init__(self, trace: RequestTrace, name: str):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        elapsed = (time.perf_counter() - self.started) * 1000
+        self.trace.spans[self.name] = self.trace.spans.get(self.name, 0.0) + elapsed
+
+
+class _Request(_Span):
+    def __init__(self, tracer: "Tracer", trace: RequestTrace):
+        super().__init__(trace, trace.name)
+        self.tracer = tracer
+
+    def __enter__(self) -> None:
+        self.token = _current.set(self.trace)
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        self.trace.total_ms = (time.perf_counter() - self.started) * 1000
+        _current.reset(self.token)
+        if len(self.tracer.traces) < MAX_TRACES:
+            self.tracer.traces.append(self.trace)
+
+
+class Tracer:
+    """Per-request stage timings for a sampled fraction of requests while enabled.
+
+    The current trace lives in a context variable, so spans opened inside
+    ``asyncio.to_thread`` calls land on the request that awaited them.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.sample_rate = 1.0
+        self.traces: List[RequestTrace] = []
+
+    def request(self, name: str):
+        if not self.enabled or random.random() >= self.sample_rate:
+            return _NOOP
+        return _Request(self, RequestTrace(name, time.time()))
+
+    def span(self, name: str):
+        if not self.enabled:
+            return _NOOP
+        trace = _current.get()
+        return _Span(trace, name) if trace is not None else _NOOP
+
+    def record(self, name: str, milliseconds: float) -> None:
+        """Add a stage timed elsewhere (e.g. ``ExtractionTrace`` tiers) to the current request."""
+        trace = _current.get() if self.enabled else None
+        if trace is not None:
+            trace.spans[name] = trace.spans.get(name, 0.0) + milliseconds
+
+    def breakdown(self) -> Dict[str, Dict]:
+        """Per request name: count, total p50/p95 and mean ms and share of each span."""
+        by_name: Dict[str, List[RequestTrace]] = {}
+        for trace in self.traces:
+            by_name.setdefault(trace.name, []).append(trace)
+        result = {}
+        for name, traces in by_name.items():
+            totals = sorted(trace.total_ms for trace in traces)
+            total_sum = sum(totals) or 1.0
+            spans: Dict[str, float] = {}
+            for trace in traces:
+                for span, ms in trace.spans.items():
+                    spans[span] = spans.get(span, 0.0) + ms
+            result[name] = {
+                "count": len(traces),
+                "p50_ms": totals[len(totals) // 2],
+                "p95_ms": totals[min(len(totals) - 1, int(len(totals) * 0.95))],
+                "spans": {
+                    span: {"mean_ms": ms / len(traces), "share": ms / total_sum}
+                    for span, ms in sorted(spans.items(), key=lambda item: -item[1])
+                },
+            }
+        return result
+
+
+tracer = Tracer()
+
+
+@dataclass
+class ProfileReport:
+    seconds: float
+    samples: int
+    collapsed_path: Path
+    traces_path: Path
+    breakdown: Dict[str, Dict]
+
+    def to_text(self) -> str:
+        lines = [f"{self.seconds:.0f}s, {self.samples} stack samples"]
+        for name, stats in self.breakdown.items():
+            lines.append(
+                f"{name}: {stats['count']} requests, p50 {stats['p50_ms']:.0f} ms, p95 {stats['p95_ms']:.0f} ms"
+            )
+            for span, span_stats in stats["spans"].items():
+                lines.append(f"  {span:<22} {span_stats['mean_ms']:>8.1f} ms  {span_stats['share']:>6.1%}")
+        if not self.breakdown:
+            lines.append("no traced requests")
+        return "\n".join(lines)
+
+
+class ProfilingSession:
+    """Stack sampling plus request tracing between ``start`` and ``stop``; ``stop`` writes the files."""
+
+    def __init__(self, sample_rate: float = 1.0, interval: float = SAMPLE_INTERVAL, out_dir: Path = PROFILE_DIR):
+        self.sample_rate = sample_rate
+        self.out_dir = out_dir
+        self.sampler = StackSampler(interval)
+        self.started = 0.0
+
+    def start(self) -> None:
+        tracer.traces = []
+        tracer.sample_rate = self.sample_rate
+        tracer.enabled = True
+        self.started = time.perf_counter()
+        self.sampler.start()
+
+    def stop(self) -> ProfileReport:
+        tracer.enabled = False
+        self.sampler.stop()
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        collapsed_path = self.out_dir / f"{stamp}.collapsed"
+        traces_path = self.out_dir / f"{stamp}.traces.jsonl"
+        self.sampler.write_collapsed(collapsed_path)
+        with traces_path.open("w", encoding="utf-8") as f:
+            for trace in tracer.traces:
+                f.write(json.dumps(asdict(trace), ensure_ascii=False) + "\n")
+        return ProfileReport(
+            time.perf_counter() - self.started,
+            self.sampler.samples,
+            collapsed_path,
+            traces_path,
+            tracer.breakdown(),
+        )
+
+
+_session_lock = asyncio.Lock()
+
+
+async def profile_for(
+    seconds: float,
+    sample_rate: float = 1.0,
+    interval: float = SAMPLE_INTERVAL,
+    out_dir: Path = PROFILE_DIR,
+) -> ProfileReport:
+    """Run a ``ProfilingSession`` for ``seconds``; one session at a time."""
+    if _session_lock.locked():
+        raise RuntimeError("A profiling session is already running")
+    async with _session_lock:
+        session = ProfilingSession(sample_rate, interval, out_dir)
+        session.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            report = session.stop()
+        return report
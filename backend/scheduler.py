@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional, Sequence, Tuple, TypeVar
+
+import numpy as np
+
+from model.main import ResumeProfile
+from model.matcher import JobMatcher, Recommendations
+from model.preferences import PreferenceVector
+
+# Tiers, best first: fresh résumé encoding or the stored profile embedding (same
+# ranking, without the encoder), the user's last result, BM25/filter-only
+# ranking, and finally "try again".
+TIERS = ("full", "cached_embedding", "precomputed", "lexical", "try_again")
+
+T = TypeVar("T")
+
+
+@dataclass
+class ScheduledResult:
+    tier: str
+    result: Optional[Recommendations] = None
+    # Set when the full tier encoded the résumé, so the caller can cache it.
+    embedding: Optional[np.ndarray] = None
+
+
+class LatencyBudgetScheduler:
+    """Serves recommendations within a latency budget, degrading one tier at a time under load.
+
+    Matcher work runs in threads and is counted while it runs, including work
+    whose caller already gave up waiting: encoding is skipped once
+    ``max_encoder_queue`` encodings are in flight, ranking tiers once
+    ``max_queue`` jobs are. Each request starts at most one semantic job,
+    which either encodes the résumé or reuses its stored embedding.
+
+    Each tier only waits until its share of the budget is spent; ``reserve``
+    of the budget is kept for the lexical tier. Semantic results, including
+    those that finish after their caller gave up, are kept as the user's
+    precomputed result.
+    """
+
+    def __init__(
+        self,
+        matcher: JobMatcher,
+        budget: float = 1.5,
+        max_encoder_queue: int = 4,
+        max_queue: int = 16,
+        reserve: float = 0.25,
+        precomputed_ttl: float = 900.0,
+        max_precomputed: int = 10_000,
+    ):
+        self.matcher = matcher
+        self.budget = budget
+        self.max_encoder_queue = max_encoder_queue
+        self.max_queue = max_queue
+        self.reserve = reserve
+        self.precomputed_ttl = precomputed_ttl
+        self.max_precomputed = max_precomputed
+        self.encoder_depth = 0
+        self.depth = 0
+        # Cleared while ``exclusive`` work has the matcher to itself.
+        self._open = asyncio.Event()
+        self._open.set()
+        self._idle = asyncio.Event()
+        self._precomputed: "OrderedDict[int, Tuple[float, Recommendations]]" = OrderedDict()
+
+    async def recommend(
+        self,
+        user_id: int,
+        profile: ResumeProfile,
+        preferences: Optional[PreferenceVector],
+        cached_embedding: Optional[Sequence[float]] = None,
+        limit: int = 10,
+    ) -> ScheduledResult:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.budget
+        ranking_deadline = deadline - self.budget * self.reserve
+
+        # One semantic job per request: the stored profile embedding replaces the
+        # encoding when there is one, and a job that ran out of budget keeps
+        # running (and counting towards ``depth``) instead of being retried.
+        encode = cached_embedding is None
+        if self.depth < self.max_queue and (not encode or self.encoder_depth < self.max_encoder_queue):
+            cached = None if encode else np.asarray(cached_embedding, dtype=np.float32)
+
+            def semantic() -> Tuple[np.ndarray, Recommendations]:
+                embedding = self.matcher.encode_profile(profile) if encode else cached
+                return embedding, self.matcher.recommend_relaxed(
+                    profile, preferences, limit=limit, query_embedding=embedding
+                )
+
+            done = await self._run(user_id, semantic, ranking_deadline, encoder=encode)
+            if done is not None:
+                if encode:
+                    return ScheduledResult("full", done[1], embedding=done[0])
+                return ScheduledResult("cached_embedding", done[1])
+
+        precomputed = self.precomputed(user_id)
+        if precomputed is not None:
+            return ScheduledResult("precomputed", precomputed)
+
+        if self.depth < self.max_queue:
+            done = await self._run(
+                user_id,
+                lambda: self.matcher.recommend_relaxed(profile, preferences, limit=limit, lexical_only=True),
+                deadline,
+                remember=False,
+            )
+            if done is not None:
+                return ScheduledResult("lexical", done)
+        return ScheduledResult("try_again")
+
+    async def _run(
+        self, user_id: int, work: Callable, until: float, encoder: bool = False, remember: bool = True
+    ):
+        """Run ``work`` in a thread and wait for it until ``until``; ``None`` if it did not finish."""
+        loop = asyncio.get_running_loop()
+        if not self._open.is_set():
+            try:
+                await asyncio.wait_for(self._open.wait(), until - loop.time())
+            except asyncio.TimeoutError:
+                return None
+        remaining = until - loop.time()
+        if remaining <= 0:
+            return None
+        self.depth += 1
+        self.encoder_depth += encoder
+        task = asyncio.ensure_future(asyncio.to_thread(work))
+
+        def finished(task: asyncio.Future) -> None:
+            self.depth -= 1
+            self.encoder_depth -= encoder
+            if not self.depth:
+                self._idle.set()
+            if remember and not task.cancelled() and task.exception() is None:
+                result = task.result()
+                self._remember(user_id, result[1] if isinstance(result, tuple) else result)
+
+        task.add_done_callback(finished)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), remaining)
+        except asyncio.TimeoutError:
+            return None
+
+    async def exclusive(self, work: Callable[[], T]) -> T:
+        """Run ``work`` in a thread once no matcher job is running, holding new ones back meanwhile.
+
+        For work that mutates the matcher, such as ``JobMatcher.sync``; requests
+        arriving in the meantime wait within their budget or degrade as usual.
+        """
+        self._open.clear()
+        try:
+            while self.depth:
+                self._idle.clear()
+                await self._idle.wait()
+            return await asyncio.to_thread(work)
+        finally:
+            self._open.set()
+
+    def _remember(self, user_id: int, result: Recommendations) -> None:
+        if not result.matches:
+            return
+        self._precomputed[user_id] = (time.monotonic(), result)
+        self._precomputed.move_to_end(user_id)
+        while len(self._precomputed) > self.max_precomputed:
+            self._precomputed.popitem(last=False)
+
+    def precomputed(self, user_id: int) -> Optional[Recommendations]:
+        entry = self._precomputed.get(user_id)
+        if entry is None or time.monotonic() - entry[0] > self.precomputed_ttl:
+            return None
+        return entry[1]
+
+    def forget(self, user_id: int) -> None:
+        """Drop the precomputed result, e.g. after the résumé changed."""
+        self._precomputed.pop(user_id, None)
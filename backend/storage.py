@@ -1,9 +1,13 @@
 from __future__ import annotations
 
 import json
+import sqlite3
+from contextlib import closing
 from dataclasses import asdict
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
 
 from model.main import ResumeProfile
 from model.preferences import PreferenceVector
@@ -12,12 +16,60 @@ from model.preferences import PreferenceVector
 BASE_DIR = Path(__file__).resolve().parents[1]
 STATE_PATH = BASE_DIR / "data" / "user_state.json"
 
+# Vectors kept out of the JSON state: name in ``UserVectors`` -> key in the old JSON entry.
+PROFILE_VECTOR = "profile"
+CENTROID_VECTORS = {"liked": "liked_centroid", "disliked": "disliked_centroid"}
+
+
+class UserVectors:
+    """Per-user float32 vectors (profile embedding, feedback centroids) in SQLite.
+
+    A like rewrites one small row instead of re-dumping every user's
+    vectors as JSON text.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS user_vectors ("
+                "user_id TEXT NOT NULL, name TEXT NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (user_id, name))"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    def get(self, user_id: str, name: str) -> Optional[np.ndarray]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT vector FROM user_vectors WHERE user_id = ? AND name = ?", (user_id, name)
+            ).fetchone()
+        return np.frombuffer(row[0], dtype=np.float32).copy() if row else None
+
+    def put(self, user_id: str, vectors: Mapping[str, Optional[Sequence[float]]]) -> None:
+        """Store the given vectors of one user; ``None`` deletes a vector."""
+        self.put_many((user_id, name, vector) for name, vector in vectors.items())
+
+    def put_many(self, rows: Iterable[Tuple[str, str, Optional[Sequence[float]]]]) -> None:
+        upserts, deletes = [], []
+        for user_id, name, vector in rows:
+            if vector is None:
+                deletes.append((user_id, name))
+            else:
+                upserts.append((user_id, name, np.asarray(vector, dtype=np.float32).tobytes()))
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("DELETE FROM user_vectors WHERE user_id = ? AND name = ?", deletes)
+            conn.executemany("INSERT OR REPLACE INTO user_vectors VALUES (?, ?, ?)", upserts)
+
 
 class UserStorage:
-    def __init__(self, path: Path = STATE_PATH):
+    def __init__(self, path: Path = STATE_PATH, vectors_path: Optional[Path] = None):
         self.path = path
         self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.vectors = UserVectors(vectors_path or path.with_suffix(".vectors.db"))
         self.state = self._load()
+        self._migrate_vectors()
 
     def _load(self) -> Dict:
         if not self.path.exists():
@@ -27,14 +79,51 @@ class UserStorage:
 
     def _save(self) -> None:
         with self.path.open("w", encoding="utf-8") as f:
-            json.dump(self.state, f, ensure_ascii=False, indent=2)
+            json.dump(self.state, f, ensure_ascii=False, separators=(",", ":"))
+
+    def _migrate_vectors(self) -> None:
+        """Move vectors that older versions kept inside the JSON state to ``self.vectors``."""
+        rows = []
+        for user_id, entry in self.state.get("users", {}).items():
+            if "profile_embedding" in entry:
+                rows.append((user_id, PROFILE_VECTOR, entry.pop("profile_embedding")))
+            payload = entry.get("preferences", {})
+            for name, key in CENTROID_VECTORS.items():
+                if key in payload:
+                    rows.append((user_id, name, payload.pop(key)))
+        if rows:
+            self.vectors.put_many(rows)
+            self._save()
 
     def save_profile(self, user_id: int, profile: ResumeProfile) -> None:
         users = self.state.setdefault("users", {})
         user_entry = users.setdefault(str(user_id), {})
         user_entry["profile"] = asdict(profile)
+        # The stored embedding belonged to the previous résumé text.
+        self.vectors.put(str(user_id), {PROFILE_VECTOR: None})
+        self._save()
+
+    def save_profiles(
+        self,
+        profiles: Mapping[str, ResumeProfile],
+        embeddings: Optional[Mapping[str, List[float]]] = None,
+    ) -> None:
+        """Store many profiles (and optional profile embeddings) with a single write."""
+        users = self.state.setdefault("users", {})
+        for user_id, profile in profiles.items():
+            users.setdefault(str(user_id), {})["profile"] = asdict(profile)
+        if embeddings:
+            self.vectors.put_many(
+                (str(user_id), PROFILE_VECTOR, embeddings[user_id]) for user_id in profiles if user_id in embeddings
+            )
         self._save()
 
+    def save_profile_embedding(self, user_id: int, embedding: Sequence[float]) -> None:
+        self.vectors.put(str(user_id), {PROFILE_VECTOR: embedding})
+
+    def get_profile_embedding(self, user_id: int) -> Optional[np.ndarray]:
+        return self.vectors.get(str(user_id), PROFILE_VECTOR)
+
     def get_profile(self, user_id: int) -> Optional[ResumeProfile]:
         user_entry = self.state.get("users", {}).get(str(user_id))
         if not user_entry or "profile" not in user_entry:
@@ -45,10 +134,16 @@ class UserStorage:
     def get_preferences(self, user_id: int) -> PreferenceVector:
         user_entry = self.state.setdefault("users", {}).setdefault(str(user_id), {})
         payload = user_entry.get("preferences", {})
-        return PreferenceVector.from_payload(payload)
+        preferences = PreferenceVector.from_payload(payload)
+        preferences.liked_centroid = self.vectors.get(str(user_id), "liked")
+        preferences.disliked_centroid = self.vectors.get(str(user_id), "disliked")
+        return preferences
 
     def save_preferences(self, user_id: int, preferences: PreferenceVector) -> None:
         user_entry = self.state.setdefault("users", {}).setdefault(str(user_id), {})
         user_entry["preferences"] = preferences.to_payload()
+        self.vectors.put(
+            str(user_id), {"liked": preferences.liked_centroid, "disliked": preferences.disliked_centroid}
+        )
         self._save()
 
@@ -1,14 +1,21 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import re
 import sqlite3
 from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from data.gazetteer import get_gazetteer
 
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 DEFAULT_DB_PATH = BASE_DIR / "data" / "jobmatcher.db"
+# Stay below SQLITE_MAX_VARIABLE_NUMBER on older SQLite builds.
+MAX_QUERY_PARAMS = 900
 
 SCHEMA = """
 CREATE TABLE IF NOT EXISTS vacancies (
@@ -17,6 +24,7 @@ CREATE TABLE IF NOT EXISTS vacancies (
     title TEXT NOT NULL,
     company TEXT,
     city TEXT,
+    city_id INTEGER,
     work_format TEXT,
     salary_min INTEGER,
     salary_max INTEGER,
@@ -26,12 +34,201 @@ CREATE TABLE IF NOT EXISTS vacancies (
     description TEXT,
     url TEXT,
     raw_payload TEXT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    cluster_id TEXT,
+    closed INTEGER NOT NULL DEFAULT 0,
+    content_hash TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP,
+    last_seen_at TIMESTAMP
 );
 
 CREATE INDEX IF NOT EXISTS idx_vacancies_city ON vacancies(city);
 CREATE INDEX IF NOT EXISTS idx_vacancies_format ON vacancies(work_format);
 CREATE INDEX IF NOT EXISTS idx_vacancies_salary ON vacancies(salary_min);
+
+CREATE TABLE IF NOT EXISTS vacancies_archive (
+    id TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    title TEXT NOT NULL,
+    company TEXT,
+    city TEXT,
+    city_id INTEGER,
+    work_format TEXT,
+    salary_min INTEGER,
+    salary_max INTEGER,
+    currency TEXT,
+    experience TEXT,
+    skills TEXT,
+    description TEXT,
+    url TEXT,
+    raw_payload TEXT,
+    cluster_id TEXT,
+    closed INTEGER NOT NULL DEFAULT 0,
+    content_hash TEXT,
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    last_seen_at TIMESTAMP,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    archive_reason TEXT
+);
+"""
+
+# Columns copied verbatim when a vacancy moves to the archive.
+ARCHIVED_COLUMNS = (
+    "id", "source", "title", "company", "city", "city_id", "work_format", "salary_min",
+    "salary_max", "currency", "experience", "skills", "description", "url", "raw_payload",
+    "cluster_id", "closed", "content_hash", "created_at", "updated_at", "last_seen_at",
+)
+
+# Columns whose change makes an upsert rewrite the row. ``raw_payload`` is left
+# out on purpose: sources put volatile counters (views, responses) in it.
+HASHED_COLUMNS = (
+    "source", "title", "company", "city", "work_format", "salary_min", "salary_max",
+    "currency", "experience", "skills", "description", "url", "cluster_id", "closed",
+)
+
+# The unicode61 tokenizer does not fold "ё" into "е", so the full-text table
+# keeps its own normalised copy of the searchable columns, synced by triggers.
+FTS_COLUMNS = ("title", "company", "skills", "description")
+# bm25() column weights, in FTS_COLUMNS order.
+FTS_WEIGHTS = (10.0, 2.0, 5.0, 1.0)
+
+
+def _fold_sql(expr: str) -> str:
+    return f"replace(replace(coalesce({expr}, ''), 'ё', 'е'), 'Ё', 'Е')"
+
+
+FTS_SCHEMA = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS vacancies_fts USING fts5(
+    {", ".join(FTS_COLUMNS)},
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS vacancies_fts_insert AFTER INSERT ON vacancies BEGIN
+    INSERT INTO vacancies_fts(rowid, {", ".join(FTS_COLUMNS)})
+    VALUES (new.rowid, {", ".join(_fold_sql("new." + column) for column in FTS_COLUMNS)});
+END;
+
+CREATE TRIGGER IF NOT EXISTS vacancies_fts_delete AFTER DELETE ON vacancies BEGIN
+    DELETE FROM vacancies_fts WHERE rowid = old.rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS vacancies_fts_update
+AFTER UPDATE OF {", ".join(FTS_COLUMNS)} ON vacancies BEGIN
+    DELETE FROM vacancies_fts WHERE rowid = old.rowid;
+    INSERT INTO vacancies_fts(rowid, {", ".join(FTS_COLUMNS)})
+    VALUES (new.rowid, {", ".join(_fold_sql("new." + column) for column in FTS_COLUMNS)});
+END;
+"""
+
+FTS_REBUILD = f"""
+DELETE FROM vacancies_fts;
+INSERT INTO vacancies_fts(rowid, {", ".join(FTS_COLUMNS)})
+SELECT rowid, {", ".join(_fold_sql(column) for column in FTS_COLUMNS)} FROM vacancies;
+"""
+
+_FTS_TOKEN = re.compile(r"\w+")
+
+
+def casefold(value: Optional[str]) -> Optional[str]:
+    """Python-side LOWER(): SQLite's own only folds ASCII, not Cyrillic."""
+    return value.lower().replace("ё", "е") if value is not None else None
+
+
+def fts_query(text: str) -> Optional[str]:
+    """Turn free user input into an FTS5 OR-query of quoted prefix terms."""
+    tokens = _FTS_TOKEN.findall(text.lower().replace("ё", "е"))
+    if not tokens:
+        return None
+    return " OR ".join(f'"{token}"*' for token in dict.fromkeys(tokens))
+
+
+def filter_clause(
+    city: Optional[str] = None,
+    work_format: Optional[str] = None,
+    min_salary: Optional[int] = None,
+    table: str = "vacancies",
+    region: bool = False,
+) -> Tuple[List[str], Dict[str, Any]]:
+    """SQL conditions and parameters for the hard recommendation filters.
+
+    Cities known to the gazetteer compare on the indexed ``city_id`` (every
+    settlement of its region with ``region``); others fall back to the name.
+    """
+    filters: List[str] = []
+    params: Dict[str, Any] = {}
+    city_id = get_gazetteer().city_id(city)
+    if city_id is not None:
+        city_ids = get_gazetteer().region_ids(city_id) if region else [city_id]
+        names = [f"city_id_{idx}" for idx in range(len(city_ids))]
+        filters.append(f"{table}.city_id IN ({', '.join(':' + name for name in names)})")
+        params.update(zip(names, city_ids))
+    elif city:
+        filters.append(f"casefold({table}.city) = casefold(:city)")
+        params["city"] = city
+    if work_format and work_format != "не указано":
+        filters.append(f"{table}.work_format = :work_format")
+        params["work_format"] = work_format
+    if min_salary:
+        filters.append(
+            f"({table}.salary_min IS NULL OR {table}.salary_min >= :salary_min_threshold)"
+        )
+        params["salary_min_threshold"] = int(min_salary * 0.6)
+    return filters, params
+
+
+def content_hash(payload: Dict[str, Any]) -> str:
+    """Digest of the ``HASHED_COLUMNS`` of a row as ``upsert`` stores it."""
+    values = [payload.get(column) for column in HASHED_COLUMNS]
+    return hashlib.sha1(json.dumps(values, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class UpsertResult:
+    """Ids of an ``upsert`` batch by outcome; ``closed`` lists written rows that are now closed."""
+
+    inserted: Set[str] = field(default_factory=set)
+    updated: Set[str] = field(default_factory=set)
+    unchanged: Set[str] = field(default_factory=set)
+    closed: Set[str] = field(default_factory=set)
+    updated_at: Optional[str] = None
+
+    @property
+    def changed(self) -> Set[str]:
+        return self.inserted | self.updated
+
+    def merge(self, other: "UpsertResult") -> None:
+        """Fold in a later batch; an id keeps its strongest outcome (inserted > updated > unchanged)."""
+        self.inserted |= other.inserted
+        self.updated |= other.updated - self.inserted
+        self.unchanged |= other.unchanged - self.inserted - self.updated
+        self.unchanged -= self.changed
+        self.closed = (self.closed - other.changed) | other.closed
+        self.updated_at = other.updated_at or self.updated_at
+
+
+# Columns added after the first release; applied to older databases on start.
+COLUMN_MIGRATIONS = {
+    "vacancies": {
+        "cluster_id": "TEXT",
+        "closed": "INTEGER NOT NULL DEFAULT 0",
+        "content_hash": "TEXT",
+        "updated_at": "TIMESTAMP",
+        "city_id": "INTEGER",
+        "last_seen_at": "TIMESTAMP",
+    },
+    "vacancies_archive": {
+        "content_hash": "TEXT",
+        "updated_at": "TIMESTAMP",
+        "city_id": "INTEGER",
+        "last_seen_at": "TIMESTAMP",
+    },
+}
+
+# Indexes on migrated columns, created once the columns exist.
+MIGRATED_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_vacancies_city_id ON vacancies(city_id);
+CREATE INDEX IF NOT EXISTS idx_vacancies_updated_at ON vacancies(updated_at);
 """
 
 
@@ -45,6 +242,7 @@ class JobDatabase:
     def connection(self):
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
+        conn.create_function("casefold", 1, casefold, deterministic=True)
         try:
             yield conn
             conn.commit()
@@ -53,37 +251,117 @@ class JobDatabase:
 
     def _ensure_schema(self) -> None:
         with self.connection() as conn:
+            # WAL lets ingestion write while ``live_snapshot`` holds its read
+            # transaction; the mode is stored in the database file.
+            conn.execute("PRAGMA journal_mode=WAL")
+            has_fts = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'vacancies_fts'"
+            ).fetchone()
             conn.executescript(SCHEMA)
+            for table, columns in COLUMN_MIGRATIONS.items():
+                existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+                for column, definition in columns.items():
+                    if column not in existing:
+                        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            conn.executescript(MIGRATED_INDEXES)
+            self._backfill_city_ids(conn)
+            # Rows stored before ``last_seen_at``: last seen when they were last written.
+            conn.execute(
+                "UPDATE vacancies SET last_seen_at = COALESCE(updated_at, created_at) WHERE last_seen_at IS NULL"
+            )
+            conn.executescript(FTS_SCHEMA)
+            if not has_fts:
+                # Databases created before full-text search: index existing rows once.
+                conn.executescript(FTS_REBUILD)
+
+    @staticmethod
+    def _backfill_city_ids(conn: sqlite3.Connection) -> None:
+        """Resolve ``city_id`` for rows stored before the column or the settlement existed."""
+        gazetteer = get_gazetteer()
+        for table in ("vacancies", "vacancies_archive"):
+            cities = conn.execute(
+                f"SELECT DISTINCT city FROM {table} WHERE city_id IS NULL AND city IS NOT NULL AND city != ''"
+            ).fetchall()
+            resolved = [(gazetteer.city_id(row["city"]), row["city"]) for row in cities]
+            conn.executemany(
+                f"UPDATE {table} SET city_id = ? WHERE city = ? AND city_id IS NULL",
+                [pair for pair in resolved if pair[0] is not None],
+            )
+
+    def upsert(self, rows: Iterable[dict]) -> UpsertResult:
+        """Insert new rows and rewrite changed ones; rows whose content hash matches are skipped.
 
-    def upsert(self, rows: Iterable[dict]) -> None:
-        payloads = [
-            {
+        Written rows get one shared ``updated_at``, returned with the ids of
+        inserted, updated and unchanged rows so callers can act on the delta.
+        Every row in the batch, unchanged ones included, gets ``last_seen_at``
+        bumped, which is what ``archive_stale`` expires on.
+        """
+        gazetteer = get_gazetteer()
+        payloads: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            payload = {
                 **row,
-                "skills": json.dumps(row.get("skills") or []),
+                "skills": json.dumps(row.get("skills") or [], ensure_ascii=False),
                 "raw_payload": json.dumps(row.get("raw_payload") or {}, ensure_ascii=False),
+                "cluster_id": row.get("cluster_id") or row["id"],
+                "closed": int(bool(row.get("closed"))),
+                "city_id": gazetteer.city_id(row.get("city")),
             }
-            for row in rows
-        ]
+            payload["content_hash"] = content_hash(payload)
+            payloads[row["id"]] = payload
+        result = UpsertResult()
         if not payloads:
-            return
+            return result
         with self.connection() as conn:
+            seen_at = conn.execute("SELECT CURRENT_TIMESTAMP").fetchone()[0]
+            stored = {
+                row["id"]: row["content_hash"]
+                for row in self._select_ids(conn, "vacancies", list(payloads), "id, content_hash")
+            }
+            writes = []
+            for vacancy_id, payload in payloads.items():
+                if vacancy_id not in stored:
+                    result.inserted.add(vacancy_id)
+                elif stored[vacancy_id] != payload["content_hash"]:
+                    result.updated.add(vacancy_id)
+                else:
+                    result.unchanged.add(vacancy_id)
+                    continue
+                if payload["closed"]:
+                    result.closed.add(vacancy_id)
+                writes.append(payload)
+            unchanged = sorted(result.unchanged)
+            for start in range(0, len(unchanged), MAX_QUERY_PARAMS):
+                chunk = unchanged[start : start + MAX_QUERY_PARAMS]
+                conn.execute(
+                    f"UPDATE vacancies SET last_seen_at = ? WHERE id IN ({', '.join('?' for _ in chunk)})",
+                    [seen_at, *chunk],
+                )
+            if not writes:
+                return result
+            result.updated_at = seen_at
+            for payload in writes:
+                payload["updated_at"] = payload["last_seen_at"] = seen_at
             conn.executemany(
                 """
                 INSERT INTO vacancies (
-                    id, source, title, company, city, work_format,
+                    id, source, title, company, city, city_id, work_format,
                     salary_min, salary_max, currency, experience,
-                    skills, description, url, raw_payload
+                    skills, description, url, raw_payload, cluster_id, closed,
+                    content_hash, updated_at, last_seen_at
                 )
                 VALUES (
-                    :id, :source, :title, :company, :city, :work_format,
+                    :id, :source, :title, :company, :city, :city_id, :work_format,
                     :salary_min, :salary_max, :currency, :experience,
-                    :skills, :description, :url, :raw_payload
+                    :skills, :description, :url, :raw_payload, :cluster_id, :closed,
+                    :content_hash, :updated_at, :last_seen_at
                 )
                 ON CONFLICT(id) DO UPDATE SET
                     source=excluded.source,
                     title=excluded.title,
                     company=excluded.company,
                     city=excluded.city,
+                    city_id=excluded.city_id,
                     work_format=excluded.work_format,
                     salary_min=excluded.salary_min,
                     salary_max=excluded.salary_max,
@@ -92,10 +370,37 @@ class JobDatabase:
                     skills=excluded.skills,
                     description=excluded.description,
                     url=excluded.url,
-                    raw_payload=excluded.raw_payload
+                    raw_payload=excluded.raw_payload,
+                    cluster_id=excluded.cluster_id,
+                    closed=excluded.closed,
+                    content_hash=excluded.content_hash,
+                    updated_at=excluded.updated_at,
+                    last_seen_at=excluded.last_seen_at
                 """,
-                payloads,
+                writes,
             )
+        return result
+
+    def current_timestamp(self) -> str:
+        with self.connection() as conn:
+            return conn.execute("SELECT CURRENT_TIMESTAMP").fetchone()[0]
+
+    def changes_since(self, since: str) -> UpsertResult:
+        """Ids written or archived at or after ``since``, for readers that did not run the upserts.
+
+        Live rows are reported as ``updated`` (the reader tells new ids from
+        rewritten ones), closed and archived rows as ``closed``. The result's
+        ``updated_at`` is the cursor for the next call; timestamps have
+        one-second resolution, so a row can be reported twice but never missed.
+        """
+        result = UpsertResult()
+        with self.connection() as conn:
+            result.updated_at = conn.execute("SELECT CURRENT_TIMESTAMP").fetchone()[0]
+            for row in conn.execute("SELECT id, closed FROM vacancies WHERE updated_at >= ?", (since,)):
+                (result.closed if row["closed"] else result.updated).add(row["id"])
+            archived = conn.execute("SELECT id FROM vacancies_archive WHERE archived_at >= ?", (since,))
+            result.closed |= {row["id"] for row in archived} - result.updated
+        return result
 
     def fetch(
         self,
@@ -103,21 +408,13 @@ class JobDatabase:
         city: Optional[str] = None,
         work_format: Optional[str] = None,
         min_salary: Optional[int] = None,
+        region: bool = False,
+        include_closed: bool = False,
     ) -> List[sqlite3.Row]:
         query = "SELECT * FROM vacancies"
-        filters = []
-        params = {}
-        if city:
-            filters.append("LOWER(city) = LOWER(:city)")
-            params["city"] = city
-        if work_format and work_format != "не указано":
-            filters.append("work_format = :work_format")
-            params["work_format"] = work_format
-        if min_salary:
-            filters.append(
-                "(salary_min IS NULL OR salary_min >= :salary_min_threshold)"
-            )
-            params["salary_min_threshold"] = int(min_salary * 0.6)
+        filters, params = filter_clause(city, work_format, min_salary, region=region)
+        if not include_closed:
+            filters.append("closed = 0")
         if filters:
             query += " WHERE " + " AND ".join(filters)
         query += " ORDER BY created_at DESC"
@@ -127,16 +424,138 @@ class JobDatabase:
             rows = cur.fetchall()
         return rows
 
+    @contextmanager
+    def live_snapshot(
+        self, batch_size: int = 1000, columns: Sequence[str] = ()
+    ) -> Iterator[Tuple[int, Iterator[List[sqlite3.Row]]]]:
+        """Count of live vacancies plus a cursor over them in batches, from one read transaction.
+
+        SQLite steps the cursor lazily, so only ``batch_size`` rows are in
+        memory at a time, and the count matches exactly what the cursor yields.
+        The database runs in WAL mode, so writers are not blocked meanwhile.
+        ``columns`` limits the select list (all columns by default).
+        """
+        select = ", ".join(columns) or "*"
+        with self.connection() as conn:
+            conn.execute("BEGIN")
+            total = conn.execute("SELECT COUNT(*) FROM vacancies WHERE closed = 0").fetchone()[0]
+            cur = conn.execute(f"SELECT {select} FROM vacancies WHERE closed = 0 ORDER BY rowid")
+            yield total, iter(lambda: cur.fetchmany(batch_size), [])
+
+    def iter_rows(self, batch_size: int = 1000, columns: Sequence[str] = ()) -> Iterator[sqlite3.Row]:
+        """Stream live vacancies in a stable order without materialising the table."""
+        with self.live_snapshot(batch_size, columns) as (_, batches):
+            for batch in batches:
+                yield from batch
+
+    def search(
+        self,
+        text: str,
+        *,
+        city: Optional[str] = None,
+        work_format: Optional[str] = None,
+        min_salary: Optional[int] = None,
+        region: bool = False,
+        limit: int = 20,
+    ) -> List[sqlite3.Row]:
+        """Full-text search over title, company, skills and description, best bm25 first.
+
+        Rows carry an extra ``rank`` column (lower is better).
+        """
+        match = fts_query(text)
+        if match is None:
+            return []
+        filters, params = filter_clause(city, work_format, min_salary, region=region)
+        weights = ", ".join(str(weight) for weight in FTS_WEIGHTS)
+        query = f"""
+            SELECT vacancies.*, bm25(vacancies_fts, {weights}) AS rank
+            FROM vacancies_fts
+            JOIN vacancies ON vacancies.rowid = vacancies_fts.rowid
+            WHERE vacancies_fts MATCH :match AND vacancies.closed = 0
+        """
+        if filters:
+            query += " AND " + " AND ".join(filters)
+        query += " ORDER BY rank LIMIT :limit"
+        with self.connection() as conn:
+            cur = conn.execute(query, {**params, "match": match, "limit": limit})
+            return cur.fetchall()
+
     def count(self) -> int:
         with self.connection() as conn:
             cur = conn.execute("SELECT COUNT(*) FROM vacancies")
             return cur.fetchone()[0]
 
     def get(self, vacancy_id: str) -> Optional[sqlite3.Row]:
+        """Look a vacancy up by id, falling back to the archive."""
+        rows = self.get_many([vacancy_id])
+        return rows[0] if rows else None
+
+    def get_many(self, vacancy_ids: Sequence[str]) -> List[sqlite3.Row]:
+        """Live rows for ``vacancy_ids``; ids not found there are looked up in the archive.
+
+        Archive rows carry ``archived_at`` and ``archive_reason`` columns.
+        """
+        ids = list(dict.fromkeys(vacancy_ids))
+        rows: List[sqlite3.Row] = []
+        if not ids:
+            return rows
         with self.connection() as conn:
-            cur = conn.execute(
-                "SELECT * FROM vacancies WHERE id = :id",
-                {"id": vacancy_id},
+            for table in ("vacancies", "vacancies_archive"):
+                found = self._select_ids(conn, table, ids)
+                rows.extend(found)
+                seen = {row["id"] for row in found}
+                ids = [vacancy_id for vacancy_id in ids if vacancy_id not in seen]
+                if not ids:
+                    break
+        return rows
+
+    @staticmethod
+    def _select_ids(
+        conn: sqlite3.Connection, table: str, ids: List[str], columns: str = "*"
+    ) -> List[sqlite3.Row]:
+        rows: List[sqlite3.Row] = []
+        for start in range(0, len(ids), MAX_QUERY_PARAMS):
+            chunk = ids[start : start + MAX_QUERY_PARAMS]
+            placeholders = ", ".join("?" for _ in chunk)
+            cur = conn.execute(f"SELECT {columns} FROM {table} WHERE id IN ({placeholders})", chunk)
+            rows.extend(cur.fetchall())
+        return rows
+
+    def archive_stale(self, max_age_days: Optional[float]) -> Dict[str, int]:
+        """Move closed vacancies and those no ingest has seen for ``max_age_days`` to the archive.
+
+        Returns the number of archived rows per reason (``closed``/``expired``).
+        The FTS delete trigger drops them from the search index as well.
+        """
+        columns = ", ".join(ARCHIVED_COLUMNS)
+        condition = "closed = 1"
+        params: Dict[str, Any] = {}
+        if max_age_days is not None:
+            condition += " OR last_seen_at < datetime('now', :age)"
+            params["age"] = f"-{max_age_days} days"
+        with self.connection() as conn:
+            conn.execute(
+                f"""
+                INSERT OR REPLACE INTO vacancies_archive ({columns}, archive_reason)
+                SELECT {columns}, CASE WHEN closed = 1 THEN 'closed' ELSE 'expired' END
+                FROM vacancies WHERE {condition}
+                """,
+                params,
             )
-            return cur.fetchone()
+            counts = {
+                row["reason"]: row["total"]
+                for row in conn.execute(
+                    f"""
+                    SELECT CASE WHEN closed = 1 THEN 'closed' ELSE 'expired' END AS reason,
+                           COUNT(*) AS total
+                    FROM vacancies WHERE {condition} GROUP BY reason
+                    """,
+                    params,
+                )
+            }
+            conn.execute(f"DELETE FROM vacancies WHERE {condition}", params)
+        return counts
 
+    def live_ids(self) -> List[str]:
+        with self.connection() as conn:
+            return [row[0] for row in conn.execute("SELECT id FROM vacancies WHERE closed = 0")]
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from data.database import JobDatabase
+
+
+# All a stored row contributes to the index: its ids and fingerprint text.
+FINGERPRINT_COLUMNS = ("id", "cluster_id", "title", "company", "description")
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+BANDS = 16
+# Prime just above 2**32; coefficients stay below 2**31 so a*x+b fits in uint64.
+_MERSENNE_LIKE_PRIME = np.uint64(4294967311)
+
+
+@dataclass
+class DedupResult:
+    canonical: List[dict]
+    cluster_of: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def duplicates(self) -> int:
+        return len(self.cluster_of) - len(self.canonical)
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\W+", " ", text.lower().replace("ё", "е")).strip()
+
+
+def shingle_hashes(text: str, size: int = SHINGLE_SIZE) -> np.ndarray:
+    normalized = _normalize(text)
+    if len(normalized) <= size:
+        grams = {normalized}
+    else:
+        grams = {normalized[i : i + size] for i in range(len(normalized) - size + 1)}
+    return np.fromiter(
+        (zlib.crc32(gram.encode("utf-8")) for gram in grams),
+        dtype=np.uint64,
+        count=len(grams),
+    )
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, 2**31, size=num_perm, dtype=np.uint64)[:, None]
+        self.b = rng.integers(0, 2**31, size=num_perm, dtype=np.uint64)[:, None]
+        self.num_perm = num_perm
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = shingle_hashes(text)
+        return ((self.a * hashes[None, :] + self.b) % _MERSENNE_LIKE_PRIME).min(axis=1)
+
+
+def vacancy_fingerprint_text(row: dict) -> str:
+    return " ".join(
+        str(row.get(key) or "") for key in ("title", "company", "description")
+    )
+
+
+def _quality(row: dict) -> tuple:
+    return (
+        row.get("salary_min") is not None or row.get("salary_max") is not None,
+        len(row.get("description") or ""),
+        len(row.get("skills") or []),
+    )
+
+
+class _UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, item: int) -> int:
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, left: int, right: int) -> None:
+        root_left, root_right = self.find(left), self.find(right)
+        if root_left != root_right:
+            self.parent[max(root_left, root_right)] = min(root_left, root_right)
+
+
+class DedupIndex:
+    """MinHash signatures and LSH band buckets of stored vacancies.
+
+    Holds only each row's id, cluster id and signature, so a long-running
+    ingest can check every batch against the catalog without re-hashing it
+    or keeping the rows. Bucket heads are the first row that landed there.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = NUM_PERM, bands: int = BANDS):
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.ids: List[str] = []
+        self.clusters: List[str] = []
+        self.signatures: List[np.ndarray] = []
+        self.position: Dict[str, int] = {}
+        self.buckets: List[Dict[bytes, int]] = [{} for _ in range(bands)]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        step = self.rows_per_band
+        return [signature[band * step : (band + 1) * step].tobytes() for band in range(self.bands)]
+
+    def _similar(self, left: np.ndarray, right: np.ndarray) -> bool:
+        return np.mean(left == right) >= self.threshold
+
+    def add(self, row: dict, signature: Optional[np.ndarray] = None) -> None:
+        """Store (or refresh) one canonical row."""
+        if signature is None:
+            signature = self.hasher.signature(vacancy_fingerprint_text(row))
+        cluster_id = row.get("cluster_id") or row["id"]
+        idx = self.position.get(row["id"])
+        if idx is None:
+            idx = self.position[row["id"]] = len(self.ids)
+            self.ids.append(row["id"])
+            self.clusters.append(cluster_id)
+            self.signatures.append(signature)
+        else:
+            # An update: its old band keys stay, but candidates are confirmed on the new signature.
+            self.clusters[idx] = cluster_id
+            self.signatures[idx] = signature
+        for buckets, key in zip(self.buckets, self._band_keys(signature)):
+            buckets.setdefault(key, idx)
+
+    def extend(self, rows: Iterable[dict]) -> None:
+        for row in rows:
+            self.add(row)
+
+    def deduplicate(self, rows: Sequence[dict], store: bool = True) -> DedupResult:
+        """Cluster ``rows`` among themselves and against the index; see :func:`deduplicate`.
+
+        With ``store`` the canonical rows are added to the index afterwards.
+        """
+        if not rows:
+            return DedupResult(canonical=[])
+        signatures = [self.hasher.signature(vacancy_fingerprint_text(row)) for row in rows]
+        batch_position = {row["id"]: idx for idx, row in enumerate(rows)}
+        # Nodes 0..n-1 are the batch rows; stored rows met as candidates get nodes from n on.
+        n_rows = len(rows)
+        stored_node: Dict[int, int] = {}
+        node_signatures = list(signatures)
+        groups = _UnionFind(n_rows)
+
+        def node_of_stored(idx: int) -> int:
+            # A stored row that is updated in this batch is represented by its new version.
+            batch_idx = batch_position.get(self.ids[idx])
+            if batch_idx is not None:
+                return batch_idx
+            if idx not in stored_node:
+                stored_node[idx] = len(node_signatures)
+                node_signatures.append(self.signatures[idx])
+                groups.parent.append(stored_node[idx])
+            return stored_node[idx]
+
+        for band, buckets in enumerate(self.buckets):
+            local: Dict[bytes, int] = {}
+            step = self.rows_per_band
+            for idx, signature in enumerate(signatures):
+                key = signature[band * step : (band + 1) * step].tobytes()
+                stored = buckets.get(key)
+                head = node_of_stored(stored) if stored is not None else local.setdefault(key, idx)
+                if head == idx or groups.find(head) == groups.find(idx):
+                    continue
+                if self._similar(node_signatures[head], signature):
+                    groups.union(head, idx)
+
+        members: Dict[int, List[int]] = {}
+        for idx in range(n_rows):
+            members.setdefault(groups.find(idx), []).append(idx)
+        anchors_of: Dict[int, List[int]] = {}
+        for idx, node in stored_node.items():
+            anchors_of.setdefault(groups.find(node), []).append(idx)
+
+        canonical: List[tuple] = []
+        cluster_of: Dict[str, str] = {}
+        for root, indices in members.items():
+            anchors = sorted(anchors_of.get(root, []))
+            updates = [idx for idx in indices if rows[idx]["id"] in self.position]
+            if anchors or updates:
+                head_idx = anchors[0] if anchors else self.position[rows[updates[0]]["id"]]
+                cluster_id = self.clusters[head_idx]
+                canonical.extend((idx, {**rows[idx], "cluster_id": cluster_id}) for idx in updates)
+            else:
+                head = max(indices, key=lambda idx: (_quality(rows[idx]), -idx))
+                cluster_id = rows[head]["id"]
+                canonical.append((head, {**rows[head], "cluster_id": cluster_id}))
+            for idx in indices:
+                cluster_of[rows[idx]["id"]] = cluster_id
+        canonical.sort(key=lambda item: item[0])
+        if store:
+            for idx, row in canonical:
+                self.add(row, signatures[idx])
+        return DedupResult(canonical=[row for _, row in canonical], cluster_of=cluster_of)
+
+
+def deduplicate(
+    rows: Sequence[dict],
+    existing: Sequence[dict] = (),
+    threshold: float = 0.8,
+    num_perm: int = NUM_PERM,
+    bands: int = BANDS,
+) -> DedupResult:
+    """Cluster near-duplicate vacancies with MinHash + LSH banding.
+
+    Candidates come from identical signature bands, so the work is linear in
+    the number of rows; each candidate is confirmed against the bucket head
+    by estimated Jaccard similarity. ``existing`` rows (already stored) always
+    stay canonical and are not returned; new rows that duplicate them are
+    dropped and mapped to their cluster. Rows whose id is already stored are
+    updates, so they are always returned with their stored cluster id.
+    Callers deduplicating many batches should keep a :class:`DedupIndex`.
+    """
+    index = DedupIndex(threshold, num_perm, bands)
+    index.extend(existing)
+    return index.deduplicate(rows, store=False)
+
+
+def catalog_index(database: JobDatabase) -> DedupIndex:
+    """A :class:`DedupIndex` over the live catalog, streamed in fingerprint columns only."""
+    index = DedupIndex()
+    index.extend(dict(row) for row in database.iter_rows(columns=FINGERPRINT_COLUMNS))
+    return index
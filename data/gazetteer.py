@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import csv
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+# One row per settlement: ``id,name,region,aliases`` with ``|``-separated
+# aliases. Ids are stored on vacancies, so new rows are appended, never renumbered.
+CITIES_PATH = BASE_DIR / "data" / "cities.csv"
+
+_WORD = re.compile(r"[0-9A-Za-zА-Яа-яЁё]+")
+_QUALIFIER = re.compile(r"\s*\(.*\)$")
+# Case endings stripped before matching, so "в Нижнем Новгороде" finds "Нижний Новгород".
+_ENDINGS = sorted(
+    ("ами", "ями", "ого", "его", "ому", "ему", "ий", "ый", "ая", "яя", "ое", "ее", "ые", "ие",
+     "ых", "их", "ым", "им", "ой", "ей", "ом", "ем", "ах", "ях", "ью",
+     "а", "я", "е", "у", "ю", "и", "ы", "ь", "й", "о"),
+    key=len,
+    reverse=True,
+)
+MIN_STEM = 2
+# Settlements named like common words or surnames ("Зима", "Жуков") only match
+# in free text after a locative cue such as "в" or "г.".
+AMBIGUOUS = frozenset(
+    {
+        "бор", "дно", "зима", "кола", "обь", "оса", "остров", "реж", "сим", "тайга", "терек", "куса",
+        "мирный", "советский", "радужный", "заречный", "майский", "лесной", "светлый", "ясный",
+        "отрадный", "отрадное", "никольское", "пионерский", "покров", "шилка", "бабушкин",
+        "пушкин", "королев", "гагарин", "жуков", "чехов", "лермонтов", "киров", "фокино",
+        "циолковский", "приморск", "кировск", "губкин", "ливны", "онега", "усолье",
+    }
+)
+_CUES = frozenset({"в", "во", "г", "гор", "город", "города", "городе", "из", "под"})
+
+
+def fold(text: str) -> str:
+    return text.strip().lower().replace("ё", "е")
+
+
+def _stem(token: str) -> str:
+    for ending in _ENDINGS:
+        if token.endswith(ending) and len(token) - len(ending) >= MIN_STEM:
+            return token[: -len(ending)]
+    return token
+
+
+def _stems(text: str) -> Tuple[str, ...]:
+    return tuple(_stem(fold(word)) for word in _WORD.findall(text))
+
+
+def _is_abbreviation(alias: str) -> bool:
+    """"СПб", "НН": matched case-sensitively and without stemming."""
+    return sum(char.isupper() for char in alias) >= 2 and len(alias) <= 4
+
+
+@dataclass(frozen=True)
+class City:
+    id: int
+    name: str
+    region: str
+    aliases: Tuple[str, ...] = ()
+
+    @property
+    def base_name(self) -> str:
+        """Name without the disambiguating qualifier: "Троицк (Челябинская область)" -> "Троицк"."""
+        return _QUALIFIER.sub("", self.name)
+
+    @property
+    def key(self) -> str:
+        """Folded full name; the qualifier is kept, so namesakes have distinct keys."""
+        return fold(self.name)
+
+
+class Gazetteer:
+    """Settlements with aliases and regions; exact lookups are dict hits, free text goes through a token trie."""
+
+    def __init__(self, cities: Iterable[City]):
+        self.cities: Dict[int, City] = {}
+        self._by_name: Dict[str, int] = {}
+        self._by_region: Dict[str, List[int]] = {}
+        self._abbreviations: Dict[str, int] = {}
+        self._exact: Set[Tuple[str, ...]] = set()
+        self._trie: Dict = {}
+        for city in cities:
+            self.cities[city.id] = city
+            self._by_region.setdefault(city.region, []).append(city.id)
+            # Earlier rows win name clashes, so the CSV lists the larger namesake first.
+            for name in (city.name, city.base_name, *city.aliases):
+                self._by_name.setdefault(fold(name), city.id)
+            for name in (city.base_name, *city.aliases):
+                if _is_abbreviation(name):
+                    self._abbreviations.setdefault(name, city.id)
+                    continue
+                self._exact.add(tuple(fold(word) for word in _WORD.findall(name)))
+                node = self._trie
+                for stem in _stems(name):
+                    node = node.setdefault(stem, {})
+                node.setdefault(None, city.id)
+
+    def __len__(self) -> int:
+        return len(self.cities)
+
+    @classmethod
+    def from_csv(cls, path: Path = CITIES_PATH) -> "Gazetteer":
+        with path.open(encoding="utf-8") as f:
+            return cls(
+                City(
+                    id=int(row["id"]),
+                    name=row["name"],
+                    region=row["region"],
+                    aliases=tuple(alias for alias in (row.get("aliases") or "").split("|") if alias),
+                )
+                for row in csv.DictReader(f)
+            )
+
+    def lookup(self, name: Optional[str]) -> Optional[City]:
+        """Resolve a city field ("СПб", "Подольск (Московская область)") to a settlement."""
+        if not name:
+            return None
+        folded = fold(name)
+        city_id = self._by_name.get(folded)
+        if city_id is None:
+            city_id = self._by_name.get(_QUALIFIER.sub("", folded))
+        return self.cities[city_id] if city_id is not None else None
+
+    def city_id(self, name: Optional[str]) -> Optional[int]:
+        city = self.lookup(name)
+        return city.id if city else None
+
+    def region_of(self, name: Optional[str]) -> Optional[str]:
+        city = self.lookup(name)
+        return city.region if city else None
+
+    def region_ids(self, city_id: int) -> List[int]:
+        """Ids of every settlement in the region of ``city_id``, itself included."""
+        return list(self._by_region[self.cities[city_id].region])
+
+    def _match_at(self, stems: List[str], start: int) -> Optional[Tuple[int, int]]:
+        """Longest alias starting at ``start`` as ``(city_id, length in words)``."""
+        node, found = self._trie, None
+        for length, stem in enumerate(stems[start:], start=1):
+            node = node.get(stem)
+            if node is None:
+                break
+            if None in node:
+                found = node[None], length
+        return found
+
+    def extract(self, text: str) -> Optional[City]:
+        """Settlement mentioned in free text, or ``None``.
+
+        A match has to start with a capitalised word, which keeps common nouns
+        ("находка") out. The first match after a locative cue ("в Казани",
+        "Город: Пермь") wins; without one only an uninflected name counts, so
+        surnames such as "Иванов" do not resolve to "Иваново".
+        """
+        words = [match.group(0) for match in _WORD.finditer(text)]
+        folded = [fold(word) for word in words]
+        stems = [_stem(word) for word in folded]
+        fallback: Optional[City] = None
+        for start, word in enumerate(words):
+            cued = start > 0 and folded[start - 1] in _CUES
+            if word in self._abbreviations:
+                city, exact = self.cities[self._abbreviations[word]], True
+            elif word[0].isupper():
+                match = self._match_at(stems, start)
+                if match is None:
+                    continue
+                city = self.cities[match[0]]
+                exact = tuple(folded[start : start + match[1]]) in self._exact
+            else:
+                continue
+            if cued:
+                return city
+            if fallback is None and exact and fold(city.base_name) not in AMBIGUOUS:
+                fallback = city
+        return fallback
+
+
+@lru_cache(maxsize=1)
+def get_gazetteer() -> Gazetteer:
+    return Gazetteer.from_csv()
+
+
+def normalize_city(city: Optional[str]) -> str:
+    """Comparable city key: the canonical folded name for known settlements and aliases."""
+    known = get_gazetteer().lookup(city)
+    if known is not None:
+        return known.key
+    return _QUALIFIER.sub("", fold(city or ""))
+
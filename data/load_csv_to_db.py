@@ -6,6 +6,7 @@ from pathlib import Path
 from typing import Dict, List, Optional
 
 from data.database import JobDatabase
+from data.dedup import catalog_index
 
 
 FIELD_MAP = {
@@ -33,8 +34,13 @@ def load_csv(csv_path: Path, db_path: Path) -> None:
         for raw in reader:
             mapped = map_row(raw)
             rows.append(mapped)
-    db.upsert(rows)
-    print(f"Loaded {len(rows)} vacancies into {db_path}")
+    result = catalog_index(db).deduplicate(rows, store=False)
+    changes = db.upsert(result.canonical)
+    print(
+        f"Loaded {len(result.canonical)} vacancies into {db_path}: {len(changes.inserted)} new, "
+        f"{len(changes.updated)} updated, {len(changes.unchanged)} unchanged "
+        f"({result.duplicates} near-duplicates collapsed)"
+    )
 
 
 def map_row(raw: Dict[str, str]) -> Dict:
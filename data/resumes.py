@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, TextIO
+
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+RESUMES_PATH = BASE_DIR / "data" / "resumes.json"
+LABELLED_RESUMES_PATH = BASE_DIR / "data" / "resumes_labelled.jsonl"
+
+TEXT_FIELDS = ("text", "resume", "raw_text")
+
+
+def _iter_json_array(f: TextIO, read_size: int = 1 << 16) -> Iterator[Any]:
+    """Items of a top-level JSON array, decoded one at a time from buffered reads."""
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = "", 0, False
+    started = False
+    while True:
+        while pos < len(buffer) and (buffer[pos].isspace() or (started and buffer[pos] == ",")):
+            pos += 1
+        if pos < len(buffer) and not started:
+            if buffer[pos] != "[":
+                raise ValueError("Expected a JSON array")
+            started, pos = True, pos + 1
+            continue
+        if pos < len(buffer) and buffer[pos] == "]":
+            return
+        item = None
+        if pos < len(buffer):
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                # A value that ends exactly at the buffer's end may continue in the next read.
+                if end == len(buffer) and not eof:
+                    item = None
+        if item is not None:
+            yield item
+            buffer, pos = buffer[end:], 0
+            continue
+        if eof:
+            raise ValueError("Unterminated JSON array")
+        chunk = f.read(read_size)
+        eof = not chunk
+        buffer, pos = buffer[pos:] + chunk, 0
+
+
+def iter_resume_records(path: Path = RESUMES_PATH) -> Iterator[Dict]:
+    """Yield résumé records from a JSON array or a JSONL file without loading it whole."""
+    with path.open(encoding="utf-8") as f:
+        first = ""
+        while not first:
+            char = f.read(1)
+            if not char:
+                return
+            first = char.strip()
+        f.seek(0)
+        if first == "[":
+            yield from _iter_json_array(f)
+            return
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def record_id(record: Dict, fallback: int) -> str:
+    return str(record.get("candidate_id") or record.get("id") or fallback)
+
+
+def record_to_text(record: Dict) -> str:
+    """Return the free-form résumé text, rendering structured records when needed."""
+    for field_name in TEXT_FIELDS:
+        if record.get(field_name):
+            return record[field_name]
+
+    personal = record.get("personal_info") or {}
+    education = record.get("education") or {}
+    experience = record.get("experience") or {}
+    work = record.get("work_preferences") or {}
+    salary = record.get("salary_expectations") or {}
+
+    parts = []
+    if personal.get("name"):
+        parts.append(f"Меня зовут {personal['name']}.")
+    if personal.get("age"):
+        parts.append(f"Мне {personal['age']} лет.")
+    if personal.get("location"):
+        parts.append(f"Живу в городе {personal['location']}.")
+    if education:
+        degree = education.get("degree") or ""
+        specialization = education.get("specialization") or ""
+        parts.append(f"Образование: {degree}, специальность: {specialization}.")
+    if experience.get("total_years") is not None:
+        level = experience.get("level") or ""
+        parts.append(f"Опыт работы {experience['total_years']} лет, уровень {level}.")
+    if record.get("hard_skills"):
+        parts.append("Навыки: " + ", ".join(record["hard_skills"]) + ".")
+    if record.get("interests"):
+        parts.append("Интересы: " + ", ".join(record["interests"]) + ".")
+    if work.get("work_format"):
+        parts.append(f"Формат работы: {work['work_format']}.")
+    if salary.get("desired"):
+        parts.append(f"Ожидания по зарплате {salary['desired']} руб.")
+    if record.get("career_goals"):
+        parts.append("Цели: " + ", ".join(record["career_goals"]) + ".")
+    return "\n".join(parts)
+
+
+def record_labels(record: Dict) -> Dict[str, Any]:
+    """Gold extraction fields: explicit ``labels`` or those implied by a structured record."""
+    if "labels" in record:
+        return record["labels"]
+    personal = record.get("personal_info") or {}
+    work = record.get("work_preferences") or {}
+    salary = record.get("salary_expectations") or {}
+    return {
+        "name": personal.get("name"),
+        "age": personal.get("age"),
+        "city": personal.get("location"),
+        "salary_expectations": salary.get("desired"),
+        "work_format": work.get("work_format") or "не указано",
+        "skills": record.get("hard_skills") or [],
+    }
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional, Sequence
+
+import aiohttp
+
+from backend.concurrency import TokenBucket
+from data.database import JobDatabase, UpsertResult
+from data.dedup import catalog_index
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "JobMatcherAI/1.0 (+https://github.com/jobmatcher-ai)"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class SourceLimit:
+    """Concurrent requests and requests per second allowed for one source."""
+
+    concurrency: int = 2
+    rate: float = 5.0
+
+    def __post_init__(self) -> None:
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.bucket = TokenBucket(self.rate, max(1.0, self.rate))
+
+
+class HttpClient:
+    """One pooled ``aiohttp`` session shared by every source.
+
+    Connections are reused across sources, while each source gets its own
+    concurrency cap and token bucket. ``429`` and ``5xx`` answers are retried
+    with exponential backoff (or the server's ``Retry-After``), pausing that
+    source's bucket so its other requests back off too.
+    """
+
+    def __init__(
+        self,
+        limits: Mapping[str, SourceLimit],
+        connections: int = 20,
+        timeout: float = 30.0,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+    ):
+        self.limits = dict(limits)
+        self.connections = connections
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.requests: Counter = Counter()
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> "HttpClient":
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.connections, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"User-Agent": USER_AGENT},
+        )
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def get_json(self, source: str, url: str, params: Optional[Mapping[str, Any]] = None) -> Any:
+        return await self._get(source, url, params, as_json=True)
+
+    async def get_text(self, source: str, url: str, params: Optional[Mapping[str, Any]] = None) -> str:
+        return await self._get(source, url, params, as_json=False)
+
+    async def _get(self, source: str, url: str, params: Optional[Mapping[str, Any]], as_json: bool) -> Any:
+        limit = self.limits.setdefault(source, SourceLimit())
+        for attempt in range(self.max_retries + 1):
+            async with limit.semaphore:
+                await limit.bucket.acquire()
+                self.requests[source] += 1
+                async with self.session.get(url, params=params) as response:
+                    if response.status not in RETRY_STATUSES or attempt == self.max_retries:
+                        response.raise_for_status()
+                        return await (response.json() if as_json else response.text())
+                    delay = self._retry_delay(response.headers.get("Retry-After"), attempt)
+            logger.warning("%s answered %s for %s, retrying in %.1fs", source, response.status, url, delay)
+            limit.bucket.pause(delay)
+        raise RuntimeError("unreachable")
+
+    def _retry_delay(self, retry_after: Optional[str], attempt: int) -> float:
+        try:
+            return float(retry_after)
+        except (TypeError, ValueError):
+            return self.backoff * 2**attempt
+
+
+class SourceAdapter(ABC):
+    """A vacancy source: yields pages of rows in ``JobDatabase.upsert`` format."""
+
+    name: str = "source"
+
+    def __init__(self, concurrency: int = 2, rate: float = 5.0):
+        self.limit = SourceLimit(concurrency, rate)
+
+    @abstractmethod
+    def pages(self, client: HttpClient) -> AsyncIterator[List[Dict]]:
+        ...
+
+
+@dataclass
+class IngestReport:
+    fetched: Counter = field(default_factory=Counter)
+    changes: UpsertResult = field(default_factory=UpsertResult)
+    duplicates: int = 0
+    errors: Dict[str, str] = field(default_factory=dict)
+    requests: Counter = field(default_factory=Counter)
+    seconds: float = 0.0
+
+
+async def ingest(
+    sources: Sequence[SourceAdapter],
+    database: JobDatabase,
+    batch_size: int = 200,
+    connections: int = 20,
+    dedup: bool = True,
+    queue_pages: int = 16,
+) -> IngestReport:
+    """Fetch all sources concurrently and stream their rows into ``database``.
+
+    Pages go through a bounded queue, so a fast source cannot run ahead of
+    the writer; rows are deduplicated against the stored catalog and written
+    with one ``upsert`` per ``batch_size`` rows, off the event loop. A
+    failing source is reported and does not stop the others. Rows whose
+    content did not change are skipped and counted in ``report.changes``.
+    """
+    report = IngestReport()
+    started = time.perf_counter()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_pages)
+    # Signatures of the stored catalog, built once; each flushed batch is added to it.
+    index = await asyncio.to_thread(catalog_index, database) if dedup else None
+
+    async def produce(source: SourceAdapter) -> None:
+        try:
+            async for rows in source.pages(client):
+                report.fetched[source.name] += len(rows)
+                await queue.put(rows)
+        except Exception as exc:
+            logger.exception("Source %s failed", source.name)
+            report.errors[source.name] = f"{type(exc).__name__}: {exc}"
+
+    async def flush(batch: List[Dict]) -> None:
+        if dedup:
+            result = await asyncio.to_thread(index.deduplicate, batch)
+            rows = result.canonical
+            report.duplicates += result.duplicates
+        else:
+            rows = batch
+        report.changes.merge(await asyncio.to_thread(database.upsert, rows))
+
+    async def consume() -> None:
+        batch: List[Dict] = []
+        while True:
+            rows = await queue.get()
+            if rows is None:
+                break
+            batch.extend(rows)
+            if len(batch) >= batch_size:
+                await flush(batch)
+                batch = []
+        if batch:
+            await flush(batch)
+
+    limits = {source.name: source.limit for source in sources}
+    async with HttpClient(limits, connections=connections) as client:
+        writer = asyncio.create_task(consume())
+        producers = asyncio.gather(*(produce(source) for source in sources))
+        await asyncio.wait({writer, producers}, return_when=asyncio.FIRST_COMPLETED)
+        if writer.done():
+            # The writer only stops early when it failed; don't leave producers blocked on the queue.
+            producers.cancel()
+            await asyncio.gather(producers, return_exceptions=True)
+            writer.result()
+        await queue.put(None)
+        await writer
+        report.requests = client.requests
+    report.seconds = time.perf_counter() - started
+    return report
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+import re
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from data.load_csv_to_db import normalize_work_format
+
+from .base import HttpClient, SourceAdapter
+
+HABR_URL = "https://career.habr.com"
+_NUMBER = re.compile(r"\d[\d\s]*")
+
+
+def parse_salary(text: str) -> Tuple[Optional[int], Optional[int], str]:
+    """"от 100 000 до 150 000 ₽" -> (100000, 150000, "RUR")."""
+    lowered = text.lower()
+    numbers = [int(re.sub(r"\s", "", match)) for match in _NUMBER.findall(text)]
+    currency = "USD" if "$" in text else "EUR" if "€" in text else "RUR"
+    if not numbers:
+        return None, None, currency
+    if "до" in lowered and "от" not in lowered:
+        return None, numbers[0], currency
+    return numbers[0], numbers[1] if len(numbers) > 1 else None, currency
+
+
+def parse_cards(html: str, base_url: str = HABR_URL) -> List[Dict]:
+    """Rows from the vacancy cards of a Habr Career search page."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "lxml")
+    rows = []
+    for card in soup.select(".vacancy-card"):
+        link = card.select_one(".vacancy-card__title a")
+        if link is None or not link.get("href"):
+            continue
+        vacancy_id = link["href"].rstrip("/").rsplit("/", 1)[-1]
+        company = card.select_one(".vacancy-card__company-title")
+        meta = card.select_one(".vacancy-card__meta")
+        meta_text = meta.get_text(" • ", strip=True) if meta else ""
+        salary_node = card.select_one(".vacancy-card__salary")
+        salary_min, salary_max, currency = parse_salary(salary_node.get_text(" ", strip=True) if salary_node else "")
+        skills = [node.get_text(strip=True) for node in card.select(".vacancy-card__skills a")]
+        rows.append(
+            {
+                "id": f"habr_{vacancy_id}",
+                "source": "career.habr.com",
+                "title": link.get_text(strip=True),
+                "company": company.get_text(strip=True) if company else "",
+                "city": meta_text.split("•")[0].strip() if meta_text else "",
+                "work_format": normalize_work_format(meta_text),
+                "salary_min": salary_min,
+                "salary_max": salary_max,
+                "currency": currency,
+                "experience": None,
+                "skills": skills,
+                "description": card.get_text(" ", strip=True),
+                "url": base_url.rstrip("/") + link["href"],
+                "raw_payload": {"html": str(card)},
+            }
+        )
+    return rows
+
+
+class HabrSource(SourceAdapter):
+    """Habr Career search pages, fetched ``concurrency`` pages at a time until one comes back empty."""
+
+    name = "habr"
+
+    def __init__(
+        self,
+        query: str,
+        max_pages: int = 5,
+        base_url: str = HABR_URL,
+        concurrency: int = 2,
+        rate: float = 2.0,
+    ):
+        super().__init__(concurrency, rate)
+        self.query = query
+        self.max_pages = max_pages
+        self.base_url = base_url.rstrip("/")
+
+    async def _page(self, client: HttpClient, page: int) -> List[Dict]:
+        params = {"q": self.query, "type": "all", "page": page}
+        html = await client.get_text(self.name, f"{self.base_url}/vacancies", params)
+        return parse_cards(html, self.base_url)
+
+    async def pages(self, client: HttpClient) -> AsyncIterator[List[Dict]]:
+        window = max(1, self.limit.concurrency)
+        for start in range(1, self.max_pages + 1, window):
+            pages = range(start, min(start + window, self.max_pages + 1))
+            results = await asyncio.gather(*(self._page(client, page) for page in pages))
+            for rows in results:
+                if rows:
+                    yield rows
+            if not all(results):
+                return
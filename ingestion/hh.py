@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional
+
+from data.load_csv_to_db import map_row
+
+from .base import HttpClient, SourceAdapter
+
+HH_API_URL = "https://api.hh.ru"
+# hh.ru serves at most 2000 results per query (page * per_page < 2000).
+MAX_RESULTS = 2000
+
+
+def _name(value: Optional[Dict]) -> Optional[str]:
+    return value.get("name") if value else None
+
+
+def item_to_row(item: Dict) -> Dict:
+    """Map a ``/vacancies`` search item to a database row.
+
+    The item is flattened to the CSV export's columns and mapped with the
+    same rules, so ids match the export and API refreshes update those rows.
+    """
+    salary = item.get("salary") or {}
+    snippet = item.get("snippet") or {}
+    work_formats = ", ".join(fmt["name"] for fmt in item.get("work_format") or [] if fmt.get("name"))
+    flat = {
+        "id": str(item["id"]),
+        "name": item.get("name"),
+        "area_name": _name(item.get("area")),
+        "employer_name": _name(item.get("employer")),
+        "salary_from": str(salary["from"]) if salary.get("from") is not None else None,
+        "salary_to": str(salary["to"]) if salary.get("to") is not None else None,
+        "salary_currency": salary.get("currency"),
+        "schedule_name": _name(item.get("schedule")),
+        "experience_name": _name(item.get("experience")),
+        "snippet_requirement": snippet.get("requirement"),
+        "snippet_responsibility": snippet.get("responsibility"),
+        "work_format": work_formats or None,
+    }
+    row = map_row(flat)
+    row["url"] = item.get("alternate_url") or row["url"]
+    row["raw_payload"] = item
+    row["closed"] = bool(item.get("archived"))
+    return row
+
+
+class HHSource(SourceAdapter):
+    """hh.ru public search API; the first page gives the page count, the rest are fetched concurrently."""
+
+    name = "hh"
+
+    def __init__(
+        self,
+        query: str,
+        area: Optional[str] = None,
+        max_pages: int = 5,
+        per_page: int = 100,
+        base_url: str = HH_API_URL,
+        concurrency: int = 4,
+        rate: float = 5.0,
+    ):
+        super().__init__(concurrency, rate)
+        self.query = query
+        self.area = area
+        self.per_page = min(per_page, 100)
+        self.max_pages = min(max_pages, MAX_RESULTS // self.per_page)
+        self.base_url = base_url.rstrip("/")
+
+    async def _page(self, client: HttpClient, page: int) -> Dict:
+        params = {"text": self.query, "page": page, "per_page": self.per_page}
+        if self.area:
+            params["area"] = self.area
+        return await client.get_json(self.name, f"{self.base_url}/vacancies", params)
+
+    async def pages(self, client: HttpClient) -> AsyncIterator[List[Dict]]:
+        if self.max_pages <= 0:
+            return
+        first = await self._page(client, 0)
+        yield [item_to_row(item) for item in first.get("items", [])]
+        total = min(int(first.get("pages") or 1), self.max_pages)
+        tasks = [asyncio.ensure_future(self._page(client, page)) for page in range(1, total)]
+        try:
+            for next_page in asyncio.as_completed(tasks):
+                data = await next_page
+                yield [item_to_row(item) for item in data.get("items", [])]
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,78 @@
+"""Local stand-in for the hh.ru search API that serves recorded JSON pages.
+
+Usage::
+
+    python -m ingestion.stub_server --port 8765
+    python -m scripts.ingest_jobs --sources hh --hh-url http://127.0.0.1:8765
+
+``GET /vacancies?page=N`` answers with ``page_N.json`` from the fixtures
+directory (an empty page past the last one). ``--flaky-every K`` answers
+every K-th request with ``429`` to exercise retries and backoff.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+from pathlib import Path
+from typing import Tuple
+
+from aiohttp import web
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+HH_FIXTURES_DIR = BASE_DIR / "data" / "fixtures" / "hh"
+
+
+def make_app(fixtures_dir: Path = HH_FIXTURES_DIR, flaky_every: int = 0) -> web.Application:
+    pages = {
+        int(path.stem.split("_")[1]): json.loads(path.read_text(encoding="utf-8"))
+        for path in fixtures_dir.glob("page_*.json")
+    }
+    calls = {"count": 0}
+
+    async def vacancies(request: web.Request) -> web.Response:
+        calls["count"] += 1
+        if flaky_every and calls["count"] % flaky_every == 0:
+            return web.json_response({"errors": [{"type": "too_many_requests"}]}, status=429, headers={"Retry-After": "0.05"})
+        page = int(request.query.get("page", 0))
+        payload = pages.get(page) or {"items": [], "found": 0, "pages": len(pages), "page": page}
+        return web.json_response(payload)
+
+    app = web.Application()
+    app.router.add_get("/vacancies", vacancies)
+    return app
+
+
+async def start_stub_server(
+    fixtures_dir: Path = HH_FIXTURES_DIR, host: str = "127.0.0.1", port: int = 0, flaky_every: int = 0
+) -> Tuple[web.AppRunner, str]:
+    """Start the stub in the running loop; ``port=0`` picks a free port. Returns the runner and base URL."""
+    runner = web.AppRunner(make_app(fixtures_dir, flaky_every))
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded hh.ru pages locally")
+    parser.add_argument("--fixtures", default=str(HH_FIXTURES_DIR))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--flaky-every", type=int, default=0, help="Answer every K-th request with 429")
+    args = parser.parse_args()
+
+    async def serve() -> None:
+        runner, url = await start_stub_server(Path(args.fixtures), args.host, args.port, args.flaky_every)
+        print(f"Serving {args.fixtures} at {url}/vacancies")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Sequence
+
+from data.load_csv_to_db import extract_skills, normalize_work_format
+
+from .base import HttpClient, SourceAdapter
+from .habr import parse_salary
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+SESSION_PATH = BASE_DIR / "data" / "telegram"
+_SALARY_LINE = re.compile(r"^.*(?:₽|руб|\$|€|зп|з/п|зарплат).*$", re.IGNORECASE | re.MULTILINE)
+
+
+def message_to_row(channel: str, message_id: int, text: str) -> Dict:
+    """Best-effort row from a free-form channel post: first line is the title."""
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    salary_line = _SALARY_LINE.search(text)
+    salary_min, salary_max, currency = parse_salary(salary_line.group(0) if salary_line else "")
+    handle = channel.lstrip("@")
+    return {
+        "id": f"tg_{handle}_{message_id}",
+        "source": "telegram",
+        "title": lines[0][:200] if lines else "",
+        "company": "",
+        "city": "",
+        "work_format": normalize_work_format(text),
+        "salary_min": salary_min,
+        "salary_max": salary_max,
+        "currency": currency,
+        "experience": None,
+        "skills": extract_skills({"requirements": text}),
+        "description": "\n".join(lines[1:]),
+        "url": f"https://t.me/{handle}/{message_id}",
+        "raw_payload": {"channel": channel, "message_id": message_id, "text": text},
+    }
+
+
+class TelegramSource(SourceAdapter):
+    """Recent posts of public job channels via Telethon (MTProto, so the HTTP pool is not used)."""
+
+    name = "telegram"
+
+    def __init__(
+        self,
+        api_id: int,
+        api_hash: str,
+        channels: Sequence[str],
+        limit: int = 200,
+        page_size: int = 50,
+        session_path: Path = SESSION_PATH,
+        min_length: Optional[int] = 80,
+    ):
+        super().__init__(concurrency=1, rate=1.0)
+        self.api_id = api_id
+        self.api_hash = api_hash
+        self.channels = list(channels)
+        self.message_limit = limit
+        self.page_size = page_size
+        self.session_path = session_path
+        self.min_length = min_length or 0
+
+    async def pages(self, client: HttpClient) -> AsyncIterator[List[Dict]]:
+        from telethon import TelegramClient
+
+        self.session_path.parent.mkdir(parents=True, exist_ok=True)
+        async with TelegramClient(str(self.session_path), self.api_id, self.api_hash) as telegram:
+            for channel in self.channels:
+                rows: List[Dict] = []
+                async for message in telegram.iter_messages(channel, limit=self.message_limit):
+                    text = message.message or ""
+                    if len(text) < self.min_length:
+                        continue
+                    rows.append(message_to_row(channel, message.id, text))
+                    if len(rows) >= self.page_size:
+                        yield rows
+                        rows = []
+                if rows:
+                    yield rows
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from .encoders import encoder_variant
+
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_EMBEDDINGS_DIR = BASE_DIR / "data" / "embeddings"
+
+
+def text_fingerprint(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class EmbeddingWriter:
+    """Preallocated on-disk matrix that rows are written into as they are encoded.
+
+    Streaming builds pass ``capacity`` and empty ids, then provide the ids and
+    fingerprints with :meth:`set_meta` before closing.
+    """
+
+    def __init__(
+        self,
+        store: "EmbeddingStore",
+        ids: Sequence[str],
+        fingerprints: Sequence[str],
+        dim: int,
+        capacity: Optional[int] = None,
+    ):
+        self.store = store
+        self.ids = list(ids)
+        self.fingerprints = list(fingerprints)
+        self.store.directory.mkdir(parents=True, exist_ok=True)
+        self._tmp_path = store.matrix_path.with_suffix(".tmp.npy")
+        rows = len(self.ids) if capacity is None else capacity
+        self.matrix = open_memmap(self._tmp_path, mode="w+", dtype=np.float32, shape=(rows, dim))
+
+    def write(self, positions: Sequence[int], rows: np.ndarray) -> None:
+        self.matrix[np.asarray(positions, dtype=np.int64)] = rows
+
+    def write_block(self, start: int, rows: np.ndarray) -> None:
+        self.matrix[start : start + len(rows)] = rows
+
+    def set_meta(self, ids: Sequence[str], fingerprints: Sequence[str]) -> None:
+        self.ids = list(ids)
+        self.fingerprints = list(fingerprints)
+
+    def close(self) -> None:
+        if len(self.ids) != len(self.matrix):
+            raise ValueError(f"{len(self.ids)} ids for a matrix of {len(self.matrix)} rows")
+        self.matrix.flush()
+        del self.matrix
+        os.replace(self._tmp_path, self.store.matrix_path)
+        with self.store.meta_path.open("w", encoding="utf-8") as f:
+            json.dump({"ids": self.ids, "fingerprints": self.fingerprints}, f)
+
+
+class EmbeddingStore:
+    """Vacancy embeddings persisted as a ``.npy`` matrix plus an id/fingerprint sidecar.
+
+    Files are named after the model and the encoder variant (backend and
+    quantisation, see :func:`encoder_variant`), so an int8 ONNX corpus is
+    never ranked against torch query vectors or the other way round.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        directory: Path = DEFAULT_EMBEDDINGS_DIR,
+        backend: Optional[str] = None,
+        quantize: Optional[bool] = None,
+    ):
+        self.directory = directory
+        slug = f"{model_name.replace('/', '__')}.{encoder_variant(backend, quantize)}"
+        self.matrix_path = directory / f"{slug}.npy"
+        self.meta_path = directory / f"{slug}.meta.json"
+
+    def exists(self) -> bool:
+        return self.matrix_path.exists() and self.meta_path.exists()
+
+    def writer(
+        self,
+        ids: Sequence[str],
+        fingerprints: Sequence[str],
+        dim: int,
+        capacity: Optional[int] = None,
+    ) -> EmbeddingWriter:
+        return EmbeddingWriter(self, ids, fingerprints, dim, capacity)
+
+    def load(self) -> Optional[tuple[List[str], List[str], np.ndarray]]:
+        if not self.exists():
+            return None
+        with self.meta_path.open(encoding="utf-8") as f:
+            meta = json.load(f)
+        matrix = np.load(self.matrix_path, mmap_mode="r")
+        if matrix.shape[0] != len(meta["ids"]):
+            return None
+        return meta["ids"], meta["fingerprints"], matrix
+
+    def compact(self, keep_ids: Sequence[str], chunk_rows: int = 4096) -> Optional[int]:
+        """Rewrite the store with only ``keep_ids`` (in that order); returns rows dropped.
+
+        Rows are copied in chunks, so the full matrix is never held in memory.
+        """
+        loaded = self.load()
+        if loaded is None:
+            return None
+        stored_ids, stored_fingerprints, matrix = loaded
+        row_by_id: Dict[str, int] = {vid: row for row, vid in enumerate(stored_ids)}
+        source_rows = [row_by_id[vid] for vid in keep_ids if vid in row_by_id]
+        writer = self.writer(
+            [stored_ids[row] for row in source_rows],
+            [stored_fingerprints[row] for row in source_rows],
+            matrix.shape[1],
+        )
+        for start in range(0, len(source_rows), chunk_rows):
+            writer.write_block(start, matrix[source_rows[start : start + chunk_rows]])
+        dropped = len(stored_ids) - len(source_rows)
+        del matrix
+        writer.close()
+        return dropped
+
+    def lookup(self, ids: Sequence[str], texts: Sequence[str]) -> tuple[Optional[np.ndarray], List[int]]:
+        """Return stored rows for ``ids`` and the positions that are missing or stale."""
+        return self.lookup_fingerprints(ids, [text_fingerprint(text) for text in texts])
+
+    def lookup_fingerprints(
+        self, ids: Sequence[str], fingerprints: Sequence[str]
+    ) -> tuple[Optional[np.ndarray], List[int]]:
+        """Same as :meth:`lookup` for callers that no longer hold the texts."""
+        loaded = self.load()
+        if loaded is None:
+            return None, list(range(len(ids)))
+        stored_ids, stored_fingerprints, matrix = loaded
+        row_by_id: Dict[str, int] = {vid: row for row, vid in enumerate(stored_ids)}
+        rows = np.zeros((len(ids), matrix.shape[1]), dtype=np.float32)
+        missing: List[int] = []
+        positions: List[int] = []
+        source_rows: List[int] = []
+        for position, (vacancy_id, fingerprint) in enumerate(zip(ids, fingerprints)):
+            row = row_by_id.get(vacancy_id)
+            if row is None or stored_fingerprints[row] != fingerprint:
+                missing.append(position)
+            else:
+                positions.append(position)
+                source_rows.append(row)
+        if positions:
+            rows[positions] = matrix[source_rows]
+        return rows, missing
@@ -1,12 +1,191 @@
 from __future__ import annotations
 
+import os
 from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Union
 
-from sentence_transformers import SentenceTransformer
+import numpy as np
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+ONNX_CACHE_DIR = BASE_DIR / "data" / "onnx"
+DEFAULT_MODEL_NAME = "paraphrase-multilingual-MiniLM-L12-v2"
+ENCODER_BACKEND = os.getenv("ENCODER_BACKEND", "torch")
+ENCODER_QUANTIZE = os.getenv("ENCODER_QUANTIZE", "0") == "1"
+
+
+def _hub_id(model_name: str) -> str:
+    return model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+
+@lru_cache(maxsize=4)
+def get_tokenizer(model_name: str = DEFAULT_MODEL_NAME):
+    """Return the Hugging Face tokenizer without loading model weights."""
+    from transformers import AutoTokenizer
+
+    return AutoTokenizer.from_pretrained(_hub_id(model_name))
+
+
+class OnnxEncoder:
+    """ONNX Runtime drop-in for ``SentenceTransformer.encode`` with mean pooling."""
+
+    def __init__(self, model_path: Path, model_name: str = DEFAULT_MODEL_NAME, max_seq_length: int = 128):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = int(os.getenv("ENCODER_THREADS", "0"))
+        self.session = ort.InferenceSession(
+            str(model_path), options, providers=["CPUExecutionProvider"]
+        )
+        self.model_path = model_path
+        self.tokenizer = get_tokenizer(model_name)
+        self.max_seq_length = max_seq_length
+        self._input_names = {item.name for item in self.session.get_inputs()}
+
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        convert_to_numpy: bool = True,
+        convert_to_tensor: bool = False,
+        normalize_embeddings: bool = False,
+        **_: object,
+    ):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        embeddings: Optional[np.ndarray] = None
+        # Same trick as sentence-transformers: batch similar lengths to limit padding.
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        for start in range(0, len(texts), batch_size):
+            batch_idx = order[start : start + batch_size]
+            features = self.tokenizer(
+                [texts[i] for i in batch_idx],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np",
+            )
+            inputs = {
+                name: value.astype(np.int64)
+                for name, value in features.items()
+                if name in self._input_names
+            }
+            token_embeddings = self.session.run(None, inputs)[0]
+            mask = features["attention_mask"][..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if embeddings is None:
+                embeddings = np.empty((len(texts), pooled.shape[1]), dtype=np.float32)
+            embeddings[batch_idx] = pooled
+
+        if embeddings is None:
+            embeddings = np.empty((0, 0), dtype=np.float32)
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+
+        result = embeddings
+        if convert_to_tensor:
+            import torch
+
+            result = torch.from_numpy(embeddings)
+        return result[0] if single else result
+
+    def get_sentence_embedding_dimension(self) -> Optional[int]:
+        output = self.session.get_outputs()[0]
+        return output.shape[-1] if isinstance(output.shape[-1], int) else None
+
+
+def onnx_model_path(model_name: str = DEFAULT_MODEL_NAME, quantize: bool = False) -> Path:
+    filename = "model.int8.onnx" if quantize else "model.onnx"
+    return ONNX_CACHE_DIR / model_name.replace("/", "__") / filename
+
+
+def export_onnx(model_name: str = DEFAULT_MODEL_NAME, quantize: bool = False) -> Path:
+    """Export the transformer body to ONNX, optionally with dynamic int8 weights."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    fp32_path = onnx_model_path(model_name)
+    if not fp32_path.exists():
+        fp32_path.parent.mkdir(parents=True, exist_ok=True)
+        model = SentenceTransformer(model_name, device="cpu")
+        transformer = model[0].auto_model.eval()
+
+        class _Body(torch.nn.Module):
+            def __init__(self, inner):
+                super().__init__()
+                self.inner = inner
+
+            def forward(self, input_ids, attention_mask):
+                return self.inner(input_ids=input_ids, attention_mask=attention_mask)[0]
+
+        dummy = model.tokenizer(["пример текста резюме"], return_tensors="pt")
+        dynamic_axes = {"input_ids": {0: "batch", 1: "sequence"}, "attention_mask": {0: "batch", 1: "sequence"}}
+        torch.onnx.export(
+            _Body(transformer),
+            (dummy["input_ids"], dummy["attention_mask"]),
+            str(fp32_path),
+            input_names=["input_ids", "attention_mask"],
+            output_names=["token_embeddings"],
+            dynamic_axes={**dynamic_axes, "token_embeddings": {0: "batch", 1: "sequence"}},
+            opset_version=14,
+            dynamo=False,
+        )
+
+    if not quantize:
+        return fp32_path
+
+    int8_path = onnx_model_path(model_name, quantize=True)
+    if not int8_path.exists():
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+    return int8_path
 
 
 @lru_cache(maxsize=4)
-def get_encoder(model_name: str = "paraphrase-multilingual-MiniLM-L12-v2") -> SentenceTransformer:
-    """Return a cached SentenceTransformer instance to avoid repeated downloads."""
+def _load_encoder(model_name: str, backend: str, quantize: bool):
+    if backend == "onnx":
+        model_path = onnx_model_path(model_name, quantize)
+        if not model_path.exists():
+            model_path = export_onnx(model_name, quantize)
+        return OnnxEncoder(model_path, model_name)
+    if backend != "torch":
+        raise ValueError(f"Unknown encoder backend: {backend}")
+
+    from sentence_transformers import SentenceTransformer
+
     return SentenceTransformer(model_name)
 
+
+def encoder_variant(backend: Optional[str] = None, quantize: Optional[bool] = None) -> str:
+    """``torch``, ``onnx`` or ``onnx-int8``: the encoder :func:`get_encoder` resolves to.
+
+    The variants produce slightly different vectors, so stores of encoded
+    texts are keyed by it as well as by the model name.
+    """
+    backend = backend or ENCODER_BACKEND
+    quantize = ENCODER_QUANTIZE if quantize is None else quantize
+    return f"{backend}-int8" if quantize and backend == "onnx" else backend
+
+
+def get_encoder(
+    model_name: str = DEFAULT_MODEL_NAME,
+    backend: Optional[str] = None,
+    quantize: Optional[bool] = None,
+) -> Union["SentenceTransformer", OnnxEncoder]:
+    """Return a cached encoder instance to avoid repeated downloads.
+
+    ``backend`` is ``"torch"`` (SentenceTransformer) or ``"onnx"`` (ONNX Runtime,
+    optionally int8-quantised); both expose the same ``encode`` contract.
+    Defaults come from the ``ENCODER_BACKEND`` / ``ENCODER_QUANTIZE`` env vars.
+    """
+    backend = backend or ENCODER_BACKEND
+    quantize = ENCODER_QUANTIZE if quantize is None else quantize
+    return _load_encoder(model_name, backend, bool(quantize and backend == "onnx"))
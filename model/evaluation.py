@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Mapping, Sequence
+
+import numpy as np
+
+from .main import ResumeProfile
+from .matcher import JobMatcher
+from .texts import profile_to_text
+
+# Graded relevance replayed from stored feedback; disliked or unseen vacancies count as 0.
+FEEDBACK_GAINS = {"favorite_vacancies": 2.0, "liked_vacancies": 1.0}
+# Quality targets from the README.
+TARGETS = {"recall@5": 0.70, "ndcg@10": 0.60}
+
+Ranker = Callable[[JobMatcher, Sequence[ResumeProfile], int], np.ndarray]
+
+
+@dataclass
+class EvalCase:
+    user_id: str
+    profile: ResumeProfile
+    gains: Dict[str, float]
+
+
+@dataclass
+class EvalResult:
+    name: str
+    users: int
+    seconds: float
+    metrics: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def ms_per_user(self) -> float:
+        return self.seconds / self.users * 1000 if self.users else 0.0
+
+    def meets_targets(self) -> bool:
+        return all(self.metrics.get(name, 0.0) >= target for name, target in TARGETS.items())
+
+
+def cases_from_state(state: Mapping) -> List[EvalCase]:
+    """Users of a ``UserStorage`` state with a profile and at least one like or favourite."""
+    cases = []
+    for user_id, entry in state.get("users", {}).items():
+        if "profile" not in entry:
+            continue
+        preferences = entry.get("preferences", {})
+        gains: Dict[str, float] = {}
+        for key, gain in FEEDBACK_GAINS.items():
+            for vacancy_id in preferences.get(key, []):
+                gains[vacancy_id] = max(gain, gains.get(vacancy_id, 0.0))
+        if gains:
+            cases.append(EvalCase(user_id, ResumeProfile(**entry["profile"]), gains))
+    return cases
+
+
+class RelevanceLabels:
+    """Graded labels of many users over one corpus, as sorted flat arrays.
+
+    A label is keyed ``row * n_items + position``, so the gains of a whole
+    ``(users, k)`` ranking matrix are found with a single ``searchsorted``.
+    """
+
+    def __init__(self, cases: Sequence[EvalCase], id_to_index: Mapping[str, int]):
+        self.n_users = len(cases)
+        self.n_items = len(id_to_index)
+        rows, items, gains = [], [], []
+        self.missing = 0
+        for row, case in enumerate(cases):
+            for vacancy_id, gain in case.gains.items():
+                position = id_to_index.get(vacancy_id)
+                if position is None:
+                    self.missing += 1
+                    continue
+                rows.append(row)
+                items.append(position)
+                gains.append(gain)
+        rows_arr = np.asarray(rows, dtype=np.int64)
+        keys = rows_arr * self.n_items + np.asarray(items, dtype=np.int64)
+        order = np.argsort(keys)
+        self.keys = keys[order]
+        self.rows = rows_arr[order]
+        self.gains = np.asarray(gains, dtype=np.float64)[order]
+        self.n_relevant = np.bincount(self.rows, minlength=self.n_users)
+
+    def lookup(self, ranked: np.ndarray) -> np.ndarray:
+        """Gains of a ``(users, k)`` matrix of corpus positions; ``-1`` pads short rankings."""
+        if not len(self.keys):
+            return np.zeros(ranked.shape)
+        keys = np.arange(len(ranked))[:, None] * self.n_items + ranked
+        found = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        hit = (self.keys[found] == keys) & (ranked >= 0)
+        return np.where(hit, self.gains[found], 0.0)
+
+    def ideal(self, k: int) -> np.ndarray:
+        """Best achievable ``(users, k)`` gains: each user's labels sorted descending."""
+        ideal = np.zeros((self.n_users, k))
+        order = np.lexsort((-self.gains, self.rows))
+        rows, gains = self.rows[order], self.gains[order]
+        rank = np.arange(len(rows)) - np.searchsorted(rows, rows, side="left")
+        keep = rank < k
+        ideal[rows[keep], rank[keep]] = gains[keep]
+        return ideal
+
+
+def _discounts(k: int) -> np.ndarray:
+    return 1.0 / np.log2(np.arange(2, k + 2))
+
+
+def recall_at_k(gains: np.ndarray, n_relevant: np.ndarray, k: int) -> np.ndarray:
+    hits = (gains[:, :k] > 0).sum(axis=1)
+    return np.divide(hits, n_relevant, out=np.zeros(len(gains)), where=n_relevant > 0)
+
+
+def ndcg_at_k(gains: np.ndarray, ideal: np.ndarray, k: int) -> np.ndarray:
+    dcg = (gains[:, :k] * _discounts(min(k, gains.shape[1]))).sum(axis=1)
+    idcg = (ideal[:, :k] * _discounts(min(k, ideal.shape[1]))).sum(axis=1)
+    return np.divide(dcg, idcg, out=np.zeros(len(gains)), where=idcg > 0)
+
+
+def reciprocal_rank(gains: np.ndarray) -> np.ndarray:
+    relevant = gains > 0
+    first = relevant.argmax(axis=1)
+    return np.where(relevant.any(axis=1), 1.0 / (first + 1), 0.0)
+
+
+def score_rankings(ranked: np.ndarray, labels: RelevanceLabels, ks: Sequence[int] = (5, 10)) -> Dict[str, float]:
+    """Mean Recall@k, NDCG@k and MRR over users with at least one label in the corpus."""
+    gains = labels.lookup(ranked)
+    ideal = labels.ideal(max(ks))
+    users = labels.n_relevant > 0
+    if not users.any():
+        raise ValueError("None of the labelled vacancies is in the corpus")
+    metrics: Dict[str, float] = {}
+    for k in ks:
+        metrics[f"recall@{k}"] = float(recall_at_k(gains, labels.n_relevant, k)[users].mean())
+        metrics[f"ndcg@{k}"] = float(ndcg_at_k(gains, ideal, k)[users].mean())
+    metrics["mrr"] = float(reciprocal_rank(gains)[users].mean())
+    return metrics
+
+
+def dense_rankings(
+    matcher: JobMatcher, profiles: Sequence[ResumeProfile], k: int, batch_size: int = 256
+) -> np.ndarray:
+    """Pure embedding ranking of all profiles at once, without filters or fusion."""
+    queries = np.asarray(
+        matcher.model.encode(
+            [profile_to_text(profile) for profile in profiles],
+            batch_size=64,
+            show_progress_bar=False,
+            normalize_embeddings=True,
+        ),
+        dtype=np.float32,
+    )
+    corpus = matcher.corpus_embeddings
+    k = min(k, len(corpus))
+    ranked = np.full((len(profiles), k), -1, dtype=np.int64)
+    if not k:
+        return ranked
+    for start in range(0, len(queries), batch_size):
+        scores = queries[start : start + batch_size] @ corpus.T
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind="stable")
+        ranked[start : start + batch_size] = np.take_along_axis(top, order, axis=1)
+    return ranked
+
+
+def matcher_rankings(
+    matcher: JobMatcher, profiles: Sequence[ResumeProfile], k: int, **options
+) -> np.ndarray:
+    """Rankings of ``JobMatcher.recommend`` (filters, fusion, relaxation) as corpus positions."""
+    ranked = np.full((len(profiles), k), -1, dtype=np.int64)
+    for row, profile in enumerate(profiles):
+        matches = matcher.recommend(profile, limit=k, **options)
+        positions = [matcher.id_to_index[vacancy.id] for vacancy, _ in matches]
+        ranked[row, : len(positions)] = positions
+    return ranked
+
+
+def evaluate(
+    matcher: JobMatcher,
+    cases: Sequence[EvalCase],
+    rankers: Mapping[str, Ranker],
+    ks: Sequence[int] = (5, 10),
+) -> List[EvalResult]:
+    """Score every ranker on the same replayed labels and time it end to end.
+
+    Queries are built from the stored profile alone: passing the user's
+    preferences would boost the very vacancies used as labels.
+    """
+    labels = RelevanceLabels(cases, matcher.id_to_index)
+    profiles = [case.profile for case in cases]
+    results = []
+    for name, ranker in rankers.items():
+        started = time.perf_counter()
+        ranked = ranker(matcher, profiles, max(ks))
+        seconds = time.perf_counter() - started
+        results.append(EvalResult(name, len(profiles), seconds, score_rankings(ranked, labels, ks)))
+    return results
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from multiprocessing import get_context
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .embedding_store import EmbeddingStore, text_fingerprint
+from .encoders import DEFAULT_MODEL_NAME, get_encoder, get_tokenizer
+
+
+ProgressCallback = Callable[[int, int, float], None]
+
+_WORKER_ENCODER = None
+
+
+@dataclass
+class BuildReport:
+    texts: int
+    seconds: float
+    padding_efficiency: float
+    unsorted_padding_efficiency: float
+
+    @property
+    def texts_per_second(self) -> float:
+        return self.texts / self.seconds if self.seconds else float("inf")
+
+
+def _init_worker(model_name: str, backend: Optional[str], threads: int) -> None:
+    # Must run before torch/onnxruntime spin up their thread pools.
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "ENCODER_THREADS"):
+        os.environ[var] = str(threads)
+    if (backend or os.getenv("ENCODER_BACKEND", "torch")) == "torch":
+        import torch
+
+        torch.set_num_threads(threads)
+    global _WORKER_ENCODER
+    _WORKER_ENCODER = get_encoder(model_name, backend=backend)
+
+
+def _encode_bucket(task: Tuple[List[int], List[str], int]) -> Tuple[List[int], np.ndarray]:
+    positions, texts, batch_size = task
+    embeddings = _WORKER_ENCODER.encode(texts, batch_size=batch_size, show_progress_bar=False)
+    return positions, np.asarray(embeddings, dtype=np.float32)
+
+
+def token_lengths(texts: Sequence[str], model_name: str = DEFAULT_MODEL_NAME, max_length: int = 128) -> np.ndarray:
+    tokenizer = get_tokenizer(model_name)
+    encoded = tokenizer(list(texts), truncation=True, max_length=max_length)["input_ids"]
+    return np.fromiter((len(ids) for ids in encoded), dtype=np.int64, count=len(encoded))
+
+
+def length_buckets(lengths: np.ndarray, bucket_size: int) -> List[np.ndarray]:
+    """Split positions sorted by token length into buckets of similar-length texts."""
+    order = np.argsort(lengths, kind="stable")
+    return [order[start : start + bucket_size] for start in range(0, len(order), bucket_size)]
+
+
+def padded_tokens(lengths: np.ndarray, order: np.ndarray, batch_size: int) -> int:
+    """Tokens a batched encoder processes, padding included, for texts taken in ``order``."""
+    padded = 0
+    for start in range(0, len(order), batch_size):
+        batch = lengths[order[start : start + batch_size]]
+        padded += int(batch.max()) * len(batch)
+    return padded
+
+
+def padding_efficiency(lengths: np.ndarray, order: np.ndarray, batch_size: int) -> float:
+    """Share of real tokens among all tokens a batched encoder would process."""
+    padded = padded_tokens(lengths, order, batch_size)
+    return float(lengths.sum()) / padded if padded else 1.0
+
+
+def build_corpus_index(
+    ids: Sequence[str],
+    texts: Sequence[str],
+    store: EmbeddingStore,
+    model_name: str = DEFAULT_MODEL_NAME,
+    backend: Optional[str] = None,
+    workers: int = 1,
+    threads_per_worker: int = 1,
+    bucket_size: int = 256,
+    batch_size: int = 32,
+    progress: Optional[ProgressCallback] = None,
+) -> BuildReport:
+    """Encode ``texts`` length-sorted across a process pool into ``store``.
+
+    Buckets are consumed in submission order and each one is scattered back
+    to its original positions in the preallocated on-disk matrix, so the
+    store keeps the caller's id order.
+    """
+    lengths = token_lengths(texts, model_name)
+    buckets = length_buckets(lengths, bucket_size)
+    sorted_order = np.concatenate(buckets) if buckets else np.arange(0)
+    sorted_efficiency = padding_efficiency(lengths, sorted_order, batch_size)
+    unsorted_efficiency = padding_efficiency(lengths, np.arange(len(lengths)), batch_size)
+    fingerprints = [text_fingerprint(text) for text in texts]
+    tasks = [
+        ([int(i) for i in bucket], [texts[i] for i in bucket], batch_size)
+        for bucket in buckets
+    ]
+
+    started = time.perf_counter()
+    writer = None
+    done = 0
+
+    def consume(results):
+        nonlocal writer, done
+        for positions, rows in results:
+            if writer is None:
+                writer = store.writer(ids, fingerprints, rows.shape[1])
+            writer.write(positions, rows)
+            done += len(positions)
+            if progress:
+                progress(done, len(texts), time.perf_counter() - started)
+
+    if workers <= 1:
+        global _WORKER_ENCODER
+        _WORKER_ENCODER = get_encoder(model_name, backend=backend)
+        consume(_encode_bucket(task) for task in tasks)
+    else:
+        ctx = get_context("spawn")
+        with ctx.Pool(
+            workers,
+            initializer=_init_worker,
+            initargs=(model_name, backend, threads_per_worker),
+        ) as pool:
+            consume(pool.imap(_encode_bucket, tasks))
+
+    if writer is not None:
+        writer.close()
+    return BuildReport(
+        texts=len(texts),
+        seconds=time.perf_counter() - started,
+        padding_efficiency=sorted_efficiency,
+        unsorted_padding_efficiency=unsorted_efficiency,
+    )
+
+
+def stream_corpus_index(
+    total: int,
+    batches: Iterable[Sequence[Tuple[str, str]]],
+    store: EmbeddingStore,
+    model_name: str = DEFAULT_MODEL_NAME,
+    backend: Optional[str] = None,
+    workers: int = 1,
+    threads_per_worker: int = 1,
+    batch_size: int = 32,
+    max_in_flight: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> BuildReport:
+    """Encode ``(id, text)`` batches as they are read into a preallocated store.
+
+    Unlike :func:`build_corpus_index` nothing is held for the whole corpus
+    but ids and fingerprints: each read batch is length-sorted on its own,
+    at most ``max_in_flight`` batches (default ``2 * workers``) are queued
+    to the pool, and results go straight into the on-disk matrix, so peak
+    memory does not grow with the catalog. ``total`` must be the exact
+    number of rows ``batches`` yields.
+    """
+    max_in_flight = max_in_flight or 2 * max(workers, 1)
+    ids: List[str] = []
+    fingerprints: List[str] = []
+    real = sorted_padded = unsorted_padded = 0
+    writer = None
+    done = 0
+    started = time.perf_counter()
+
+    def consume(result: Tuple[List[int], np.ndarray]) -> None:
+        nonlocal writer, done
+        positions, rows = result
+        if writer is None:
+            writer = store.writer([], [], rows.shape[1], capacity=total)
+        writer.write(positions, rows)
+        done += len(positions)
+        if progress:
+            progress(done, total, time.perf_counter() - started)
+
+    pool = None
+    if workers <= 1:
+        global _WORKER_ENCODER
+        _WORKER_ENCODER = get_encoder(model_name, backend=backend)
+    else:
+        pool = get_context("spawn").Pool(
+            workers,
+            initializer=_init_worker,
+            initargs=(model_name, backend, threads_per_worker),
+        )
+    try:
+        pending: deque = deque()
+        for batch in batches:
+            if not batch:
+                continue
+            offset = len(ids)
+            texts = [text for _, text in batch]
+            ids.extend(vacancy_id for vacancy_id, _ in batch)
+            fingerprints.extend(text_fingerprint(text) for text in texts)
+            lengths = token_lengths(texts, model_name)
+            order = np.argsort(lengths, kind="stable")
+            real += int(lengths.sum())
+            sorted_padded += padded_tokens(lengths, order, batch_size)
+            unsorted_padded += padded_tokens(lengths, np.arange(len(lengths)), batch_size)
+            task = ([offset + int(i) for i in order], [texts[i] for i in order], batch_size)
+            if pool is None:
+                consume(_encode_bucket(task))
+                continue
+            pending.append(pool.apply_async(_encode_bucket, (task,)))
+            while len(pending) >= max_in_flight:
+                consume(pending.popleft().get())
+        while pending:
+            consume(pending.popleft().get())
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    if writer is not None:
+        writer.set_meta(ids, fingerprints)
+        writer.close()
+    return BuildReport(
+        texts=len(ids),
+        seconds=time.perf_counter() - started,
+        padding_efficiency=real / sorted_padded if sorted_padded else 1.0,
+        unsorted_padding_efficiency=real / unsorted_padded if unsorted_padded else 1.0,
+    )
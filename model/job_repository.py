@@ -2,11 +2,18 @@ from __future__ import annotations
 
 import csv
 import json
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 from data.database import JobDatabase
+from data.dedup import deduplicate
+
+if TYPE_CHECKING:
+    from .preferences import PreferenceVector
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 CSV_DATASET_PATH = BASE_DIR / "data" / "vacancies_full.csv"
@@ -28,6 +35,9 @@ class Vacancy:
     description: str
     source: str
     url: str
+    cluster_id: Optional[str] = None
+    archived: bool = False
+    city_id: Optional[int] = None
 
     def to_message(self) -> str:
         salary = "Не указано"
@@ -35,8 +45,10 @@ class Vacancy:
             max_part = self.salary_max or self.salary_min
             salary = f"{self.salary_min}-{max_part} {self.currency}"
         skill_line = ", ".join(self.skills[:8]) or "—"
+        archived_line = "🗄 Вакансия закрыта или устарела\n" if self.archived else ""
         return (
             f"<b>{self.title}</b> в {self.company}\n"
+            f"{archived_line}"
             f"📍 {self.city or '—'} · {self.work_format or '—'}\n"
             f"💰 {salary}\n"
             f"🛠 Навыки: {skill_line}\n"
@@ -44,15 +56,59 @@ class Vacancy:
             f"🔗 {self.url}"
         )
 
+    def to_summary_line(self) -> str:
+        salary = f"{self.salary_min}+ {self.currency}" if self.salary_min else "з/п не указана"
+        return (
+            f"<b>{self.title}</b> — {self.company}\n"
+            f"📍 {self.city or '—'} · {self.work_format or '—'} · 💰 {salary}\n"
+            f"🔗 {self.url}"
+        )
+
+
+class VacancyCache:
+    """Bounded LRU of recently shown vacancies, keyed by id.
+
+    Used from the event loop and from executor threads, so every access
+    that reorders or evicts holds ``_lock``.
+    """
+
+    def __init__(self, max_size: int = 2048):
+        self.max_size = max_size
+        self._items: "OrderedDict[str, Vacancy]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, vacancy_id: str) -> Optional[Vacancy]:
+        with self._lock:
+            vacancy = self._items.get(vacancy_id)
+            if vacancy is not None:
+                self._items.move_to_end(vacancy_id)
+            return vacancy
+
+    def put(self, vacancy: Vacancy) -> None:
+        with self._lock:
+            self._items[vacancy.id] = vacancy
+            self._items.move_to_end(vacancy.id)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def discard(self, vacancy_id: str) -> None:
+        with self._lock:
+            self._items.pop(vacancy_id, None)
+
 
 class JobRepository:
     def __init__(
         self,
         database: Optional[JobDatabase] = None,
         seed_dataset: Path = SAMPLE_DATASET_PATH,
+        cache_size: int = 2048,
     ):
         self.database = database or JobDatabase()
         self.seed_dataset = seed_dataset
+        self.cache = VacancyCache(cache_size)
         self._ensure_seed()
 
     def _ensure_seed(self) -> None:
@@ -62,23 +118,60 @@ class JobRepository:
         if CSV_DATASET_PATH.exists():
             rows = self._load_csv_seed(CSV_DATASET_PATH)
             if rows:
-                self.database.upsert(rows)
+                self.database.upsert(deduplicate(rows).canonical)
                 return
 
         if self.seed_dataset.exists():
             with self.seed_dataset.open(encoding="utf-8") as f:
                 data = json.load(f)
-            self.database.upsert(data)
+            self.database.upsert(deduplicate(data).canonical)
 
     def all(self) -> List[Vacancy]:
         rows = self.database.fetch()
         return [self._row_to_vacancy(row) for row in rows]
 
+    def iter_all(self, batch_size: int = 1000) -> Iterator[Vacancy]:
+        """Like :meth:`all` but streamed, for callers that keep only a few columns."""
+        for row in self.database.iter_rows(batch_size):
+            yield self._row_to_vacancy(row)
+
+    @contextmanager
+    def live_batches(self, batch_size: int = 1000) -> Iterator[Tuple[int, Iterator[List[Vacancy]]]]:
+        """Exact count of live vacancies plus batches of them, read from one snapshot."""
+        with self.database.live_snapshot(batch_size) as (total, batches):
+            yield total, ([self._row_to_vacancy(row) for row in batch] for batch in batches)
+
     def get(self, vacancy_id: str) -> Optional[Vacancy]:
+        cached = self.cache.get(vacancy_id)
+        if cached is not None:
+            return cached
         row = self.database.get(vacancy_id)
         if not row:
             return None
-        return self._row_to_vacancy(row)
+        vacancy = self._row_to_vacancy(row)
+        self.cache.put(vacancy)
+        return vacancy
+
+    def get_many(self, vacancy_ids: Sequence[str]) -> List[Vacancy]:
+        """Return known vacancies in the order of ``vacancy_ids`` using at most one query."""
+        found: Dict[str, Vacancy] = {}
+        missing = []
+        for vacancy_id in vacancy_ids:
+            cached = self.cache.get(vacancy_id)
+            if cached is not None:
+                found[vacancy_id] = cached
+            else:
+                missing.append(vacancy_id)
+        for row in self.database.get_many(missing):
+            vacancy = self._row_to_vacancy(row)
+            self.cache.put(vacancy)
+            found[vacancy.id] = vacancy
+        return [found[vacancy_id] for vacancy_id in dict.fromkeys(vacancy_ids) if vacancy_id in found]
+
+    def remember(self, vacancies: Iterable[Vacancy]) -> None:
+        """Keep vacancies just shown to a user hot for their feedback clicks."""
+        for vacancy in vacancies:
+            self.cache.put(vacancy)
 
     def filter(
         self,
@@ -86,14 +179,44 @@ class JobRepository:
         city: Optional[str] = None,
         work_format: Optional[str] = None,
         min_salary: Optional[int] = None,
+        region: bool = False,
     ) -> List[Vacancy]:
         rows = self.database.fetch(
             city=city,
             work_format=work_format,
             min_salary=min_salary,
+            region=region,
         )
         return [self._row_to_vacancy(row) for row in rows]
 
+    def search(
+        self,
+        query: str,
+        filters: Optional[Dict[str, Any]] = None,
+        limit: int = 10,
+        preferences: Optional["PreferenceVector"] = None,
+    ) -> List[Tuple[Vacancy, float]]:
+        """Keyword search via the FTS5 index.
+
+        ``filters`` takes the keyword arguments of :meth:`filter`. Scores are
+        bm25 relevance scaled to (0, 1]; with ``preferences`` the user's boost
+        is added and a wider pool is re-ranked before cutting to ``limit``.
+        """
+        pool = limit * 3 if preferences else limit
+        rows = self.database.search(query, limit=pool, **(filters or {}))
+        if not rows:
+            return []
+        best = -rows[0]["rank"] or 1.0
+        scored = []
+        for row in rows:
+            vacancy = self._row_to_vacancy(row)
+            score = -row["rank"] / best
+            if preferences:
+                score += preferences.boost_for(vacancy)
+            scored.append((vacancy, score))
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:limit]
+
     @staticmethod
     def _row_to_vacancy(row) -> Vacancy:
         skills = []
@@ -116,6 +239,9 @@ class JobRepository:
             description=row["description"] or "",
             source=row["source"],
             url=row["url"],
+            cluster_id=row["cluster_id"],
+            archived="archived_at" in row.keys(),
+            city_id=row["city_id"],
         )
 
     @staticmethod
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import math
+import re
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+TOKEN_PATTERN = re.compile(r"[\w+#]+(?:[./-][\w+#]+)*")
+MAX_TERM_FREQUENCY = 0xFFFF
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens that keep stack names like ``c#``, ``ci/cd`` or ``node.js`` intact."""
+    return TOKEN_PATTERN.findall(text.lower().replace("ё", "е"))
+
+
+@dataclass
+class _Posting:
+    slots: array = field(default_factory=lambda: array("i"))
+    freqs: array = field(default_factory=lambda: array("H"))
+
+
+class BM25Index:
+    """In-memory BM25 inverted index with compact array-backed postings.
+
+    Documents are keyed by caller-provided integer ids (the matcher uses corpus
+    positions). Postings are append-only: re-adding or removing a document
+    tombstones its previous slot, so incremental updates never rewrite arrays.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, _Posting] = {}
+        self._slot_docs = array("i")
+        self._slot_lengths = array("I")
+        self._alive = bytearray()
+        self._doc_slot: Dict[int, int] = {}
+        self._total_length = 0
+        self._max_doc = -1
+
+    def __len__(self) -> int:
+        return len(self._doc_slot)
+
+    def __contains__(self, doc_id: int) -> bool:
+        return doc_id in self._doc_slot
+
+    def add(self, doc_id: int, text: str) -> None:
+        if doc_id in self._doc_slot:
+            self.remove(doc_id)
+        slot = len(self._slot_docs)
+        counts: Dict[str, int] = {}
+        tokens = tokenize(text)
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for term, count in counts.items():
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = _Posting()
+            posting.slots.append(slot)
+            posting.freqs.append(min(count, MAX_TERM_FREQUENCY))
+        self._slot_docs.append(doc_id)
+        self._slot_lengths.append(len(tokens))
+        self._alive.append(1)
+        self._doc_slot[doc_id] = slot
+        self._total_length += len(tokens)
+        self._max_doc = max(self._max_doc, doc_id)
+
+    def add_many(self, documents: Iterable[Tuple[int, str]]) -> None:
+        for doc_id, text in documents:
+            self.add(doc_id, text)
+
+    def remove(self, doc_id: int) -> None:
+        slot = self._doc_slot.pop(doc_id, None)
+        if slot is None:
+            return
+        self._alive[slot] = 0
+        self._total_length -= self._slot_lengths[slot]
+
+    def scores(self, query: str, size: Optional[int] = None) -> np.ndarray:
+        """Return a dense array of BM25 scores indexed by document id."""
+        size = self._max_doc + 1 if size is None else size
+        doc_scores = np.zeros(size, dtype=np.float32)
+        live_docs = len(self._doc_slot)
+        if not live_docs:
+            return doc_scores
+
+        alive = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+        lengths = np.frombuffer(self._slot_lengths, dtype=np.uint32).astype(np.float32)
+        avg_length = self._total_length / live_docs or 1.0
+        length_norm = self.k1 * (1.0 - self.b + self.b * lengths / avg_length)
+        slot_scores = np.zeros(len(self._slot_docs), dtype=np.float32)
+
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            slots = np.frombuffer(posting.slots, dtype=np.int32)
+            live = alive[slots]
+            doc_freq = int(live.sum())
+            if not doc_freq:
+                continue
+            slots = slots[live]
+            freqs = np.frombuffer(posting.freqs, dtype=np.uint16)[live].astype(np.float32)
+            idf = math.log(1.0 + (live_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+            slot_scores[slots] += idf * freqs * (self.k1 + 1.0) / (freqs + length_norm[slots])
+
+        slot_docs = np.frombuffer(self._slot_docs, dtype=np.int32)
+        live_docs_ids = slot_docs[alive]
+        in_range = live_docs_ids < size
+        doc_scores[live_docs_ids[in_range]] = slot_scores[alive][in_range]
+        return doc_scores
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        candidates: Optional[List[int]] = None,
+    ) -> List[Tuple[int, float]]:
+        """Return up to ``top_k`` ``(doc_id, score)`` pairs with a positive score."""
+        doc_scores = self.scores(query)
+        if candidates is not None:
+            doc_ids = np.asarray(candidates, dtype=np.int64)
+            doc_ids = doc_ids[doc_ids < len(doc_scores)]
+        else:
+            doc_ids = np.arange(len(doc_scores))
+        if top_k <= 0 or not len(doc_ids):
+            return []
+        candidate_scores = doc_scores[doc_ids]
+        if top_k < len(doc_ids):
+            top = np.argpartition(-candidate_scores, top_k - 1)[:top_k]
+        else:
+            top = np.arange(len(doc_ids))
+        top = top[np.argsort(-candidate_scores[top], kind="stable")]
+        return [
+            (int(doc_ids[i]), float(candidate_scores[i]))
+            for i in top
+            if candidate_scores[i] > 0
+        ]
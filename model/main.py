@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import os
 import re
+import time
+from contextlib import contextmanager
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 
 from natasha import (
     AddrExtractor,
@@ -14,26 +17,10 @@ from natasha import (
     Segmenter,
 )
 
-from .skill_classifier import SkillQualityPrediction, get_classifier
+from data.gazetteer import get_gazetteer
 
+from .skill_classifier import SkillQualityPrediction, get_classifier
 
-CITY_LIST = [
-    "Москва",
-    "Санкт-Петербург",
-    "Казань",
-    "Новосибирск",
-    "Екатеринбург",
-    "Нижний Новгород",
-    "Самара",
-    "Ростов-на-Дону",
-    "Пермь",
-    "Челябинск",
-    "Краснодар",
-    "Владивосток",
-    "Омск",
-    "Томск",
-    "Уфа",
-]
 
 ROLE_KEYWORDS: Dict[str, List[str]] = {
     "flutter разработчик": ["flutter", "flutter developer"],
@@ -56,6 +43,22 @@ SALARY_PATTERN = re.compile(
     re.IGNORECASE,
 )
 
+NAME_PATTERN = re.compile(
+    r"(?:Я\s[-—]\s|Меня зовут|Имя[:\s]|ФИО[:\s]|Зовут меня)\s*([А-ЯЁ][а-яё]+(?: [А-ЯЁ][а-яё]+){1,2})",
+    re.IGNORECASE,
+)
+
+CITY_PATTERN = re.compile(
+    r"(?:город[еа]?|г\.|живу в|проживаю в|из города)\s+([А-ЯЁ][а-яё]+(?:-[а-яё]+-[А-ЯЁ][а-яё]+|[- ][А-ЯЁ][а-яё]+)?)"
+)
+
+# "full" always runs Natasha NER and the embedding classifier; "fast" runs
+# regexes and keyword scans first and only falls back for fields still missing.
+EXTRACTION_MODES = ("full", "fast")
+EXTRACTION_MODE = os.getenv("EXTRACTION_MODE", "full")
+# In fast mode the embedding classifier runs when keywords find fewer skills.
+MIN_KEYWORD_SKILLS = 3
+
 WORK_FORMATS = {
     "удаленно": ["удален", "remote", "wfh", "работать удаленно"],
     "гибрид": ["гибрид", "hybrid"],
@@ -76,6 +79,7 @@ class ResumeProfile:
     name: str = "Не указано"
     age: Optional[int] = None
     city: Optional[str] = None
+    city_id: Optional[int] = None
     education: Optional[str] = None
     salary_expectations: Optional[int] = None
     salary_currency: str = "RUB"
@@ -112,28 +116,76 @@ class ResumeProfile:
         )
 
 
+@dataclass
+class ExtractionTrace:
+    """Seconds spent per tier (rules, ner, embeddings) and the tier each field came from."""
+
+    seconds: Dict[str, float] = field(default_factory=dict)
+    sources: Dict[str, str] = field(default_factory=dict)
+
+    @contextmanager
+    def tier(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - started
+
+
 class ResumeExtractor:
     def __init__(self):
         self.classifier = get_classifier()
 
-    def parse(self, text: str) -> ResumeProfile:
-        doc = self._build_doc(text)
-        prediction: SkillQualityPrediction = self.classifier.predict(text)
+    def parse(
+        self,
+        text: str,
+        mode: Optional[str] = None,
+        trace: Optional[ExtractionTrace] = None,
+    ) -> ResumeProfile:
+        mode = mode or EXTRACTION_MODE
+        if mode not in EXTRACTION_MODES:
+            raise ValueError(f"Unknown extraction mode {mode!r}, expected one of {EXTRACTION_MODES}")
+        trace = trace or ExtractionTrace()
         profile = ResumeProfile(raw_text=text)
 
-        profile.name = self._extract_name(doc, text)
-        profile.age = self._extract_age(text)
-        profile.city = self._extract_city(doc, text)
-        profile.education = self._extract_education(text)
-        salary, currency = self._extract_salary(text)
-        profile.salary_expectations = salary
-        profile.salary_currency = currency
-        profile.work_format = self._detect_work_format(text)
-        profile.relocation_ready = self._detect_relocation(text)
-        profile.preferred_roles = self._detect_roles(text)
-        profile.experience_years = self._detect_experience(text)
+        with trace.tier("rules"):
+            profile.age = self._extract_age(text)
+            profile.education = self._extract_education(text)
+            salary, currency = self._extract_salary(text)
+            profile.salary_expectations = salary
+            profile.salary_currency = currency
+            profile.work_format = self._detect_work_format(text)
+            profile.relocation_ready = self._detect_relocation(text)
+            profile.preferred_roles = self._detect_roles(text)
+            profile.experience_years = self._detect_experience(text)
+            if mode == "fast":
+                profile.name = self._match_name(text, strict=True) or profile.name
+                profile.city = self._match_city(text)
+                keywords = self.classifier.predict_keywords(text)
+        for name in ("age", "education", "salary_expectations", "work_format", "experience_years"):
+            trace.sources[name] = "rules"
+        if mode == "fast":
+            trace.sources.update(name="rules", city="rules", skills="rules", qualities="rules")
+
+        if mode == "full" or profile.name == "Не указано" or profile.city is None:
+            with trace.tier("ner"):
+                doc = self._build_doc(text)
+                if mode == "full" or profile.name == "Не указано":
+                    profile.name = self._extract_name(doc, text)
+                    trace.sources["name"] = "ner"
+                if mode == "full" or profile.city is None:
+                    profile.city = self._extract_city(doc, text)
+                    trace.sources["city"] = "ner"
+
+        if mode == "fast" and len(keywords.skills) >= MIN_KEYWORD_SKILLS:
+            prediction = keywords
+        else:
+            with trace.tier("embeddings"):
+                prediction: SkillQualityPrediction = self.classifier.predict(text)
+            trace.sources.update(skills="embeddings", qualities="embeddings")
         profile.skills = prediction.skills
         profile.qualities = prediction.qualities
+        profile.city_id = get_gazetteer().city_id(profile.city)
 
         return profile
 
@@ -156,12 +208,26 @@ class ResumeExtractor:
             parts = [fact.first, fact.last, fact.middle]
             name = " ".join(part for part in parts if part)
             return name.strip()
-        match = re.search(
-            r"(?:Я\s[-—]\s|Меня зовут|Имя[:\s]|ФИО[:\s]|Зовут меня)\s*([А-ЯЁ][а-яё]+(?: [А-ЯЁ][а-яё]+){1,2})",
-            text,
-            re.IGNORECASE,
-        )
-        return match.group(1).strip() if match else "Не указано"
+        return ResumeExtractor._match_name(text) or "Не указано"
+
+    @staticmethod
+    def _match_name(text: str, strict: bool = False) -> Optional[str]:
+        """Name after an introduction phrase; ``strict`` requires capitalised words."""
+        match = NAME_PATTERN.search(text)
+        if not match:
+            return None
+        name = match.group(1).strip()
+        if strict and not all(part[0].isupper() for part in name.split()):
+            return None
+        return name
+
+    @staticmethod
+    def _match_city(text: str) -> Optional[str]:
+        city = get_gazetteer().extract(text)
+        if city is not None:
+            return city.name
+        match = CITY_PATTERN.search(text)
+        return match.group(1) if match else None
 
     @staticmethod
     def _extract_age(text: str) -> Optional[int]:
@@ -174,19 +240,20 @@ class ResumeExtractor:
 
     @staticmethod
     def _extract_city(doc: Doc, text: str) -> Optional[str]:
+        gazetteer = get_gazetteer()
         for span in doc.spans:
             if span.type == "LOC":
                 span.normalize(MORPH_VOCAB)
-                return span.normal.title()
+                known = gazetteer.lookup(span.normal)
+                return known.name if known else span.normal.title()
         matches = list(ADDR_EXTRACTOR(text))
         for match in matches:
             city = match.fact.city or match.fact.settlement or match.fact.country
             if city:
-                return city.title()
-        for city in CITY_LIST:
-            if city.lower() in text.lower():
-                return city
-        return None
+                known = gazetteer.lookup(city)
+                return known.name if known else city.title()
+        known = gazetteer.extract(text)
+        return known.name if known else None
 
     @staticmethod
     def _extract_education(text: str) -> Optional[str]:
@@ -253,6 +320,8 @@ class ResumeExtractor:
         return int(match.group(1)) if match else None
 
 
-def extract_resume_info(text: str) -> ResumeProfile:
+def extract_resume_info(
+    text: str, mode: Optional[str] = None, trace: Optional[ExtractionTrace] = None
+) -> ResumeProfile:
     extractor = ResumeExtractor()
-    return extractor.parse(text)
\ No newline at end of file
+    return extractor.parse(text, mode=mode, trace=trace)
\ No newline at end of file
@@ -1,81 +1,577 @@
 from __future__ import annotations
 
-from typing import List, Optional, Tuple
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 
-from sentence_transformers import util
+import numpy as np
 
+from data.database import UpsertResult
+from data.gazetteer import get_gazetteer, normalize_city
+
+from .embedding_store import EmbeddingStore, text_fingerprint
 from .job_repository import JobRepository, Vacancy
+from .lexical_index import BM25Index
 from .main import ResumeProfile
 from .preferences import PreferenceVector
 from .encoders import get_encoder
+from .texts import profile_to_text, vacancy_to_text
+
+logger = logging.getLogger(__name__)
+
+RRF_K = 60
+REMOTE_FORMAT = "удаленно"
+UNSPECIFIED_FORMAT = "не указано"
+REMOTE_SHARD = ("*", REMOTE_FORMAT)
+CITY_ID_PREFIX = "#"
+SALARY_FLOOR_RATIO = 0.6
+# Missing embeddings are encoded (and, in low-memory mode, fetched) in chunks.
+ENCODE_CHUNK = 1024
+
+# Relaxation ladder, strictest first: drop the salary floor, then the work
+# format, then widen the city to its region; "anywhere" searches the whole corpus.
+RELAXATION_STEPS = ("exact", "no_salary", "no_format", "region", "anywhere")
+
+ShardKey = Tuple[str, str]
+Block = Tuple[int, int]
+
+
+@dataclass
+class Recommendations:
+    matches: List[Tuple[Vacancy, float]]
+    relaxation: str = "exact"
+
+    @property
+    def relaxed(self) -> bool:
+        return self.relaxation != "exact"
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[int]], k: int = RRF_K
+) -> Dict[int, float]:
+    """Fuse ranked id lists; scores are scaled so rank 1 in every list gives 1.0."""
+    fused: Dict[int, float] = {}
+    if not rankings:
+        return fused
+    scale = (k + 1) / len(rankings)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + scale / (k + rank)
+    return fused
+
+
+def city_key(city: Optional[str], city_id: Optional[int] = None) -> str:
+    """Shard key of a city: ``#<gazetteer id>``, so namesakes in different regions stay apart.
+
+    Only a name the gazetteer cannot resolve is keyed by its folded form.
+    """
+    if city_id is None:
+        city_id = get_gazetteer().city_id(city)
+    return f"{CITY_ID_PREFIX}{city_id}" if city_id is not None else normalize_city(city)
+
+
+def region_keys(key: str) -> List[str]:
+    """Keys of every settlement in the region of the city ``key``; an unresolved name is its own region."""
+    if not key.startswith(CITY_ID_PREFIX):
+        return [key]
+    return [f"{CITY_ID_PREFIX}{city_id}" for city_id in get_gazetteer().region_ids(int(key[1:]))]
+
+
+def city_label(key: str) -> str:
+    if not key.startswith(CITY_ID_PREFIX):
+        return key
+    return get_gazetteer().cities[int(key[1:])].name
+
+
+def shard_key(vacancy: Vacancy) -> ShardKey:
+    """Remote vacancies share one shard; everything else is sharded by (city, format)."""
+    if vacancy.work_format == REMOTE_FORMAT:
+        return REMOTE_SHARD
+    return city_key(vacancy.city, vacancy.city_id), vacancy.work_format or UNSPECIFIED_FORMAT
 
 
 class JobMatcher:
+    """Hybrid semantic + BM25 matcher over a (city, format)-partitioned catalog.
+
+    With ``low_memory`` only the embedding matrix, vacancy ids and the filter
+    columns stay resident; the catalog is streamed from SQLite on load and
+    full ``Vacancy`` records are fetched by id for the candidates of each
+    request. Vacancies passed to ``add_vacancies`` must then already be stored.
+    """
+
     def __init__(
         self,
         repository: Optional[JobRepository] = None,
         model_name: str = "paraphrase-multilingual-MiniLM-L12-v2",
+        embedding_store: Optional[EmbeddingStore] = None,
+        max_tail_ratio: float = 0.05,
+        low_memory: bool = False,
     ):
         self.repository = repository or JobRepository()
-        self.vacancies = self.repository.all()
+        # Catalog writes from this point on are picked up by ``sync``.
+        self.synced_at = self.repository.database.current_timestamp()
+        self.embedding_store = embedding_store or EmbeddingStore(model_name)
         self.model = get_encoder(model_name)
-        self.id_to_index = {vac.id: idx for idx, vac in enumerate(self.vacancies)}
+        self.max_tail_ratio = max_tail_ratio
+        self.low_memory = low_memory
+
+        # Per-row columns, kept in partition order by ``repartition``.
+        self.ids: List[str] = []
+        self._shard_keys: List[ShardKey] = []
+        self._cluster_ids: List[str] = []
+        self.vacancies: List[Vacancy] = []
+
+        if low_memory:
+            fingerprints: List[str] = []
+            salaries: List[int] = []
+            for vacancy in self.repository.iter_all():
+                self._append_columns(vacancy)
+                salaries.append(vacancy.salary_min if vacancy.salary_min is not None else -1)
+                fingerprints.append(text_fingerprint(self._vacancy_to_text(vacancy)))
+            self._salary_min = np.array(salaries, dtype=np.int64)
+            self.corpus_embeddings = self._load_or_encode(fingerprints, self._stored_texts)
+        else:
+            self.vacancies = self.repository.all()
+            for vacancy in self.vacancies:
+                self._append_columns(vacancy)
+            self._salary_min = self._salary_column(self.vacancies)
+            corpus_texts = [self._vacancy_to_text(v) for v in self.vacancies]
+            self.corpus_embeddings = self._load_or_encode(
+                [text_fingerprint(text) for text in corpus_texts],
+                lambda positions: [corpus_texts[i] for i in positions],
+            )
+        self.repartition()
+
+    def _append_columns(self, vacancy: Vacancy) -> None:
+        self.ids.append(vacancy.id)
+        self._shard_keys.append(shard_key(vacancy))
+        cluster = vacancy.cluster_id or vacancy.id
+        # Most vacancies are their own cluster: share the id string instead of a copy.
+        self._cluster_ids.append(vacancy.id if cluster == vacancy.id else cluster)
+
+    def _stored_texts(self, positions: List[int]) -> List[str]:
+        by_id = {v.id: v for v in self.repository.get_many([self.ids[i] for i in positions])}
+        return [self._vacancy_to_text(by_id[self.ids[i]]) for i in positions]
+
+    def _load_or_encode(
+        self, fingerprints: List[str], texts_at: Callable[[List[int]], List[str]]
+    ) -> np.ndarray:
+        """Reuse embeddings prebuilt by ``scripts/build_index.py``; encode only what is missing or stale."""
+        rows, missing = self.embedding_store.lookup_fingerprints(self.ids, fingerprints)
+        for start in range(0, len(missing), ENCODE_CHUNK):
+            positions = missing[start : start + ENCODE_CHUNK]
+            encoded = np.asarray(
+                self.model.encode(texts_at(positions), show_progress_bar=False), dtype=np.float32
+            )
+            if rows is None:
+                rows = np.zeros((len(self.ids), encoded.shape[1]), dtype=np.float32)
+            rows[positions] = encoded
+        if rows is None:
+            return np.zeros((0, self.model.get_sentence_embedding_dimension() or 0), dtype=np.float32)
+        # Normalised once so filtered search is a plain matmul over contiguous slices.
+        rows /= np.clip(np.linalg.norm(rows, axis=1, keepdims=True), 1e-12, None)
+        return rows
+
+    def _take(self, order: List[int]) -> None:
+        """Keep the rows at ``order`` positions, in that order, across every per-row column."""
+        self.ids = [self.ids[idx] for idx in order]
+        self._shard_keys = [self._shard_keys[idx] for idx in order]
+        self._cluster_ids = [self._cluster_ids[idx] for idx in order]
+        if self.vacancies:
+            self.vacancies = [self.vacancies[idx] for idx in order]
+        self.corpus_embeddings = self.corpus_embeddings[order]
+        self._salary_min = self._salary_min[order]
+
+    def repartition(self) -> None:
+        """Reorder the corpus so every (city, format) shard is a contiguous block of rows."""
+        keys = self._shard_keys
+        order = sorted(range(len(keys)), key=lambda idx: (keys[idx] != REMOTE_SHARD, keys[idx]))
+        if order:
+            self._take(order)
+        self.id_to_index = {vid: idx for idx, vid in enumerate(self.ids)}
+
+        self.shards: Dict[ShardKey, Block] = {}
+        self.city_ranges: Dict[str, Block] = {}
+        for idx, key in enumerate(self._shard_keys):
+            self.shards[key] = (self.shards.get(key, (idx, idx))[0], idx + 1)
+            if key != REMOTE_SHARD:
+                self.city_ranges[key[0]] = (self.city_ranges.get(key[0], (idx, idx))[0], idx + 1)
+        self._partitioned = len(self.ids)
+
+        self.lexical_index = BM25Index()
+        self.lexical_index.add_many(self._lexical_documents())
+        report = self.shard_report()
+        logger.info(
+            "Partitioned %s vacancies into %s shards (largest %s, skew %.1fx, remote %s)",
+            report["vacancies"],
+            report["shards"],
+            report["largest"][:1],
+            report["skew"],
+            report["remote"],
+        )
+
+    def _lexical_documents(self) -> Iterator[Tuple[int, str]]:
+        if not self.low_memory:
+            for idx, vacancy in enumerate(self.vacancies):
+                yield idx, self._vacancy_to_lexical_text(vacancy)
+            return
+        for vacancy in self.repository.iter_all():
+            idx = self.id_to_index.get(vacancy.id)
+            if idx is not None:
+                yield idx, self._vacancy_to_lexical_text(vacancy)
+
+    def _vacancies_at(self, positions: Sequence[int]) -> Dict[int, Vacancy]:
+        """Full records for row positions; one SQLite query in low-memory mode."""
+        if not self.low_memory:
+            return {idx: self.vacancies[idx] for idx in positions}
+        by_id = {v.id: v for v in self.repository.get_many([self.ids[idx] for idx in positions])}
+        return {
+            idx: by_id[self.ids[idx]]
+            for idx in positions
+            if self.ids[idx] in by_id and not by_id[self.ids[idx]].archived
+        }
+
+    def embedding_of(self, vacancy_id: str) -> Optional[np.ndarray]:
+        position = self.id_to_index.get(vacancy_id)
+        if position is None:
+            return None
+        return self.corpus_embeddings[position].copy()
+
+    def shard_report(self) -> Dict:
+        """Shard sizes and skew (largest shard relative to the mean)."""
+        sizes = sorted(
+            ((stop - start, key) for key, (start, stop) in self.shards.items()), reverse=True
+        )
+        mean = self._partitioned / len(sizes) if sizes else 0.0
+        remote = self.shards.get(REMOTE_SHARD)
+        return {
+            "vacancies": len(self.ids),
+            "shards": len(sizes),
+            "largest": [(f"{city_label(key[0])}/{key[1]}", size) for size, key in sizes[:10]],
+            "mean": mean,
+            "median": sizes[len(sizes) // 2][0] if sizes else 0,
+            "skew": sizes[0][0] / mean if sizes and mean else 0.0,
+            "remote": remote[1] - remote[0] if remote else 0,
+            "tail": len(self.ids) - self._partitioned,
+        }
+
+    @staticmethod
+    def _salary_column(vacancies: List[Vacancy]) -> np.ndarray:
+        return np.array(
+            [v.salary_min if v.salary_min is not None else -1 for v in vacancies],
+            dtype=np.int64,
+        )
+
+    def _encode_vacancies(self, vacancies: List[Vacancy]) -> np.ndarray:
+        return np.asarray(
+            self.model.encode(
+                [self._vacancy_to_text(v) for v in vacancies],
+                show_progress_bar=False,
+                normalize_embeddings=True,
+            ),
+            dtype=np.float32,
+        )
+
+    def add_vacancies(self, vacancies: List[Vacancy]) -> None:
+        """Append new vacancies to an unpartitioned tail; repartition once it grows too large."""
+        fresh = [v for v in vacancies if v.id not in self.id_to_index]
+        if not fresh:
+            return
+        embeddings = self._encode_vacancies(fresh)
+        for vacancy in fresh:
+            idx = len(self.ids)
+            self._append_columns(vacancy)
+            if not self.low_memory:
+                self.vacancies.append(vacancy)
+            self.id_to_index[vacancy.id] = idx
+            self.lexical_index.add(idx, self._vacancy_to_lexical_text(vacancy))
+        self.corpus_embeddings = np.concatenate([self.corpus_embeddings, embeddings])
+        self._salary_min = np.concatenate([self._salary_min, self._salary_column(fresh)])
+        if len(self.ids) - self._partitioned > self.max_tail_ratio * len(self.ids):
+            self.repartition()
+
+    def apply_changes(self, changes: UpsertResult) -> None:
+        """Sync the in-memory corpus with one ``JobDatabase.upsert``, encoding only the delta.
+
+        Closed vacancies are dropped, updated ones are re-encoded in place and
+        new ones go through ``add_vacancies``; unchanged rows are not touched.
+        A full ``repartition`` only runs when rows were dropped or moved shard.
+        """
+        for vacancy_id in changes.changed:
+            self.repository.cache.discard(vacancy_id)
+        fresh = {v.id: v for v in self.repository.get_many(sorted(changes.changed - changes.closed))}
+        dropped = {self.id_to_index[vid] for vid in changes.closed if vid in self.id_to_index}
+        updated = [v for vid, v in fresh.items() if vid in self.id_to_index]
+        inserted = [v for vid, v in fresh.items() if vid not in self.id_to_index]
+
+        moved = False
+        if updated:
+            positions = [self.id_to_index[v.id] for v in updated]
+            self.corpus_embeddings[positions] = self._encode_vacancies(updated)
+            self._salary_min[positions] = self._salary_column(updated)
+            for idx, vacancy in zip(positions, updated):
+                key = shard_key(vacancy)
+                moved = moved or key != self._shard_keys[idx]
+                self._shard_keys[idx] = key
+                cluster = vacancy.cluster_id or vacancy.id
+                self._cluster_ids[idx] = vacancy.id if cluster == vacancy.id else cluster
+                if not self.low_memory:
+                    self.vacancies[idx] = vacancy
+                self.lexical_index.add(idx, self._vacancy_to_lexical_text(vacancy))
+        if dropped:
+            self._take([idx for idx in range(len(self.ids)) if idx not in dropped])
+        if dropped or moved:
+            self.repartition()
+        self.add_vacancies(inserted)
+        logger.info(
+            "Applied catalog changes: %s new, %s re-encoded, %s dropped",
+            len(inserted),
+            len(updated),
+            len(dropped),
+        )
+
+    def sync(self) -> UpsertResult:
+        """Apply catalog changes written since the last sync, e.g. by the ingestor process."""
+        changes = self.repository.database.changes_since(self.synced_at)
+        if changes.changed or changes.closed:
+            self.apply_changes(changes)
+        self.synced_at = changes.updated_at
+        return changes
+
+    def _candidate_blocks(
+        self, wanted_city: Optional[str], work_format: Optional[str], region: bool = False
+    ) -> Tuple[List[Block], np.ndarray]:
+        """Contiguous row blocks matching the hard filters plus matching tail rows.
+
+        ``wanted_city`` is a ``city_key``. With ``region`` the city filter is
+        widened to every city of its region.
+        """
+        wanted_format = work_format if work_format and work_format != UNSPECIFIED_FORMAT else None
+        wanted_cities = None
+        if wanted_city:
+            wanted_cities = set(region_keys(wanted_city)) if region else {wanted_city}
+        remote = [self.shards[REMOTE_SHARD]] if REMOTE_SHARD in self.shards else []
+
+        if wanted_format == REMOTE_FORMAT:
+            blocks = remote
+        elif wanted_cities is None and wanted_format is None:
+            blocks = [(0, self._partitioned)]
+        elif wanted_cities is None:
+            blocks = [block for key, block in self.shards.items() if key[1] == wanted_format]
+        elif wanted_format is None:
+            # Remote work is open to candidates from any city.
+            blocks = remote + [
+                self.city_ranges[name] for name in sorted(wanted_cities) if name in self.city_ranges
+            ]
+        else:
+            blocks = [
+                self.shards[(name, wanted_format)]
+                for name in sorted(wanted_cities)
+                if (name, wanted_format) in self.shards
+            ]
 
-        corpus_texts = [self._vacancy_to_text(v) for v in self.vacancies]
-        self.corpus_embeddings = self.model.encode(
-            corpus_texts, convert_to_tensor=True, show_progress_bar=False
+        def tail_matches(key: ShardKey) -> bool:
+            if wanted_format and key[1] != wanted_format:
+                return False
+            return key == REMOTE_SHARD or wanted_cities is None or key[0] in wanted_cities
+
+        tail = np.array(
+            [
+                idx
+                for idx in range(self._partitioned, len(self.ids))
+                if tail_matches(self._shard_keys[idx])
+            ],
+            dtype=np.int64,
         )
+        return blocks, tail
+
+    def _salary_mask(self, min_salary: Optional[int]) -> Optional[np.ndarray]:
+        if not min_salary:
+            return None
+        threshold = int(min_salary * SALARY_FLOOR_RATIO)
+        return (self._salary_min < 0) | (self._salary_min >= threshold)
+
+    @staticmethod
+    def _count(blocks: List[Block], tail: np.ndarray, mask: Optional[np.ndarray]) -> int:
+        """Candidate count straight from block bounds, without materialising positions."""
+        if mask is None:
+            return sum(stop - start for start, stop in blocks) + len(tail)
+        return int(sum(mask[start:stop].sum() for start, stop in blocks) + mask[tail].sum())
+
+    def _relax(
+        self, profile: ResumeProfile, min_candidates: int
+    ) -> Tuple[str, List[Block], np.ndarray, Optional[np.ndarray]]:
+        """Walk the relaxation ladder until a step yields ``min_candidates`` rows.
+
+        Steps that would not change the filters (e.g. dropping a salary floor the
+        profile never set) are skipped, so the reported step is the one that
+        actually widened the pool.
+        """
+        city, work_format = city_key(profile.city, profile.city_id), profile.work_format
+        ladder = [
+            ("exact", city, work_format, profile.salary_expectations, False),
+            ("no_salary", city, work_format, None, False),
+            ("no_format", city, None, None, False),
+            ("region", city, None, None, True),
+        ]
+        seen = set()
+        for step, step_city, step_format, salary, region in ladder:
+            cities = frozenset(region_keys(step_city) if region else [step_city])
+            signature = (
+                cities if step_city else None,
+                step_format if step_format not in (None, "", UNSPECIFIED_FORMAT) else None,
+                salary or None,
+            )
+            if signature in seen:
+                continue
+            seen.add(signature)
+            blocks, tail = self._candidate_blocks(step_city, step_format, region=region)
+            mask = self._salary_mask(salary)
+            if self._count(blocks, tail, mask) >= min_candidates:
+                return step, blocks, tail, mask
+        tail = np.arange(self._partitioned, len(self.ids))
+        return "anywhere", [(0, self._partitioned)], tail, None
+
+    @staticmethod
+    def _positions(blocks: List[Block], tail: np.ndarray, mask: Optional[np.ndarray]) -> np.ndarray:
+        positions = np.concatenate(
+            [np.arange(start, stop) for start, stop in blocks] + [tail.astype(np.int64)]
+        )
+        return positions[mask[positions]] if mask is not None else positions
+
+    def _semantic_top(
+        self,
+        query: np.ndarray,
+        blocks: List[Block],
+        tail: np.ndarray,
+        mask: Optional[np.ndarray],
+        top_k: int,
+    ) -> List[int]:
+        position_parts, score_parts = [], []
+        for start, stop in blocks:
+            # Slicing is a view: each block is scanned in place, no gather copy.
+            block_scores = self.corpus_embeddings[start:stop] @ query
+            positions = np.arange(start, stop)
+            if mask is not None:
+                keep = mask[start:stop]
+                positions, block_scores = positions[keep], block_scores[keep]
+            position_parts.append(positions)
+            score_parts.append(block_scores)
+        if len(tail):
+            if mask is not None:
+                tail = tail[mask[tail]]
+            position_parts.append(tail)
+            score_parts.append(self.corpus_embeddings[tail] @ query)
+        if not position_parts:
+            return []
+        positions = np.concatenate(position_parts)
+        scores = np.concatenate(score_parts)
+        top_k = min(top_k, len(scores))
+        if not top_k:
+            return []
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [int(positions[i]) for i in top]
 
     def recommend(
         self,
         profile: ResumeProfile,
         preferences: Optional[PreferenceVector] = None,
         limit: int = 10,
+        lexical_only: bool = False,
     ) -> List[Tuple[Vacancy, float]]:
-        preferred_candidates = self.repository.filter(
-            city=profile.city,
-            work_format=profile.work_format,
-            min_salary=profile.salary_expectations,
+        return self.recommend_relaxed(profile, preferences, limit, lexical_only).matches
+
+    def encode_profile(self, profile: ResumeProfile) -> np.ndarray:
+        """Normalised résumé embedding, the semantic query before feedback is folded in."""
+        embedding = self.model.encode(
+            self._profile_to_text(profile),
+            show_progress_bar=False,
+            normalize_embeddings=True,
         )
-        candidates = preferred_candidates or self.vacancies
-        candidate_indices = [self.id_to_index[v.id] for v in candidates]
-        candidate_embeddings = self.corpus_embeddings[candidate_indices]
+        return np.asarray(embedding, dtype=np.float32)
 
-        query_text = self._profile_to_text(profile)
-        query_embedding = self.model.encode(
-            query_text, convert_to_tensor=True, show_progress_bar=False
+    def recommend_relaxed(
+        self,
+        profile: ResumeProfile,
+        preferences: Optional[PreferenceVector] = None,
+        limit: int = 10,
+        lexical_only: bool = False,
+        min_candidates: Optional[int] = None,
+        query_embedding: Optional[np.ndarray] = None,
+    ) -> Recommendations:
+        """Rank vacancies by fusing semantic and BM25 rankings.
+
+        Hard filters select contiguous (city, format) shards instead of
+        gathering rows. When they leave fewer than ``min_candidates`` rows
+        (default ``limit``) the filters are relaxed one step at a time, see
+        ``RELAXATION_STEPS``; the step used is returned with the matches.
+        ``lexical_only`` skips the encoder entirely, which keeps the bot
+        responsive when encoding is the bottleneck; a ``query_embedding``
+        from :meth:`encode_profile` (e.g. cached per user) skips it too.
+        """
+        if not self.ids:
+            return Recommendations(matches=[])
+        relaxation, blocks, tail, salary_mask = self._relax(
+            profile, limit if min_candidates is None else min_candidates
+        )
+        candidates = self._positions(blocks, tail, salary_mask)
+        pool_size = min(limit * 3, len(candidates))
+
+        lexical_hits = self.lexical_index.search(
+            self._profile_to_lexical_query(profile),
+            top_k=pool_size,
+            candidates=candidates,
         )
+        rankings = [[idx for idx, _ in lexical_hits]]
 
-        hits = util.semantic_search(
-            query_embedding, candidate_embeddings, top_k=min(limit * 3, len(candidates))
-        )[0]
+        if not lexical_only:
+            if query_embedding is None:
+                query_embedding = self.encode_profile(profile)
+            if preferences is not None and preferences.has_centroids:
+                # Feedback is folded into the query, so it costs no extra scoring pass.
+                query_embedding = preferences.query_vector(query_embedding)
+            query = np.asarray(query_embedding, dtype=np.float32)
+            rankings.insert(0, self._semantic_top(query, blocks, tail, salary_mask, pool_size))
+        elif not lexical_hits:
+            rankings = [[int(idx) for idx in candidates[:pool_size]]]
 
+        fused = reciprocal_rank_fusion(rankings)
+        pool = self._vacancies_at(list(fused))
         scored: List[Tuple[Vacancy, float]] = []
-        for hit in hits:
-            vacancy_idx = candidate_indices[hit["corpus_id"]]
-            vacancy = self.vacancies[vacancy_idx]
-            similarity = float(hit["score"])
+        for vacancy_idx, fused_score in fused.items():
+            vacancy = pool.get(vacancy_idx)
+            if vacancy is None:
+                continue
             boost = preferences.boost_for(vacancy) if preferences else 0.0
-            scored.append((vacancy, similarity + boost))
+            scored.append((vacancy, fused_score + boost))
 
         scored.sort(key=lambda item: item[1], reverse=True)
-        return scored[:limit]
-
-    def _vacancy_to_text(self, vacancy: Vacancy) -> str:
-        skill_line = ", ".join(vacancy.skills)
-        return (
-            f"{vacancy.title}. Компания: {vacancy.company}. "
-            f"Город: {vacancy.city}. Формат: {vacancy.work_format}. "
-            f"Навыки: {skill_line}. Описание: {vacancy.description}"
+        return Recommendations(
+            matches=self._collapse_clusters(scored)[:limit], relaxation=relaxation
         )
 
-    def _profile_to_text(self, profile: ResumeProfile) -> str:
-        skill_line = ", ".join(profile.skills)
-        role_line = ", ".join(profile.preferred_roles)
-        return (
-            f"Кандидат из города {profile.city or 'неизвестно'}, "
-            f"формат {profile.work_format}, зарплата {profile.salary_expectations or 'не указано'}. "
-            f"Навыки: {skill_line}. Роли: {role_line}. "
-            f"Ожидания: {profile.raw_text}"
-        )
+    @staticmethod
+    def _collapse_clusters(scored: List[Tuple[Vacancy, float]]) -> List[Tuple[Vacancy, float]]:
+        """Keep only the best-scored vacancy of each near-duplicate cluster."""
+        seen = set()
+        collapsed = []
+        for vacancy, score in scored:
+            cluster = vacancy.cluster_id or vacancy.id
+            if cluster in seen:
+                continue
+            seen.add(cluster)
+            collapsed.append((vacancy, score))
+        return collapsed
+
+    _vacancy_to_text = staticmethod(vacancy_to_text)
+
+    @staticmethod
+    def _vacancy_to_lexical_text(vacancy: Vacancy) -> str:
+        return f"{vacancy.title} {' '.join(vacancy.skills)} {vacancy.description}"
+
+    _profile_to_text = staticmethod(profile_to_text)
 
+    @staticmethod
+    def _profile_to_lexical_query(profile: ResumeProfile) -> str:
+        return " ".join([*profile.skills, *profile.preferred_roles, profile.raw_text])
@@ -2,10 +2,28 @@ from __future__ import annotations
 
 from collections import Counter
 from dataclasses import dataclass, field
-from typing import Dict, Iterable, Set
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+import numpy as np
 
 from .job_repository import Vacancy
 
+# Rocchio weights for the résumé embedding, the liked centroid and the disliked centroid.
+ROCCHIO_WEIGHTS = (1.0, 0.75, 0.15)
+
+
+def _running_mean(
+    mean: Optional[np.ndarray], count: int, embedding: np.ndarray, sign: int = 1
+) -> Optional[np.ndarray]:
+    """Add (``sign=1``) or remove (``sign=-1``) one vector from a mean of ``count`` vectors."""
+    embedding = np.asarray(embedding, dtype=np.float32)
+    new_count = count + sign
+    if new_count <= 0:
+        return None
+    if mean is None:
+        return embedding.copy()
+    return mean + sign * (embedding - mean) / new_count
+
 
 @dataclass
 class PreferenceVector:
@@ -14,6 +32,11 @@ class PreferenceVector:
     liked_vacancies: Set[str] = field(default_factory=set)
     disliked_vacancies: Set[str] = field(default_factory=set)
     favorite_vacancies: Set[str] = field(default_factory=set)
+    # Running means of the embeddings of liked (incl. favourite) and disliked vacancies.
+    liked_centroid: Optional[np.ndarray] = None
+    liked_count: int = 0
+    disliked_centroid: Optional[np.ndarray] = None
+    disliked_count: int = 0
 
     @classmethod
     def from_payload(cls, payload: Dict) -> "PreferenceVector":
@@ -23,18 +46,39 @@ class PreferenceVector:
             liked_vacancies=set(payload.get("liked_vacancies", [])),
             disliked_vacancies=set(payload.get("disliked_vacancies", [])),
             favorite_vacancies=set(payload.get("favorite_vacancies", [])),
+            liked_count=payload.get("liked_count", 0),
+            disliked_count=payload.get("disliked_count", 0),
         )
 
     def to_payload(self) -> Dict:
-        return {
+        """JSON-friendly fields; the centroids themselves are stored by the caller."""
+        payload = {
             "liked_skills": dict(self.liked_skills),
             "disliked_skills": dict(self.disliked_skills),
             "liked_vacancies": list(self.liked_vacancies),
             "disliked_vacancies": list(self.disliked_vacancies),
             "favorite_vacancies": list(self.favorite_vacancies),
         }
+        if self.liked_centroid is not None:
+            payload["liked_count"] = self.liked_count
+        if self.disliked_centroid is not None:
+            payload["disliked_count"] = self.disliked_count
+        return payload
+
+    def _is_liked(self, vacancy_id: str) -> bool:
+        return vacancy_id in self.liked_vacancies or vacancy_id in self.favorite_vacancies
+
+    def update_from_vacancy(
+        self, vacancy: Vacancy, feedback: str, embedding: Optional[np.ndarray] = None
+    ) -> None:
+        """Record feedback; with the vacancy's ``embedding`` also update the centroids in O(d)."""
+        if embedding is not None and feedback in ("like", "favorite") and not self._is_liked(vacancy.id):
+            self.liked_centroid = _running_mean(self.liked_centroid, self.liked_count, embedding)
+            self.liked_count += 1
+        elif embedding is not None and feedback == "dislike" and vacancy.id not in self.disliked_vacancies:
+            self.disliked_centroid = _running_mean(self.disliked_centroid, self.disliked_count, embedding)
+            self.disliked_count += 1
 
-    def update_from_vacancy(self, vacancy: Vacancy, feedback: str) -> None:
         if feedback == "like":
             self.liked_vacancies.add(vacancy.id)
             for skill in vacancy.skills:
@@ -46,8 +90,34 @@ class PreferenceVector:
         elif feedback == "favorite":
             self.favorite_vacancies.add(vacancy.id)
 
-    def remove_favorite(self, vacancy_id: str) -> None:
+    def remove_favorite(self, vacancy_id: str, embedding: Optional[np.ndarray] = None) -> None:
+        if vacancy_id not in self.favorite_vacancies:
+            return
         self.favorite_vacancies.discard(vacancy_id)
+        if embedding is not None and self.liked_count and not self._is_liked(vacancy_id):
+            self.liked_centroid = _running_mean(self.liked_centroid, self.liked_count, embedding, sign=-1)
+            self.liked_count -= 1
+
+    @property
+    def has_centroids(self) -> bool:
+        return self.liked_centroid is not None or self.disliked_centroid is not None
+
+    def query_vector(
+        self, profile_embedding: np.ndarray, weights: Tuple[float, float, float] = ROCCHIO_WEIGHTS
+    ) -> np.ndarray:
+        """Rocchio query: résumé embedding pulled towards liked and away from disliked vacancies.
+
+        The result is unit length, so it drops into any cosine/inner-product
+        index in place of the résumé embedding.
+        """
+        alpha, beta, gamma = weights
+        query = alpha * np.asarray(profile_embedding, dtype=np.float32)
+        if self.liked_centroid is not None:
+            query = query + beta * self.liked_centroid
+        if self.disliked_centroid is not None:
+            query = query - gamma * self.disliked_centroid
+        norm = np.linalg.norm(query)
+        return query / norm if norm else query
 
     def boost_for(self, vacancy: Vacancy) -> float:
         if vacancy.id in self.disliked_vacancies:
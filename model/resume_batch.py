@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from itertools import islice
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Protocol, Set, Tuple
+
+import numpy as np
+
+from .encoders import DEFAULT_MODEL_NAME, get_encoder
+from .main import ResumeExtractor, ResumeProfile
+from .texts import profile_to_text
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[int, float], None]
+# (résumé id, profile fields, normalised profile embedding)
+ParsedResume = Tuple[str, Dict, List[float]]
+
+_WORKER_EXTRACTOR: Optional[ResumeExtractor] = None
+_WORKER_ENCODER = None
+_WORKER_MODE: Optional[str] = None
+
+# What one malformed résumé can make the extractor raise. Anything else (a
+# missing model, MemoryError, a broken worker) fails the whole run instead of
+# marking every remaining résumé as failed.
+_RESUME_ERRORS = (ValueError, TypeError, KeyError, IndexError, AttributeError, RecursionError)
+
+
+@dataclass
+class BatchReport:
+    processed: int
+    skipped: int
+    failed: int
+    seconds: float
+
+    @property
+    def resumes_per_second(self) -> float:
+        return self.processed / self.seconds if self.seconds else float("inf")
+
+
+class ProfileSink(Protocol):
+    def write(self, parsed: List[ParsedResume]) -> None: ...
+
+
+class JsonlProfileSink:
+    """Appends one ``{"id", "profile", "embedding"}`` object per line."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def write(self, parsed: List[ParsedResume]) -> None:
+        with self.path.open("a", encoding="utf-8") as f:
+            for resume_id, profile, embedding in parsed:
+                record = {"id": resume_id, "profile": profile, "embedding": embedding}
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class Checkpoint:
+    """Append-only list of processed résumé ids, so an interrupted run can resume."""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def load(self) -> Set[str]:
+        if not self.path.exists():
+            return set()
+        with self.path.open(encoding="utf-8") as f:
+            return {line.strip() for line in f if line.strip()}
+
+    def mark(self, resume_ids: Iterable[str]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as f:
+            f.writelines(f"{resume_id}\n" for resume_id in resume_ids)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def profile_text(profile: ResumeProfile) -> str:
+    # Same text the matcher embeds for a query, so stored vectors can be reused.
+    return profile_to_text(profile)
+
+
+def _init_worker(mode: Optional[str], model_name: str, threads: int) -> None:
+    # Must run before torch/onnxruntime spin up their thread pools.
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "ENCODER_THREADS"):
+        os.environ[var] = str(threads)
+    if os.getenv("ENCODER_BACKEND", "torch") == "torch":
+        import torch
+
+        torch.set_num_threads(threads)
+    _load_models(mode, model_name)
+
+
+def _load_models(mode: Optional[str], model_name: str) -> None:
+    global _WORKER_EXTRACTOR, _WORKER_ENCODER, _WORKER_MODE
+    _WORKER_MODE = mode
+    _WORKER_EXTRACTOR = ResumeExtractor()
+    _WORKER_ENCODER = get_encoder(model_name)
+    # Natasha and the classifier build lazy state on first use; pay for it here.
+    _WORKER_EXTRACTOR.parse("Меня зовут Иван Иванов, живу в Москве. Навыки: Python, SQL.", mode=mode)
+
+
+def _parse_chunk(chunk: List[Tuple[str, str]]) -> Tuple[List[ParsedResume], List[str]]:
+    profiles: List[Tuple[str, ResumeProfile]] = []
+    failed: List[str] = []
+    for resume_id, text in chunk:
+        try:
+            profiles.append((resume_id, _WORKER_EXTRACTOR.parse(text, mode=_WORKER_MODE)))
+        except _RESUME_ERRORS:
+            logger.exception("Failed to parse résumé %s", resume_id)
+            failed.append(resume_id)
+    if not profiles:
+        return [], failed
+    embeddings = np.asarray(
+        _WORKER_ENCODER.encode(
+            [profile_text(profile) for _, profile in profiles],
+            show_progress_bar=False,
+            normalize_embeddings=True,
+        ),
+        dtype=np.float32,
+    )
+    parsed = [
+        (resume_id, asdict(profile), embedding.tolist())
+        for (resume_id, profile), embedding in zip(profiles, embeddings)
+    ]
+    return parsed, failed
+
+
+def _chunks(items: Iterator[Tuple[str, str]], size: int) -> Iterator[List[Tuple[str, str]]]:
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _bounded_map(pool, tasks: Iterator[List[Tuple[str, str]]], max_in_flight: int):
+    """``_parse_chunk`` over ``tasks`` in order, reading a task only when a slot is free.
+
+    ``imap_unordered`` would let the pool's task thread drain ``tasks`` ahead
+    of the workers, i.e. read the whole input file into the queue.
+    """
+    pending: deque = deque()
+    for task in tasks:
+        pending.append(pool.apply_async(_parse_chunk, (task,)))
+        while len(pending) >= max_in_flight:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def process_resumes(
+    resumes: Iterable[Tuple[str, str]],
+    sink: ProfileSink,
+    checkpoint: Optional[Checkpoint] = None,
+    mode: Optional[str] = None,
+    model_name: str = DEFAULT_MODEL_NAME,
+    workers: int = 1,
+    threads_per_worker: int = 1,
+    chunk_size: int = 16,
+    max_in_flight: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> BatchReport:
+    """Parse ``(id, text)`` pairs across a process pool and write them to ``sink``.
+
+    Each worker loads Natasha, the skill classifier and the encoder once.
+    At most ``max_in_flight`` chunks (default ``2 * workers``) are queued to
+    the pool, so the input is streamed rather than read ahead. Chunks are
+    written as they finish and their ids are checkpointed only
+    after the sink accepted them, so a rerun never loses a résumé; a crash
+    between the two can at worst write one chunk twice.
+    """
+    max_in_flight = max_in_flight or 2 * max(workers, 1)
+    done = checkpoint.load() if checkpoint else set()
+    skipped = 0
+
+    def pending() -> Iterator[Tuple[str, str]]:
+        nonlocal skipped
+        for resume_id, text in resumes:
+            if resume_id in done:
+                skipped += 1
+            else:
+                yield resume_id, text
+
+    started = time.perf_counter()
+    processed = failed = 0
+
+    def consume(results: Iterable[Tuple[List[ParsedResume], List[str]]]) -> None:
+        nonlocal processed, failed
+        for parsed, failures in results:
+            if parsed:
+                sink.write(parsed)
+                if checkpoint:
+                    checkpoint.mark(resume_id for resume_id, _, _ in parsed)
+            processed += len(parsed)
+            failed += len(failures)
+            if progress:
+                progress(processed, time.perf_counter() - started)
+
+    tasks = _chunks(pending(), chunk_size)
+    if workers <= 1:
+        _load_models(mode, model_name)
+        consume(_parse_chunk(chunk) for chunk in tasks)
+    else:
+        ctx = get_context("spawn")
+        with ctx.Pool(
+            workers,
+            initializer=_init_worker,
+            initargs=(mode, model_name, threads_per_worker),
+        ) as pool:
+            consume(_bounded_map(pool, tasks, max_in_flight))
+
+    return BatchReport(
+        processed=processed,
+        skipped=skipped,
+        failed=failed,
+        seconds=time.perf_counter() - started,
+    )
@@ -1,40 +1,54 @@
 from __future__ import annotations
 
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from functools import lru_cache
-from typing import List
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
 
-from sentence_transformers import util
+import numpy as np
 
-from .data import (
-    quality_aliases,
-    quality_classes,
-    skill_aliases,
-    skill_classes,
-)
 from .encoders import get_encoder
+from .skill_index import DEFAULT_SKILL_INDEX_DIR, SkillIndex, load_or_build_index
+from .skill_taxonomy import Taxonomy, builtin_qualities, load_skills
 
 
 @dataclass
 class SkillQualityPrediction:
     skills: List[str]
     qualities: List[str]
+    # Cosine score of the best chunk per predicted class; keyword hits score 1.0.
+    confidences: Dict[str, float] = field(default_factory=dict)
+    # The résumé chunk each prediction was made from.
+    evidence: Dict[str, str] = field(default_factory=dict)
 
 
 class SkillQualityClassifier:
-    """Embedding-based matcher that maps résumé text to curated skill dictionaries."""
+    """Embedding-based matcher that maps résumé text to skill and quality taxonomies.
 
-    def __init__(self, model_name: str = "paraphrase-multilingual-MiniLM-L12-v2"):
-        self.skill_classes = skill_classes
-        self.quality_classes = quality_classes
+    Labels are embedded once into a ``SkillIndex`` (cached on disk per model
+    and taxonomy). Every label in the index's exact head (all qualities and
+    the curated skills) is scored against every chunk and keeps its best one,
+    as before the index existed. Only the clustered tail of a large external
+    taxonomy (see ``SKILL_TAXONOMY``) is searched per chunk for its ``top_k``
+    nearest labels, which keeps latency flat however large the taxonomy is.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "paraphrase-multilingual-MiniLM-L12-v2",
+        skills: Optional[Taxonomy] = None,
+        index_dir: Optional[Path] = DEFAULT_SKILL_INDEX_DIR,
+        top_k: int = 10,
+    ):
+        self.skills = skills if skills is not None else load_skills()
+        self.qualities = builtin_qualities()
+        self.skill_classes = self.skills.labels
+        self.quality_classes = self.qualities.labels
+        self.top_k = top_k
         self.encoder = get_encoder(model_name)
-        self.skill_embeddings = self.encoder.encode(
-            self.skill_classes, convert_to_tensor=True, show_progress_bar=False
-        )
-        self.quality_embeddings = self.encoder.encode(
-            self.quality_classes, convert_to_tensor=True, show_progress_bar=False
-        )
+        self.skill_index = load_or_build_index(self.skills, self.encoder, model_name, index_dir)
+        self.quality_index = load_or_build_index(self.qualities, self.encoder, model_name, directory=None)
 
     def predict(
         self,
@@ -42,73 +56,121 @@ class SkillQualityClassifier:
         skill_threshold: float = 0.38,
         quality_threshold: float = 0.35,
     ) -> SkillQualityPrediction:
-        chunks = self._chunk_text(text)
-        if not chunks:
-            return SkillQualityPrediction(skills=[], qualities=[])
-
-        text_lower = text.lower()
-        chunk_embeddings = self.encoder.encode(
-            chunks, convert_to_tensor=True, show_progress_bar=False
-        )
+        return self.predict_batch([text], skill_threshold, quality_threshold)[0]
 
-        skill_hits = util.semantic_search(
-            self.skill_embeddings, chunk_embeddings, top_k=1
-        )
-        quality_hits = util.semantic_search(
-            self.quality_embeddings, chunk_embeddings, top_k=1
-        )
+    def predict_batch(
+        self,
+        texts: Sequence[str],
+        skill_threshold: float = 0.38,
+        quality_threshold: float = 0.35,
+        batch_size: int = 64,
+    ) -> List[SkillQualityPrediction]:
+        """Score many résumés with one encoder pass; see the class docstring for how labels are scored."""
+        chunked = [self._chunk_text(text) for text in texts]
+        all_chunks = [chunk for chunks in chunked for chunk in chunks]
+        if all_chunks:
+            chunk_embeddings = np.asarray(
+                self.encoder.encode(
+                    all_chunks,
+                    batch_size=batch_size,
+                    show_progress_bar=False,
+                    normalize_embeddings=True,
+                ),
+                dtype=np.float32,
+            )
+            groups = [
+                (self.skill_classes, self.skill_index, skill_threshold),
+                (self.quality_classes, self.quality_index, quality_threshold),
+            ]
+            tails = [index.search(chunk_embeddings, self.top_k, head=False) for _, index, _ in groups]
+
+        predictions = []
+        offset = 0
+        for text, chunks in zip(texts, chunked):
+            if not chunks:
+                predictions.append(SkillQualityPrediction(skills=[], qualities=[]))
+                continue
+            rows = range(offset, offset + len(chunks))
+            offset += len(chunks)
+            confidences: Dict[str, float] = {}
+            evidence: Dict[str, str] = {}
+            for (labels, index, threshold), (scores, ids) in zip(groups, tails):
+                best = self._head_hits(index, chunk_embeddings[rows.start : rows.stop], threshold, rows.start)
+                for label_id, (score, row) in self._tail_hits(scores, ids, threshold, rows).items():
+                    if label_id not in best or score > best[label_id][0]:
+                        best[label_id] = (score, row)
+                for label_id, (score, row) in best.items():
+                    confidences[labels[label_id]] = score
+                    evidence[labels[label_id]] = all_chunks[row]
+            predictions.append(self._merge_keywords(text, chunks, confidences, evidence))
+        return predictions
 
-        predicted_skills = [
-            self.skill_classes[idx]
-            for idx, matches in enumerate(skill_hits)
-            if matches and matches[0]["score"] >= skill_threshold
-        ]
-        predicted_qualities = [
-            self.quality_classes[idx]
-            for idx, matches in enumerate(quality_hits)
-            if matches and matches[0]["score"] >= quality_threshold
-        ]
-
-        keyword_skills = self._keyword_scan(
-            text_lower, self.skill_classes, skill_aliases
-        )
-        keyword_qualities = self._keyword_scan(
-            text_lower, self.quality_classes, quality_aliases
-        )
+    @staticmethod
+    def _head_hits(
+        index: SkillIndex, chunk_embeddings: np.ndarray, threshold: float, first_row: int
+    ) -> Dict[int, Tuple[float, int]]:
+        """Exact best chunk of every head label: ``{label id: (score, chunk row)}`` above ``threshold``."""
+        scores = chunk_embeddings @ index.embeddings[: index.head].T
+        best_chunk = scores.argmax(axis=0)
+        best_score = scores[best_chunk, np.arange(scores.shape[1])]
+        return {
+            int(label_id): (float(best_score[label_id]), first_row + int(best_chunk[label_id]))
+            for label_id in np.flatnonzero(best_score >= threshold)
+        }
 
-        predicted_skills.extend(keyword_skills)
-        predicted_qualities.extend(keyword_qualities)
+    @staticmethod
+    def _tail_hits(
+        scores: np.ndarray, ids: np.ndarray, threshold: float, rows: range
+    ) -> Dict[int, Tuple[float, int]]:
+        """Per tail label retrieved for any of ``rows`` above ``threshold``: its best score and chunk row."""
+        best: Dict[int, Tuple[float, int]] = {}
+        for row in rows:
+            for score, label_id in zip(scores[row], ids[row]):
+                if label_id < 0 or score < threshold:
+                    break
+                label_id = int(label_id)
+                if label_id not in best or score > best[label_id][0]:
+                    best[label_id] = (float(score), row)
+        return best
 
-        # Deduplicate while preserving order
-        skills_unique = list(dict.fromkeys(predicted_skills))[:25]
-        qualities_unique = list(dict.fromkeys(predicted_qualities))[:15]
+    def predict_keywords(self, text: str) -> SkillQualityPrediction:
+        """Alias scan only: no encoder call, used by the fast extraction tier."""
+        return self._merge_keywords(text, self._chunk_text(text), {}, {})
 
-        return SkillQualityPrediction(skills=skills_unique, qualities=qualities_unique)
+    def _merge_keywords(
+        self,
+        text: str,
+        chunks: List[str],
+        confidences: Dict[str, float],
+        evidence: Dict[str, str],
+    ) -> SkillQualityPrediction:
+        """Add exact alias hits (confidence 1.0) and rank each group by confidence."""
+        keyword_hits = {**self.skills.scan(text), **self.qualities.scan(text)}
+        for label, alias in keyword_hits.items():
+            confidences[label] = 1.0
+            evidence[label] = next((chunk for chunk in chunks if alias in chunk.lower()), alias)
+
+        def ranked(taxonomy: Taxonomy, limit: int) -> List[str]:
+            # Ties keep taxonomy order; cost depends on the hits, not the taxonomy size.
+            hits = [(taxonomy.position(label), label) for label in confidences]
+            hits = sorted((-confidences[label], position, label) for position, label in hits if position is not None)
+            return [label for _, _, label in hits[:limit]]
+
+        skills = ranked(self.skills, 25)
+        qualities = ranked(self.qualities, 15)
+        kept = set(skills) | set(qualities)
+        return SkillQualityPrediction(
+            skills=skills,
+            qualities=qualities,
+            confidences={label: score for label, score in confidences.items() if label in kept},
+            evidence={label: chunk for label, chunk in evidence.items() if label in kept},
+        )
 
     @staticmethod
     def _chunk_text(text: str) -> List[str]:
         # Split by sentences/paragraphs and filter very short fragments
         rough_chunks = re.split(r"[.\n\r]+", text)
-        chunks = [chunk.strip() for chunk in rough_chunks if len(chunk.strip()) > 3]
-        return chunks[:80]
-
-    @staticmethod
-    def _keyword_scan(
-        text_lower: str,
-        classes: List[str],
-        aliases: dict,
-    ) -> List[str]:
-        hits = []
-        for canonical in classes:
-            patterns = aliases.get(canonical, [canonical])
-            for pattern in patterns:
-                normalized = pattern.lower().strip()
-                if not normalized:
-                    continue
-                if re.search(rf"\b{re.escape(normalized)}\b", text_lower):
-                    hits.append(canonical)
-                    break
-        return hits
+        return [chunk.strip() for chunk in rough_chunks if len(chunk.strip()) > 3]
 
 
 @lru_cache(maxsize=1)
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .skill_taxonomy import Taxonomy
+
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_SKILL_INDEX_DIR = BASE_DIR / "data" / "skill_index"
+# The first rows (the curated skills come first) are always scanned exactly;
+# only rows beyond this many are clustered.
+EXACT_BELOW = 4096
+DEFAULT_NPROBE = 16
+
+
+def _kmeans(vectors: np.ndarray, n_lists: int, iterations: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Spherical k-means: unit centroids and the list each vector falls into."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = (vectors @ centroids.T).argmax(axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        counts = np.bincount(assignment, minlength=n_lists)
+        empty = counts == 0
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+        centroids = sums / np.clip(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12, None)
+    return centroids.astype(np.float32), (vectors @ centroids.T).argmax(axis=1)
+
+
+class SkillIndex:
+    """Top-k inner-product search over normalised skill embeddings.
+
+    The first ``EXACT_BELOW`` rows are scanned exactly, so small taxonomies
+    and the curated head of large ones never lose a hit. Rows beyond that
+    are clustered into about ``sqrt(n)`` inverted lists stored contiguously,
+    and each query only scores its ``nprobe`` closest lists, so a query
+    touches a fixed head plus ``O(sqrt(n))`` rows instead of all of them.
+    """
+
+    def __init__(
+        self,
+        embeddings: np.ndarray,
+        centroids: Optional[np.ndarray] = None,
+        order: Optional[np.ndarray] = None,
+        offsets: Optional[np.ndarray] = None,
+        nprobe: int = DEFAULT_NPROBE,
+    ):
+        self.embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        self.centroids = centroids
+        self.order = order
+        self.offsets = offsets
+        self.nprobe = nprobe
+        # Rows before ``head`` are scanned exactly; the rest are regrouped by list,
+        # so a list is one contiguous slice.
+        self.head = len(self.embeddings) - (len(order) if order is not None else 0)
+        self._grouped = self.embeddings[order] if order is not None else None
+
+    def __len__(self) -> int:
+        return len(self.embeddings)
+
+    @property
+    def exact(self) -> bool:
+        return self.centroids is None
+
+    @classmethod
+    def build(
+        cls,
+        embeddings: np.ndarray,
+        exact_below: int = EXACT_BELOW,
+        n_lists: Optional[int] = None,
+        iterations: int = 10,
+        seed: int = 0,
+        nprobe: int = DEFAULT_NPROBE,
+    ) -> "SkillIndex":
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if len(embeddings) <= exact_below:
+            return cls(embeddings, nprobe=nprobe)
+        tail = embeddings[exact_below:]
+        n_lists = n_lists or max(1, int(np.sqrt(len(tail))))
+        centroids, assignment = _kmeans(tail, n_lists, iterations, seed)
+        order = exact_below + np.argsort(assignment, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=n_lists))])
+        return cls(embeddings, centroids, order, offsets, nprobe)
+
+    def search(self, queries: np.ndarray, k: int, head: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """Scores and row ids of the ``k`` best rows per query, best first; ids of missing slots are -1.
+
+        With ``head=False`` only the clustered rows are searched (nothing, for
+        an exact index), for callers that score the head themselves.
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        if self.exact and not head:
+            return scores, ids
+        if self.exact:
+            for row, (row_scores, row_ids) in enumerate(self._top(queries @ self.embeddings.T, None, k)):
+                scores[row, : len(row_ids)], ids[row, : len(row_ids)] = row_scores, row_ids
+            return scores, ids
+
+        nprobe = min(self.nprobe, len(self.centroids))
+        probes = np.argpartition(-(queries @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+        # Score each probed list once against every query probing it; lists are contiguous slices.
+        candidates: List[List[Tuple[np.ndarray, np.ndarray]]] = [[] for _ in range(len(queries))]
+        if head:
+            head_ids = np.arange(self.head)
+            for parts, row_scores in zip(candidates, queries @ self.embeddings[: self.head].T):
+                parts.append((row_scores, head_ids))
+        for lst in np.unique(probes):
+            start, end = self.offsets[lst], self.offsets[lst + 1]
+            if start == end:
+                continue
+            probing = np.flatnonzero((probes == lst).any(axis=1))
+            block = queries[probing] @ self._grouped[start:end].T
+            for query, row_scores in zip(probing, block):
+                candidates[query].append((row_scores, self.order[start:end]))
+        for row, parts in enumerate(candidates):
+            if not parts:
+                continue
+            candidate_scores = np.concatenate([part[0] for part in parts])
+            candidate_ids = np.concatenate([part[1] for part in parts])
+            (row_scores, row_ids), = self._top(candidate_scores[None, :], candidate_ids, k)
+            scores[row, : len(row_ids)], ids[row, : len(row_ids)] = row_scores, row_ids
+        return scores, ids
+
+    @staticmethod
+    def _top(scores: np.ndarray, row_ids: Optional[np.ndarray], k: int):
+        k = min(k, scores.shape[1])
+        if k == 0:
+            return [(scores[i, :0], np.zeros(0, dtype=np.int64)) for i in range(len(scores))]
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        ranked = np.take_along_axis(top, np.argsort(-top_scores, axis=1), axis=1)
+        return [
+            (scores[i, ranked[i]], ranked[i] if row_ids is None else row_ids[ranked[i]])
+            for i in range(len(scores))
+        ]
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {"embeddings": self.embeddings}
+        if not self.exact:
+            arrays.update(centroids=self.centroids, order=self.order, offsets=self.offsets)
+        tmp_path = path.with_suffix(".tmp.npz")
+        np.savez(tmp_path, **arrays)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path, nprobe: int = DEFAULT_NPROBE) -> "SkillIndex":
+        with np.load(path) as arrays:
+            return cls(
+                arrays["embeddings"],
+                arrays["centroids"] if "centroids" in arrays else None,
+                arrays["order"] if "order" in arrays else None,
+                arrays["offsets"] if "offsets" in arrays else None,
+                nprobe,
+            )
+
+
+def index_path(model_name: str, taxonomy: Taxonomy, directory: Path = DEFAULT_SKILL_INDEX_DIR) -> Path:
+    slug = model_name.replace("/", "__")
+    return directory / f"{slug}-{taxonomy.fingerprint}.npz"
+
+
+def load_or_build_index(
+    taxonomy: Taxonomy,
+    encoder,
+    model_name: str,
+    directory: Optional[Path] = DEFAULT_SKILL_INDEX_DIR,
+    batch_size: int = 256,
+) -> SkillIndex:
+    """The prebuilt index for this model and taxonomy, encoding and saving it on a miss.
+
+    ``directory=None`` skips the on-disk cache (the bundled dictionaries
+    encode in well under a second).
+    """
+    path = index_path(model_name, taxonomy, directory) if directory is not None else None
+    if path is not None and path.exists():
+        index = SkillIndex.load(path)
+        if len(index) == len(taxonomy):
+            return index
+    embeddings = np.asarray(
+        encoder.encode(
+            taxonomy.labels,
+            batch_size=batch_size,
+            show_progress_bar=False,
+            normalize_embeddings=True,
+        ),
+        dtype=np.float32,
+    )
+    index = SkillIndex.build(embeddings)
+    if path is not None:
+        index.save(path)
+    return index
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import csv
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .data import quality_aliases, quality_classes, skill_aliases, skill_classes
+from .embedding_store import text_fingerprint
+
+
+# Optional external skill taxonomy merged after the curated skills: an ESCO
+# export (``preferredLabel`` plus newline-separated ``altLabels``) or a plain
+# ``label,aliases`` CSV with ``|``-separated aliases.
+SKILL_TAXONOMY = os.getenv("SKILL_TAXONOMY")
+
+# "c++" and "c#" keep their suffix; everything else splits on non-word chars,
+# so "ci/cd", "ci-cd" and "ci cd" are the same alias.
+_TOKEN = re.compile(r"\w+[+#]*")
+
+
+def _tokens(text: str) -> Tuple[str, ...]:
+    return tuple(_TOKEN.findall(text.lower().replace("ё", "е")))
+
+
+@dataclass(frozen=True)
+class Skill:
+    label: str
+    aliases: Tuple[str, ...] = ()
+    uri: Optional[str] = None
+
+
+class Taxonomy:
+    """Canonical labels with aliases; keyword lookups go through a token n-gram dict.
+
+    Scanning a text costs one dict probe per token and n-gram length, so it
+    does not depend on how many labels or aliases the taxonomy holds.
+    """
+
+    def __init__(self, skills: Iterable[Skill]):
+        self.skills: List[Skill] = []
+        self._positions: Dict[str, int] = {}
+        self._aliases: Dict[Tuple[str, ...], List[int]] = {}
+        self.max_words = 0
+        for skill in skills:
+            self.add(skill)
+
+    def add(self, skill: Skill) -> None:
+        """Append ``skill``; a label already present (case-insensitively) only gains the aliases."""
+        key = skill.label.lower()
+        position = self._positions.get(key)
+        if position is None:
+            position = self._positions[key] = len(self.skills)
+            self.skills.append(skill)
+        else:
+            known = self.skills[position]
+            merged = tuple(dict.fromkeys(known.aliases + skill.aliases))
+            self.skills[position] = Skill(known.label, merged, known.uri or skill.uri)
+        for alias in (skill.label, *skill.aliases):
+            words = _tokens(alias)
+            if not words:
+                continue
+            positions = self._aliases.setdefault(words, [])
+            if position not in positions:
+                positions.append(position)
+            self.max_words = max(self.max_words, len(words))
+
+    def __len__(self) -> int:
+        return len(self.skills)
+
+    def position(self, label: str) -> Optional[int]:
+        """Index of ``label`` (exact spelling) in :attr:`labels`, or ``None``."""
+        position = self._positions.get(label.lower())
+        if position is None or self.skills[position].label != label:
+            return None
+        return position
+
+    @property
+    def labels(self) -> List[str]:
+        return [skill.label for skill in self.skills]
+
+    @property
+    def fingerprint(self) -> str:
+        """Changes whenever a label is added, removed or reordered."""
+        return text_fingerprint("\n".join(self.labels))
+
+    def merged(self, other: "Taxonomy") -> "Taxonomy":
+        return Taxonomy([*self.skills, *other.skills])
+
+    def scan(self, text: str) -> Dict[str, str]:
+        """Map each label mentioned in ``text`` to the lower-cased span that matched it."""
+        lowered = text.lower()
+        folded = lowered.replace("ё", "е")
+        spans = [(match.start(), match.end(), match.group(0)) for match in _TOKEN.finditer(folded)]
+        hits: Dict[str, str] = {}
+        for start in range(len(spans)):
+            for length in range(1, min(self.max_words, len(spans) - start) + 1):
+                words = tuple(span[2] for span in spans[start : start + length])
+                for position in self._aliases.get(words, ()):
+                    label = self.skills[position].label
+                    if label not in hits:
+                        hits[label] = lowered[spans[start][0] : spans[start + length - 1][1]]
+        return hits
+
+    @classmethod
+    def from_dict(cls, labels: List[str], aliases: Dict[str, List[str]]) -> "Taxonomy":
+        return cls(Skill(label, tuple(aliases.get(label, ()))) for label in labels)
+
+    @classmethod
+    def from_csv(cls, path: Path) -> "Taxonomy":
+        """Load an ESCO skills export or a ``label,aliases`` CSV."""
+        with path.open(encoding="utf-8", newline="") as f:
+            reader = csv.DictReader(f)
+            esco = "preferredLabel" in (reader.fieldnames or ())
+            skills = []
+            for row in reader:
+                if esco:
+                    label = (row.get("preferredLabel") or "").strip()
+                    aliases = (row.get("altLabels") or "").splitlines()
+                    uri = row.get("conceptUri") or None
+                else:
+                    label = (row.get("label") or "").strip()
+                    aliases = (row.get("aliases") or "").split("|")
+                    uri = None
+                if label:
+                    skills.append(Skill(label, tuple(a.strip() for a in aliases if a.strip()), uri))
+        return cls(skills)
+
+
+def builtin_skills() -> Taxonomy:
+    return Taxonomy.from_dict(skill_classes, skill_aliases)
+
+
+def builtin_qualities() -> Taxonomy:
+    return Taxonomy.from_dict(quality_classes, quality_aliases)
+
+
+def load_skills(path: Optional[str] = SKILL_TAXONOMY) -> Taxonomy:
+    """The curated skills, extended with the taxonomy at ``path`` when one is configured."""
+    skills = builtin_skills()
+    if path:
+        skills = skills.merged(Taxonomy.from_csv(Path(path)))
+    return skills
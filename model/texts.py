@@ -0,0 +1,32 @@
+"""Texts the encoder sees for vacancies and résumé profiles.
+
+Kept free of encoder and NLP imports, so build and import workers can
+produce texts without loading the matcher.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .job_repository import Vacancy
+    from .main import ResumeProfile
+
+
+def vacancy_to_text(vacancy: "Vacancy") -> str:
+    skill_line = ", ".join(vacancy.skills)
+    return (
+        f"{vacancy.title}. Компания: {vacancy.company}. "
+        f"Город: {vacancy.city}. Формат: {vacancy.work_format}. "
+        f"Навыки: {skill_line}. Описание: {vacancy.description}"
+    )
+
+
+def profile_to_text(profile: "ResumeProfile") -> str:
+    skill_line = ", ".join(profile.skills)
+    role_line = ", ".join(profile.preferred_roles)
+    return (
+        f"Кандидат из города {profile.city or 'неизвестно'}, "
+        f"формат {profile.work_format}, зарплата {profile.salary_expectations or 'не указано'}. "
+        f"Навыки: {skill_line}. Роли: {role_line}. "
+        f"Ожидания: {profile.raw_text}"
+    )
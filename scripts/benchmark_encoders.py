@@ -0,0 +1,136 @@
+"""Compare torch and ONNX encoder backends on bundled résumés and vacancies.
+
+Usage::
+
+    python -m scripts.benchmark_encoders --backends torch,onnx,onnx-int8
+
+Checks that résumé×vacancy cosine scores of every backend stay within
+``--tolerance`` of the torch reference, then reports load time, corpus
+throughput and single-query latency.
+"""
+from __future__ import annotations
+
+import argparse
+import resource
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from data.resumes import RESUMES_PATH, iter_resume_records, record_to_text
+from model.encoders import DEFAULT_MODEL_NAME, get_encoder
+from model.job_repository import JobRepository
+from model.texts import vacancy_to_text
+
+
+BACKENDS: Dict[str, Tuple[str, bool]] = {
+    "torch": ("torch", False),
+    "onnx": ("onnx", False),
+    "onnx-int8": ("onnx", True),
+}
+DEFAULT_TOLERANCES = {"onnx": 1e-3, "onnx-int8": 0.05}
+
+
+def load_texts(resumes_path: Path, max_vacancies: int) -> Tuple[List[str], List[str]]:
+    resumes = [record_to_text(record) for record in iter_resume_records(resumes_path)]
+    vacancies = JobRepository().all()[:max_vacancies]
+    return resumes, [vacancy_to_text(v) for v in vacancies]
+
+
+def benchmark_backend(
+    name: str,
+    model_name: str,
+    resumes: List[str],
+    vacancies: List[str],
+    latency_runs: int,
+) -> Dict:
+    backend, quantize = BACKENDS[name]
+    started = time.perf_counter()
+    encoder = get_encoder(model_name, backend=backend, quantize=quantize)
+    encoder.encode(["прогрев"], show_progress_bar=False)
+    load_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    vacancy_embeddings = encoder.encode(
+        vacancies, batch_size=32, show_progress_bar=False, normalize_embeddings=True
+    )
+    corpus_seconds = time.perf_counter() - started
+
+    latencies = []
+    for run in range(latency_runs):
+        text = resumes[run % len(resumes)]
+        started = time.perf_counter()
+        encoder.encode(text, show_progress_bar=False)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+
+    resume_embeddings = encoder.encode(
+        resumes, show_progress_bar=False, normalize_embeddings=True
+    )
+    return {
+        "name": name,
+        "load_s": load_seconds,
+        "texts_per_s": len(vacancies) / corpus_seconds if corpus_seconds else float("inf"),
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))],
+        "scores": np.asarray(resume_embeddings) @ np.asarray(vacancy_embeddings).T,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Encoder backend parity and speed check")
+    parser.add_argument("--backends", default="torch,onnx,onnx-int8")
+    parser.add_argument("--model", default=DEFAULT_MODEL_NAME)
+    parser.add_argument("--resumes", default=str(RESUMES_PATH))
+    parser.add_argument("--max-vacancies", type=int, default=500)
+    parser.add_argument("--latency-runs", type=int, default=50)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=None,
+        help="Max allowed |cos_backend - cos_torch|; defaults depend on the backend",
+    )
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.backends.split(",") if name.strip()]
+    unknown = [name for name in names if name not in BACKENDS]
+    if unknown:
+        parser.error(f"Unknown backends: {', '.join(unknown)}")
+    if "torch" not in names:
+        names.insert(0, "torch")
+
+    resumes, vacancies = load_texts(Path(args.resumes), args.max_vacancies)
+    print(f"{len(resumes)} résumés × {len(vacancies)} vacancies, model {args.model}")
+
+    results = [
+        benchmark_backend(name, args.model, resumes, vacancies, args.latency_runs)
+        for name in names
+    ]
+    reference = results[0]["scores"]
+
+    failed = False
+    print(f"{'backend':<10} {'load s':>8} {'texts/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'max Δcos':>9} {'top10 ∩':>8}")
+    for result in results:
+        delta = float(np.abs(result["scores"] - reference).max()) if reference.size else 0.0
+        k = min(10, reference.shape[1])
+        ref_top = np.argsort(-reference, axis=1)[:, :k]
+        top = np.argsort(-result["scores"], axis=1)[:, :k]
+        overlap = np.mean([len(set(a) & set(b)) / k for a, b in zip(ref_top, top)]) if k else 1.0
+        tolerance = args.tolerance if args.tolerance is not None else DEFAULT_TOLERANCES.get(result["name"], 0.0)
+        status = "" if delta <= tolerance else "  FAIL"
+        failed = failed or bool(status)
+        print(
+            f"{result['name']:<10} {result['load_s']:>8.2f} {result['texts_per_s']:>9.1f} "
+            f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {delta:>9.4f} {overlap:>8.2f}{status}"
+        )
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Peak RSS for this run: {peak_mb:.0f} MB (run a single backend to compare footprints)")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Check that skill extraction latency stays flat as the skill taxonomy grows.
+
+Usage::
+
+    python -m scripts.benchmark_skills --sizes 100,1000,5000,15000
+    python -m scripts.benchmark_skills --taxonomy esco/skills_ru.csv --sizes 1000,5000,14000
+    python -m scripts.benchmark_skills --parity
+
+For each size the curated skills are extended with rows of ``--taxonomy``
+(an ESCO export or a ``label,aliases`` CSV) and, once those run out, with
+synthetic distractor labels. ``SkillQualityClassifier.predict``
+is timed on the bundled résumés with the prebuilt ``SkillIndex`` and with a
+full scan over all label embeddings (what the classifier did before the
+index); ``recall`` is the share of full-scan embedding hits on real
+(curated or ``--taxonomy``) labels the index still finds.
+
+``--parity`` instead checks that, with the curated taxonomy only, predictions
+on the bundled résumés are identical to the pre-index classifier's: every
+label scored against every chunk, keeping its best chunk.
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from data.resumes import LABELLED_RESUMES_PATH, RESUMES_PATH, iter_resume_records, record_to_text
+from model.encoders import DEFAULT_MODEL_NAME
+from model.skill_classifier import SkillQualityClassifier, SkillQualityPrediction
+from model.skill_index import DEFAULT_SKILL_INDEX_DIR, SkillIndex
+from model.skill_taxonomy import Skill, Taxonomy, builtin_skills
+
+SYNTHETIC_PREFIX = "synthetic skill"
+
+
+def grow_taxonomy(size: int, external: Optional[Taxonomy]) -> Taxonomy:
+    taxonomy = builtin_skills()
+    for skill in external.skills if external is not None else ():
+        if len(taxonomy) >= size:
+            break
+        taxonomy.add(skill)
+    while len(taxonomy) < size:
+        taxonomy.add(Skill(f"{SYNTHETIC_PREFIX} {len(taxonomy):06d}"))
+    return taxonomy
+
+
+def time_predict(classifier: SkillQualityClassifier, texts: List[str], runs: int) -> Dict:
+    latencies = []
+    predictions = []
+    for run in range(runs):
+        text = texts[run % len(texts)]
+        started = time.perf_counter()
+        prediction = classifier.predict(text)
+        latencies.append((time.perf_counter() - started) * 1000)
+        if run < len(texts):
+            predictions.append(
+                {
+                    label
+                    for label, score in prediction.confidences.items()
+                    if score < 1.0 and not label.startswith(SYNTHETIC_PREFIX)
+                }
+            )
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))],
+        "hits": predictions,
+    }
+
+
+def full_scan_predict(
+    classifier: SkillQualityClassifier,
+    text: str,
+    skill_threshold: float = 0.38,
+    quality_threshold: float = 0.35,
+) -> SkillQualityPrediction:
+    """The pre-index classifier: one class x chunk matmul, best chunk per class."""
+    chunks = classifier._chunk_text(text)
+    if not chunks:
+        return SkillQualityPrediction(skills=[], qualities=[])
+    chunk_embeddings = np.asarray(
+        classifier.encoder.encode(chunks, show_progress_bar=False, normalize_embeddings=True),
+        dtype=np.float32,
+    )
+    confidences: Dict[str, float] = {}
+    evidence: Dict[str, str] = {}
+    for labels, index, threshold in (
+        (classifier.skill_classes, classifier.skill_index, skill_threshold),
+        (classifier.quality_classes, classifier.quality_index, quality_threshold),
+    ):
+        scores = index.embeddings @ chunk_embeddings.T
+        best_chunk = scores.argmax(axis=1)
+        best_score = scores[np.arange(len(scores)), best_chunk]
+        for idx in np.flatnonzero(best_score >= threshold):
+            confidences[labels[idx]] = float(best_score[idx])
+            evidence[labels[idx]] = chunks[best_chunk[idx]]
+    return classifier._merge_keywords(text, chunks, confidences, evidence)
+
+
+def check_parity(classifier: SkillQualityClassifier, texts: List[str]) -> int:
+    """Print résumés whose prediction differs from ``full_scan_predict``; returns their number."""
+    mismatches = 0
+    for position, (text, prediction) in enumerate(zip(texts, classifier.predict_batch(texts))):
+        expected = full_scan_predict(classifier, text)
+        same = (
+            prediction.skills == expected.skills
+            and prediction.qualities == expected.qualities
+            and prediction.evidence == expected.evidence
+            and all(abs(prediction.confidences[label] - score) < 1e-5 for label, score in expected.confidences.items())
+        )
+        if not same:
+            mismatches += 1
+            print(f"résumé {position}: skills {prediction.skills} vs {expected.skills}, "
+                  f"qualities {prediction.qualities} vs {expected.qualities}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Skill classifier latency vs taxonomy size")
+    parser.add_argument("--sizes", default="100,1000,5000,15000")
+    parser.add_argument("--taxonomy", default=None, help="External taxonomy CSV used before synthetic labels")
+    parser.add_argument("--model", default=DEFAULT_MODEL_NAME)
+    parser.add_argument("--resumes", default=str(LABELLED_RESUMES_PATH))
+    parser.add_argument("--index-dir", default=str(DEFAULT_SKILL_INDEX_DIR), help="Where built indexes are cached")
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--no-scan", action="store_true", help="Skip the full-scan baseline")
+    parser.add_argument("--parity", action="store_true", help="Compare with the pre-index classifier and exit")
+    args = parser.parse_args()
+
+    if args.parity:
+        texts = [
+            record_to_text(record)
+            for path in (RESUMES_PATH, LABELLED_RESUMES_PATH)
+            for record in iter_resume_records(path)
+        ]
+        classifier = SkillQualityClassifier(args.model, skills=builtin_skills(), index_dir=None)
+        mismatches = check_parity(classifier, texts)
+        print(f"parity: {len(texts) - mismatches}/{len(texts)} résumés identical to the full scan")
+        sys.exit(1 if mismatches else 0)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    texts = [record_to_text(record) for record in iter_resume_records(Path(args.resumes))]
+    external = Taxonomy.from_csv(Path(args.taxonomy)) if args.taxonomy else None
+    print(f"{len(texts)} résumés, model {args.model}" + (f", {len(external)} labels in {args.taxonomy}" if external else ""))
+    print(f"{'labels':>7} {'index':>6} {'build s':>8} {'p50 ms':>8} {'p95 ms':>8} {'scan p50':>9} {'scan p95':>9} {'recall':>7}")
+
+    for size in sizes:
+        taxonomy = grow_taxonomy(size, external)
+        started = time.perf_counter()
+        classifier = SkillQualityClassifier(args.model, skills=taxonomy, index_dir=Path(args.index_dir))
+        build_seconds = time.perf_counter() - started
+        classifier.predict(texts[0])
+        indexed = time_predict(classifier, texts, args.runs)
+        kind = "exact" if classifier.skill_index.exact else "ivf"
+        line = (
+            f"{len(taxonomy):>7} {kind:>6} {build_seconds:>8.1f} "
+            f"{indexed['p50_ms']:>8.1f} {indexed['p95_ms']:>8.1f}"
+        )
+        if not args.no_scan:
+            classifier.skill_index = SkillIndex(classifier.skill_index.embeddings)
+            scanned = time_predict(classifier, texts, args.runs)
+            expected = sum(len(hits) for hits in scanned["hits"])
+            found = sum(len(a & b) for a, b in zip(indexed["hits"], scanned["hits"]))
+            recall = found / expected if expected else 1.0
+            line += f" {scanned['p50_ms']:>9.1f} {scanned['p95_ms']:>9.1f} {recall:>7.2f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Prebuild vacancy embeddings into ``data/embeddings/`` for ``JobMatcher``.
+
+Usage::
+
+    python -m scripts.build_index --workers 4 --threads-per-worker 2
+    python -m scripts.build_index --in-memory
+
+By default vacancies are streamed from one database snapshot in batches of
+``--read-batch`` rows; each batch is length-sorted, encoded across a process
+pool with a fixed thread count per worker, and written straight into the
+preallocated on-disk matrix, so peak memory does not grow with the catalog.
+``--in-memory`` loads the whole catalog and length-sorts it globally, which
+pads a little less and suits small catalogs. ``JobMatcher`` picks the result
+up on start and only encodes vacancies that are new or whose text changed.
+
+``--skills`` instead prebuilds the skill index (curated skills plus the
+``SKILL_TAXONOMY`` file) into ``data/skill_index/`` for ``SkillQualityClassifier``.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import resource
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+from data.database import DEFAULT_DB_PATH, JobDatabase
+from model.embedding_store import DEFAULT_EMBEDDINGS_DIR, EmbeddingStore
+from model.encoders import DEFAULT_MODEL_NAME
+from model.index_builder import build_corpus_index, stream_corpus_index
+
+
+def print_progress(done: int, total: int, elapsed: float) -> None:
+    rate = done / elapsed if elapsed else 0.0
+    sys.stdout.write(f"\r{done}/{total} texts · {rate:.1f} texts/s")
+    sys.stdout.flush()
+
+
+def build_skill_index(model_name: str, backend: Optional[str]) -> None:
+    from model.encoders import get_encoder
+    from model.skill_index import index_path, load_or_build_index
+    from model.skill_taxonomy import SKILL_TAXONOMY, load_skills
+
+    taxonomy = load_skills()
+    started = time.perf_counter()
+    index = load_or_build_index(taxonomy, get_encoder(model_name, backend=backend), model_name)
+    layout = "exact scan" if index.exact else f"{index.head} exact rows + {len(index.centroids)} lists"
+    print(
+        f"{len(taxonomy)} skills ({SKILL_TAXONOMY or 'curated only'}) -> "
+        f"{index_path(model_name, taxonomy)} ({layout}) in {time.perf_counter() - started:.1f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the vacancy embedding index")
+    parser.add_argument("--db", default=str(DEFAULT_DB_PATH), help="Path to SQLite database")
+    parser.add_argument("--out", default=str(DEFAULT_EMBEDDINGS_DIR), help="Embedding store directory")
+    parser.add_argument("--model", default=DEFAULT_MODEL_NAME)
+    parser.add_argument("--backend", choices=["torch", "onnx"], default=None)
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--threads-per-worker", type=int, default=2)
+    parser.add_argument("--bucket-size", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--read-batch", type=int, default=2048, help="Rows read and sorted per step when streaming")
+    parser.add_argument("--in-memory", action="store_true", help="Load the whole catalog and sort it globally")
+    parser.add_argument("--skills", action="store_true", help="Build the skill taxonomy index instead")
+    args = parser.parse_args()
+
+    if args.skills:
+        build_skill_index(args.model, args.backend)
+        return
+
+    # Imported here so spawned workers re-importing this module stay light.
+    from model.job_repository import JobRepository
+    from model.texts import vacancy_to_text
+
+    repository = JobRepository(JobDatabase(Path(args.db)))
+    store = EmbeddingStore(args.model, Path(args.out), backend=args.backend)
+    options = dict(
+        model_name=args.model,
+        backend=args.backend,
+        workers=args.workers,
+        threads_per_worker=args.threads_per_worker,
+        batch_size=args.batch_size,
+        progress=print_progress,
+    )
+    if args.in_memory:
+        vacancies = repository.all()
+        ids = [v.id for v in vacancies]
+        texts = [vacancy_to_text(v) for v in vacancies]
+        report = build_corpus_index(ids, texts, store, bucket_size=args.bucket_size, **options)
+    else:
+        with repository.live_batches(args.read_batch) as (total, batches):
+            pairs = ([(v.id, vacancy_to_text(v)) for v in batch] for batch in batches)
+            report = stream_corpus_index(total, pairs, store, **options)
+    print()
+    print(
+        f"Encoded {report.texts} vacancies in {report.seconds:.1f}s "
+        f"({report.texts_per_second:.1f} texts/s) with {args.workers} worker(s) × "
+        f"{args.threads_per_worker} thread(s)"
+    )
+    print(
+        f"Padding efficiency: {report.padding_efficiency:.0%} length-sorted "
+        f"vs {report.unsorted_padding_efficiency:.0%} in catalog order"
+    )
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Peak RSS of the build process: {peak_mb:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
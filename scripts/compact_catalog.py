@@ -0,0 +1,61 @@
+"""Archive closed and expired vacancies and shrink the embedding index to the live set.
+
+Usage::
+
+    python -m scripts.compact_catalog --ttl-days 30
+
+Vacancies marked ``closed`` by their source, or not seen by any ingest for
+``--ttl-days``, move from ``vacancies`` to ``vacancies_archive`` (where
+favourites still resolve them). The prebuilt embedding matrix is then
+rewritten with only the live rows, so the bot's hot catalog stays bounded.
+Run it from cron before restarting the bot.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+from pathlib import Path
+
+from data.database import DEFAULT_DB_PATH, JobDatabase
+from model.embedding_store import DEFAULT_EMBEDDINGS_DIR, EmbeddingStore
+from model.encoders import DEFAULT_MODEL_NAME
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive stale vacancies and compact the index")
+    parser.add_argument("--db", default=str(DEFAULT_DB_PATH), help="Path to SQLite database")
+    parser.add_argument("--embeddings", default=str(DEFAULT_EMBEDDINGS_DIR), help="Embedding store directory")
+    parser.add_argument("--model", default=DEFAULT_MODEL_NAME)
+    parser.add_argument(
+        "--ttl-days",
+        type=float,
+        default=float(os.getenv("VACANCY_TTL_DAYS", "30")),
+        help="Archive vacancies no ingest has seen for this many days (0 archives only closed ones)",
+    )
+    args = parser.parse_args()
+
+    database = JobDatabase(Path(args.db))
+    archived = database.archive_stale(args.ttl_days or None)
+    live_ids = database.live_ids()
+    print(
+        f"Archived {archived.get('expired', 0)} expired and {archived.get('closed', 0)} closed "
+        f"vacancies; {len(live_ids)} live"
+    )
+
+    store = EmbeddingStore(args.model, Path(args.embeddings))
+    dropped = store.compact(live_ids)
+    if dropped is None:
+        print("No embedding index found; run `python -m scripts.build_index` to create one")
+        return
+    loaded = store.load()
+    indexed = len(loaded[0]) if loaded else 0
+    print(f"Embedding index: dropped {dropped} rows, kept {indexed}")
+    if indexed < len(live_ids):
+        print(
+            f"{len(live_ids) - indexed} live vacancies are not indexed yet; the matcher "
+            "encodes them on start, or rerun `python -m scripts.build_index`"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Compare "full" and "fast" résumé extraction on a labelled set.
+
+Usage::
+
+    python -m scripts.eval_extraction
+    python -m scripts.eval_extraction --dataset data/resumes.json --limit 200
+
+Reports per-field agreement with the labels, per-résumé latency, and for
+each tier (rules, ner, embeddings) how often it ran and how much time the
+fast mode saved against the full pipeline. Records either carry explicit
+``labels`` (``data/resumes_labelled.jsonl``) or are structured résumés
+whose fields serve as labels.
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from data.gazetteer import normalize_city
+from data.resumes import LABELLED_RESUMES_PATH, iter_resume_records, record_labels, record_to_text
+from model.main import EXTRACTION_MODES, ExtractionTrace, ResumeExtractor, ResumeProfile
+
+FIELDS = ("name", "age", "city", "salary_expectations", "work_format", "skills")
+TIERS = ("rules", "ner", "embeddings")
+
+
+def _fold(value: Optional[str]) -> str:
+    return " ".join((value or "").lower().replace("ё", "е").split())
+
+
+def field_agreement(field: str, predicted: Any, gold: Any) -> float:
+    """1.0/0.0 per field; skills score the share of gold skills that were found."""
+    if field == "skills":
+        if not gold:
+            return 1.0
+        found = {_fold(skill) for skill in predicted}
+        return sum(_fold(skill) in found for skill in gold) / len(gold)
+    if field == "name":
+        expected = _fold(gold) if gold else _fold("Не указано")
+        return float(_fold(predicted) == expected)
+    if field == "city":
+        return float(normalize_city(predicted) == normalize_city(gold))
+    return float(predicted == gold)
+
+
+def evaluate_mode(
+    extractor: ResumeExtractor, mode: str, samples: List[Tuple[str, Dict]]
+) -> Dict:
+    extractor.parse(samples[0][0], mode=mode)  # warm-up: model loading is not latency
+    agreement = {field: [] for field in FIELDS}
+    latencies: List[float] = []
+    tier_seconds = {tier: 0.0 for tier in TIERS}
+    tier_runs = {tier: 0 for tier in TIERS}
+    for text, labels in samples:
+        trace = ExtractionTrace()
+        started = time.perf_counter()
+        profile: ResumeProfile = extractor.parse(text, mode=mode, trace=trace)
+        latencies.append(time.perf_counter() - started)
+        for field in FIELDS:
+            agreement[field].append(field_agreement(field, getattr(profile, field), labels.get(field)))
+        for tier, seconds in trace.seconds.items():
+            tier_seconds[tier] += seconds
+            tier_runs[tier] += 1
+    latencies.sort()
+    return {
+        "agreement": {field: statistics.mean(values) for field, values in agreement.items()},
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+        "tier_ms": {tier: tier_seconds[tier] / len(samples) * 1000 for tier in TIERS},
+        "tier_rate": {tier: tier_runs[tier] / len(samples) for tier in TIERS},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate tiered résumé extraction")
+    parser.add_argument("--dataset", default=str(LABELLED_RESUMES_PATH))
+    parser.add_argument("--limit", type=int, default=None, help="Evaluate only the first N records")
+    parser.add_argument("--modes", default=",".join(EXTRACTION_MODES))
+    args = parser.parse_args()
+
+    records = islice(iter_resume_records(Path(args.dataset)), args.limit)
+    samples = [(record_to_text(record), record_labels(record)) for record in records]
+    if not samples:
+        raise SystemExit(f"No records in {args.dataset}")
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    extractor = ResumeExtractor()
+    results = {mode: evaluate_mode(extractor, mode, samples) for mode in modes}
+
+    print(f"{len(samples)} résumés from {args.dataset}\n")
+    print(f"{'field':<22}" + "".join(f"{mode:>10}" for mode in modes))
+    for field in FIELDS:
+        print(f"{field:<22}" + "".join(f"{results[m]['agreement'][field]:>10.1%}" for m in modes))
+    print(f"{'latency mean, ms':<22}" + "".join(f"{results[m]['mean_ms']:>10.1f}" for m in modes))
+    print(f"{'latency p95, ms':<22}" + "".join(f"{results[m]['p95_ms']:>10.1f}" for m in modes))
+
+    print("\ntier         " + "".join(f"{mode + ' ms':>12}{mode + ' ran':>12}" for mode in modes))
+    for tier in TIERS:
+        print(
+            f"{tier:<13}"
+            + "".join(
+                f"{results[m]['tier_ms'][tier]:>12.1f}{results[m]['tier_rate'][tier]:>12.0%}"
+                for m in modes
+            )
+        )
+    if {"full", "fast"} <= set(results):
+        saved = {
+            tier: results["full"]["tier_ms"][tier] - results["fast"]["tier_ms"][tier]
+            for tier in TIERS
+        }
+        total = results["full"]["mean_ms"] - results["fast"]["mean_ms"]
+        print(
+            f"\nfast saves {total:.1f} ms/résumé: "
+            + ", ".join(f"{tier} {ms:+.1f} ms" for tier, ms in saved.items())
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Parse a cohort of résumés in bulk into profiles and profile embeddings.
+
+Usage::
+
+    python -m scripts.import_resumes --input data/resumes.json --out data/profiles.jsonl --workers 4
+    python -m scripts.import_resumes --input cohort.jsonl --storage
+
+Résumés are streamed from a JSON array or JSONL file (see ``data/resumes.py``)
+and parsed across a process pool; each worker loads Natasha, the skill
+classifier and the encoder once. Results go to a JSONL file or straight into
+``UserStorage`` keyed by the résumé id. Processed ids are checkpointed, so
+rerunning the same command after an interruption continues where it stopped.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+from typing import List
+
+from data.resumes import RESUMES_PATH, iter_resume_records, record_id, record_to_text
+from model.encoders import DEFAULT_MODEL_NAME
+from model.main import EXTRACTION_MODES, ResumeProfile
+from model.resume_batch import Checkpoint, JsonlProfileSink, ParsedResume, process_resumes
+
+
+class UserStorageSink:
+    def __init__(self, path: Path):
+        from backend.storage import UserStorage
+
+        self.storage = UserStorage(path)
+
+    def write(self, parsed: List[ParsedResume]) -> None:
+        self.storage.save_profiles(
+            {resume_id: ResumeProfile(**profile) for resume_id, profile, _ in parsed},
+            {resume_id: embedding for resume_id, _, embedding in parsed},
+        )
+
+
+def print_progress(done: int, elapsed: float) -> None:
+    rate = done / elapsed if elapsed else 0.0
+    sys.stdout.write(f"\r{done} résumés · {rate:.1f} résumés/s")
+    sys.stdout.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-parse résumés into profiles")
+    parser.add_argument("--input", default=str(RESUMES_PATH), help="JSON array or JSONL of résumés")
+    parser.add_argument("--out", default="data/profiles.jsonl", help="JSONL output (ignored with --storage)")
+    parser.add_argument("--storage", action="store_true", help="Write into UserStorage instead of JSONL")
+    parser.add_argument("--state", default=None, help="UserStorage file (default: data/user_state.json)")
+    parser.add_argument("--checkpoint", default=None, help="Processed-ids file (default: <output>.done)")
+    parser.add_argument("--mode", choices=EXTRACTION_MODES, default=None)
+    parser.add_argument("--model", default=DEFAULT_MODEL_NAME)
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=16)
+    args = parser.parse_args()
+
+    if args.storage:
+        from backend.storage import STATE_PATH
+
+        output = Path(args.state) if args.state else STATE_PATH
+        sink = UserStorageSink(output)
+    else:
+        output = Path(args.out)
+        sink = JsonlProfileSink(output)
+    checkpoint_path = Path(args.checkpoint) if args.checkpoint else output.with_name(output.name + ".done")
+    checkpoint = Checkpoint(checkpoint_path)
+
+    resumes = (
+        (record_id(record, position), record_to_text(record))
+        for position, record in enumerate(iter_resume_records(Path(args.input)))
+    )
+    report = process_resumes(
+        resumes,
+        sink,
+        checkpoint=checkpoint,
+        mode=args.mode,
+        model_name=args.model,
+        workers=args.workers,
+        threads_per_worker=args.threads_per_worker,
+        chunk_size=args.chunk_size,
+        progress=print_progress,
+    )
+    print()
+    print(
+        f"Parsed {report.processed} résumés in {report.seconds:.1f}s "
+        f"({report.resumes_per_second:.1f} résumés/s) with {args.workers} worker(s); "
+        f"skipped {report.skipped} already checkpointed, {report.failed} failed"
+    )
+    print(f"Output: {output} · checkpoint: {checkpoint.path}")
+
+
+if __name__ == "__main__":
+    main()
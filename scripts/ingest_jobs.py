@@ -0,0 +1,132 @@
+"""Fetch vacancies from hh.ru, Habr Career and Telegram into the SQLite catalog.
+
+Usage::
+
+    python -m scripts.ingest_jobs --sources hh,habr --pages 2 --query "junior developer"
+    python -m scripts.ingest_jobs --sources telegram --telegram-api-id ... \\
+        --telegram-api-hash ... --telegram-channels "@it_jobs,@ml_jobs"
+    python -m scripts.ingest_jobs --sources hh --stub
+
+All sources run concurrently over one pooled HTTP session, each within its
+own concurrency and rate limit; pages are deduplicated and upserted in
+batches as they arrive. ``--stub`` starts the local hh.ru stub with the
+recorded pages in ``data/fixtures/hh`` and ingests from it, which checks the
+whole pipeline without network access (pair it with ``--db`` to keep the
+real catalog untouched). Rows whose content hash is unchanged are not
+rewritten, so re-running over a mostly unchanged feed is cheap; a running
+bot picks up the rest within ``CATALOG_SYNC_SECONDS``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+from pathlib import Path
+from typing import List
+
+from data.database import DEFAULT_DB_PATH, JobDatabase
+from ingestion.base import SourceAdapter, ingest
+from ingestion.habr import HABR_URL, HabrSource
+from ingestion.hh import HH_API_URL, HHSource
+from ingestion.stub_server import start_stub_server
+from ingestion.telegram import TelegramSource
+
+SOURCES = ("hh", "habr", "telegram")
+
+
+def build_sources(args: argparse.Namespace, hh_url: str) -> List[SourceAdapter]:
+    names = [name.strip() for name in args.sources.split(",") if name.strip()]
+    unknown = set(names) - set(SOURCES)
+    if unknown:
+        raise SystemExit(f"Unknown sources: {', '.join(sorted(unknown))}")
+    sources: List[SourceAdapter] = []
+    if "hh" in names:
+        sources.append(
+            HHSource(
+                args.query,
+                area=args.hh_area,
+                max_pages=args.pages,
+                per_page=args.per_page,
+                base_url=hh_url,
+                concurrency=args.concurrency,
+                rate=args.rate,
+            )
+        )
+    if "habr" in names:
+        sources.append(HabrSource(args.query, max_pages=args.pages, base_url=args.habr_url))
+    if "telegram" in names:
+        if not (args.telegram_api_id and args.telegram_api_hash and args.telegram_channels):
+            raise SystemExit("telegram needs --telegram-api-id, --telegram-api-hash and --telegram-channels")
+        sources.append(
+            TelegramSource(
+                int(args.telegram_api_id),
+                args.telegram_api_hash,
+                [channel.strip() for channel in args.telegram_channels.split(",") if channel.strip()],
+                limit=args.telegram_limit,
+            )
+        )
+    return sources
+
+
+async def run(args: argparse.Namespace) -> None:
+    runner = None
+    hh_url = args.hh_url
+    if args.stub:
+        runner, hh_url = await start_stub_server(flaky_every=args.stub_flaky_every)
+        print(f"Using the hh.ru stub at {hh_url}")
+    try:
+        sources = build_sources(args, hh_url)
+        report = await ingest(
+            sources,
+            JobDatabase(Path(args.db)),
+            batch_size=args.batch_size,
+            connections=args.connections,
+            dedup=not args.no_dedup,
+        )
+    finally:
+        if runner is not None:
+            await runner.cleanup()
+
+    for source in sources:
+        status = f"failed: {report.errors[source.name]}" if source.name in report.errors else "ok"
+        print(
+            f"{source.name:<9} {report.fetched[source.name]:>6} vacancies, "
+            f"{report.requests[source.name]:>4} requests, {status}"
+        )
+    changes = report.changes
+    print(
+        f"{len(changes.inserted)} new, {len(changes.updated)} updated, {len(changes.unchanged)} unchanged "
+        f"vacancies in {args.db} ({report.duplicates} near-duplicates collapsed) in {report.seconds:.1f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest vacancies from external sources")
+    parser.add_argument("--sources", default="hh", help=f"Comma-separated subset of {', '.join(SOURCES)}")
+    parser.add_argument("--query", default="junior", help="Search text for hh.ru and Habr Career")
+    parser.add_argument("--pages", type=int, default=2, help="Pages per source")
+    parser.add_argument("--per-page", type=int, default=100, help="hh.ru results per page (max 100)")
+    parser.add_argument("--hh-area", default=None, help="hh.ru area id, e.g. 1 for Moscow")
+    parser.add_argument("--hh-url", default=HH_API_URL)
+    parser.add_argument("--habr-url", default=HABR_URL)
+    parser.add_argument("--concurrency", type=int, default=4, help="Parallel hh.ru requests")
+    parser.add_argument("--rate", type=float, default=5.0, help="hh.ru requests per second")
+    parser.add_argument("--connections", type=int, default=20, help="HTTP connection pool size")
+    parser.add_argument("--batch-size", type=int, default=200, help="Rows per database upsert")
+    parser.add_argument("--no-dedup", action="store_true", help="Skip near-duplicate collapsing")
+    parser.add_argument("--db", default=str(DEFAULT_DB_PATH), help="Path to SQLite database")
+    parser.add_argument("--telegram-api-id", default=os.getenv("TELEGRAM_API_ID"))
+    parser.add_argument("--telegram-api-hash", default=os.getenv("TELEGRAM_API_HASH"))
+    parser.add_argument("--telegram-channels", default=os.getenv("TELEGRAM_CHANNELS"))
+    parser.add_argument("--telegram-limit", type=int, default=200, help="Recent posts per channel")
+    parser.add_argument("--stub", action="store_true", help="Ingest hh.ru from the local recorded-page stub")
+    parser.add_argument("--stub-flaky-every", type=int, default=0, help="Stub answers every K-th request with 429")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
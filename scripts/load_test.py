@@ -0,0 +1,277 @@
+"""Load-test the bot's handlers with simulated users against a fake Bot API.
+
+Usage::
+
+    python -m scripts.load_test --users 1,10,50 --rounds 3
+    python -m scripts.load_test --users 100 --api-latency 0.1 --telegram-limits
+    python -m scripts.load_test --users 20 --profile 1.0
+
+Builds a ``Dispatcher`` with the bot's ``register_handlers`` and feeds synthetic
+``Update`` objects through ``feed_update``: each simulated user opens the
+bot, uploads a résumé, then repeatedly asks for recommendations, likes,
+dislikes and stars vacancies and lists favourites. Bot API calls go to
+``FakeBotSession`` with ``--api-latency`` seconds of latency. For every user
+count the script reports throughput, per-handler latency percentiles,
+event-loop lag (how late a 50 ms timer fires while the load runs) and which
+latency-budget tier (``backend/scheduler.py``) served each /recommend.
+
+User state goes to a temporary file, never to ``data/user_state.json``.
+Delivery rate limits are lifted unless ``--telegram-limits`` is given, so
+the numbers show what the process itself sustains. ``--profile`` runs the
+operator profiler over the whole run and prints the per-stage breakdown.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import random
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.default import DefaultBotProperties
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.enums import ParseMode
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import Update
+
+from backend.fake_session import FakeBotSession
+from backend.metrics import metrics
+from backend.profiling import ProfilingSession
+from data.resumes import LABELLED_RESUMES_PATH, iter_resume_records, record_to_text
+
+LAG_INTERVAL = 0.05
+HANDLERS = ("start", "ask_resume", "resume", "recommend", "like", "dislike", "favorite", "favorites")
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+class LoadStats:
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.unhandled: Dict[str, int] = defaultdict(int)
+        self.loop_lag: List[float] = []
+
+    @property
+    def updates(self) -> int:
+        return sum(len(values) for values in self.latencies.values())
+
+
+class SimulatedUser:
+    """Sends one user's updates in sequence, as a real chat would."""
+
+    def __init__(self, dp: Dispatcher, bot: Bot, user_id: int, update_ids: itertools.count, stats: LoadStats):
+        self.dp = dp
+        self.bot = bot
+        self.user_id = user_id
+        self.update_ids = update_ids
+        self.stats = stats
+        self.user = {"id": user_id, "is_bot": False, "first_name": f"Load{user_id}"}
+
+    def _message(self, update_id: int, text: str) -> Dict:
+        return {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": self.user_id, "type": "private"},
+            "from": self.user,
+            "text": text,
+        }
+
+    async def _feed(self, handler: str, payload: Dict) -> None:
+        update = Update.model_validate(payload, context={"bot": self.bot})
+        started = time.perf_counter()
+        try:
+            response = await self.dp.feed_update(self.bot, update)
+        except Exception:
+            self.stats.errors[handler] += 1
+            return
+        self.stats.latencies[handler].append(time.perf_counter() - started)
+        if response is UNHANDLED:
+            self.stats.unhandled[handler] += 1
+
+    async def send(self, handler: str, text: str) -> None:
+        update_id = next(self.update_ids)
+        await self._feed(handler, {"update_id": update_id, "message": self._message(update_id, text)})
+
+    async def click(self, handler: str, data: str) -> None:
+        update_id = next(self.update_ids)
+        message = {**self._message(update_id, "…"), "from": {"id": 42, "is_bot": True, "first_name": "FakeBot"}}
+        callback = {"id": str(update_id), "from": self.user, "chat_instance": str(self.user_id), "data": data, "message": message}
+        await self._feed(handler, {"update_id": update_id, "callback_query": callback})
+
+    async def run(self, resume: str, vacancy_ids: Sequence[str], rounds: int, think: float) -> None:
+        rng = random.Random(self.user_id)
+
+        async def pause() -> None:
+            await asyncio.sleep(rng.uniform(0, 2 * think) if think else 0)
+
+        await pause()
+        await self.send("start", "/start")
+        await self.send("ask_resume", "Отправить резюме")
+        await self.send("resume", resume)
+        for _ in range(rounds):
+            await pause()
+            await self.send("recommend", "/recommend")
+            for handler in ("like", "dislike", "favorite"):
+                await pause()
+                await self.click(handler, f"jm_{handler}:{rng.choice(vacancy_ids)}")
+            await pause()
+            await self.send("favorites", "/favorites")
+
+
+async def monitor_loop_lag(samples: List[float], stop: asyncio.Event) -> None:
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(LAG_INTERVAL)
+        samples.append(max(0.0, loop.time() - started - LAG_INTERVAL))
+
+
+async def run_level(
+    dp: Dispatcher,
+    bot: Bot,
+    users: int,
+    first_user_id: int,
+    resumes: Sequence[str],
+    vacancy_ids: Sequence[str],
+    rounds: int,
+    think: float,
+) -> Dict:
+    session: FakeBotSession = bot.session
+    session.calls.clear()
+    stats = LoadStats()
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(monitor_loop_lag(stats.loop_lag, stop))
+    update_ids = itertools.count(1)
+    tiers_before = metrics.snapshot().get("recommendation_tier", {})
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(
+            SimulatedUser(dp, bot, first_user_id + i, update_ids, stats).run(
+                resumes[i % len(resumes)], vacancy_ids, rounds, think
+            )
+            for i in range(users)
+        )
+    )
+    seconds = time.perf_counter() - started
+    stop.set()
+    await monitor
+    tiers = {
+        label.split("=", 1)[1]: count - tiers_before.get(label, 0)
+        for label, count in metrics.snapshot().get("recommendation_tier", {}).items()
+    }
+    return {
+        "users": users,
+        "seconds": seconds,
+        "api_calls": len(session.calls),
+        "stats": stats,
+        "tiers": {tier: count for tier, count in tiers.items() if count},
+    }
+
+
+def print_level(result: Dict) -> None:
+    stats: LoadStats = result["stats"]
+    seconds = result["seconds"]
+    print(
+        f"\n{result['users']} users: {stats.updates} updates in {seconds:.1f}s, "
+        f"{stats.updates / seconds:.1f} updates/s, {result['api_calls'] / seconds:.1f} API calls/s"
+    )
+    print(
+        f"event-loop lag: p50 {percentile(stats.loop_lag, 0.5) * 1000:.1f} ms, "
+        f"p99 {percentile(stats.loop_lag, 0.99) * 1000:.1f} ms, "
+        f"max {max(stats.loop_lag, default=0.0) * 1000:.1f} ms"
+    )
+    if result["tiers"]:
+        print("recommend tiers: " + ", ".join(f"{tier} {count}" for tier, count in sorted(result["tiers"].items())))
+    print(f"{'handler':<12}{'n':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}{'unhandled':>11}")
+    for handler in HANDLERS:
+        values = stats.latencies.get(handler, [])
+        if not values and not stats.errors.get(handler):
+            continue
+        print(
+            f"{handler:<12}{len(values):>7}"
+            + "".join(f"{percentile(values, q) * 1000:>10.1f}" for q in (0.5, 0.95, 0.99))
+            + f"{stats.errors.get(handler, 0):>8}{stats.unhandled.get(handler, 0):>11}"
+        )
+
+
+async def run(args: argparse.Namespace) -> None:
+    # Imported here: building the matcher is part of start-up, not of the load.
+    from backend import chat
+    from backend.delivery import RateLimiter, RecommendationDelivery
+    from backend.storage import UserStorage
+
+    chat.storage = UserStorage(Path(args.state_dir) / "user_state.json")
+    if not args.telegram_limits:
+        unlimited = RateLimiter(global_rate=1e9, chat_rate=1e9, chat_burst=10**9)
+        chat.delivery = RecommendationDelivery(limiter=unlimited)
+
+    records = itertools.islice(iter_resume_records(Path(args.resumes)), 200)
+    resumes = [text for text in map(record_to_text, records) if text.strip()]
+    if not resumes:
+        raise SystemExit(f"No résumés in {args.resumes}")
+
+    dp = Dispatcher(storage=MemoryStorage())
+    chat.register_handlers(dp)
+    bot = Bot(
+        token="42:FAKE-TOKEN",
+        session=FakeBotSession(latency=args.api_latency, jitter=args.api_jitter),
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+    )
+    levels = [int(value) for value in args.users.split(",") if value.strip()]
+    session = ProfilingSession(args.profile) if args.profile else None
+    if session is not None:
+        session.start()
+    print(
+        f"{len(chat.matcher.ids)} vacancies, {len(resumes)} résumés, {args.rounds} round(s) per user, "
+        f"API latency {args.api_latency * 1000:.0f}±{args.api_jitter * 1000:.0f} ms"
+    )
+    for index, users in enumerate(levels):
+        result = await run_level(
+            dp,
+            bot,
+            users,
+            first_user_id=(index + 1) * 1_000_000,
+            resumes=resumes,
+            vacancy_ids=chat.matcher.ids,
+            rounds=args.rounds,
+            think=args.think,
+        )
+        print_level(result)
+    if session is not None:
+        report = session.stop()
+        print(f"\nprofile ({report.collapsed_path}, {report.traces_path}):\n{report.to_text()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the bot with simulated users")
+    parser.add_argument("--users", default="1,10,50", help="Comma-separated concurrent user counts")
+    parser.add_argument("--rounds", type=int, default=3, help="Recommend/feedback rounds per user")
+    parser.add_argument("--think", type=float, default=0.0, help="Mean pause between a user's updates, s")
+    parser.add_argument("--api-latency", type=float, default=0.05, help="Fake Bot API latency, s")
+    parser.add_argument("--api-jitter", type=float, default=0.02)
+    parser.add_argument("--telegram-limits", action="store_true", help="Keep the delivery rate limits")
+    parser.add_argument("--resumes", default=str(LABELLED_RESUMES_PATH))
+    parser.add_argument(
+        "--profile", type=float, default=0.0, metavar="RATE",
+        help="Sample stacks and trace this fraction of requests during the run (backend/profiling.py)",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        args.state_dir = state_dir
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Compare resident memory of the default and low-memory ``JobMatcher`` modes.
+
+Usage::
+
+    python -m scripts.memory_report
+    python -m scripts.memory_report --synthetic 100000
+
+Each mode is loaded in a fresh process and the RSS growth over a baseline
+(interpreter, libraries and encoder already loaded) is reported, also scaled
+per 100k vacancies. ``--synthetic N`` replicates the bundled catalog into a
+temporary database of N vacancies with random prebuilt embeddings, so the
+measurement needs no encoding.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import resource
+import tempfile
+import time
+from dataclasses import asdict
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+from data.database import DEFAULT_DB_PATH, JobDatabase
+from model.embedding_store import DEFAULT_EMBEDDINGS_DIR, EmbeddingStore, text_fingerprint
+from model.encoders import DEFAULT_MODEL_NAME
+
+MODES = {"default": False, "low-memory": True}
+
+
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Peak rather than current RSS where /proc is unavailable.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _measure(low_memory: bool, db_path: str, store_dir: str, model_name: str) -> Dict:
+    from model.encoders import get_encoder
+    from model.job_repository import JobRepository
+    from model.main import ResumeProfile
+    from model.matcher import JobMatcher
+
+    get_encoder(model_name)
+    gc.collect()
+    baseline = current_rss_mb()
+    started = time.perf_counter()
+    matcher = JobMatcher(
+        JobRepository(JobDatabase(Path(db_path))),
+        model_name=model_name,
+        embedding_store=EmbeddingStore(model_name, Path(store_dir)),
+        low_memory=low_memory,
+    )
+    load_seconds = time.perf_counter() - started
+    gc.collect()
+    resident = current_rss_mb() - baseline
+
+    profile = ResumeProfile(
+        raw_text="Python backend разработчик, SQL, Docker", city="Москва", skills=["Python", "SQL"]
+    )
+    matcher.recommend(profile)
+    started = time.perf_counter()
+    for _ in range(5):
+        matcher.recommend(profile)
+    return {
+        "vacancies": len(matcher.ids),
+        "resident_mb": resident,
+        "matrix_mb": len(matcher.ids) * matcher.corpus_embeddings.shape[1] * 4 / 2**20,
+        "load_s": load_seconds,
+        "query_ms": (time.perf_counter() - started) / 5 * 1000,
+    }
+
+
+def build_synthetic(size: int, directory: Path, model_name: str, dim: int, source_db: Path) -> None:
+    """Replicate the source catalog up to ``size`` rows with random prebuilt embeddings."""
+    from model.job_repository import JobRepository, Vacancy
+    from model.texts import vacancy_to_text
+
+    base = JobRepository(JobDatabase(source_db)).all()
+    database = JobDatabase(directory / "synthetic.db")
+    ids, fingerprints = [], []
+    for start in range(0, size, len(base)):
+        batch = []
+        for offset, vacancy in enumerate(base[: size - start]):
+            row = {**asdict(vacancy), "id": f"{vacancy.id}#{start + offset}", "raw_payload": {}}
+            row["cluster_id"] = row["id"]
+            batch.append(row)
+            copy = Vacancy(**{**asdict(vacancy), "id": row["id"], "cluster_id": row["id"]})
+            ids.append(row["id"])
+            fingerprints.append(text_fingerprint(vacancy_to_text(copy)))
+        database.upsert(batch)
+    rng = np.random.default_rng(0)
+    writer = EmbeddingStore(model_name, directory).writer(ids, fingerprints, dim)
+    for start in range(0, len(ids), 10_000):
+        rows = rng.standard_normal((min(10_000, len(ids) - start), dim)).astype(np.float32)
+        writer.write_block(start, rows / np.linalg.norm(rows, axis=1, keepdims=True))
+    writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident memory per matcher mode")
+    parser.add_argument("--db", default=str(DEFAULT_DB_PATH))
+    parser.add_argument("--embeddings", default=str(DEFAULT_EMBEDDINGS_DIR))
+    parser.add_argument("--model", default=DEFAULT_MODEL_NAME)
+    parser.add_argument("--synthetic", type=int, default=0, help="Replicate the catalog to N vacancies")
+    parser.add_argument("--dim", type=int, default=384, help="Embedding size for --synthetic")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path, store_dir = args.db, args.embeddings
+        if args.synthetic:
+            build_synthetic(args.synthetic, Path(tmp), args.model, args.dim, Path(args.db))
+            db_path, store_dir = str(Path(tmp) / "synthetic.db"), tmp
+
+        ctx = get_context("spawn")
+        results = {}
+        for name, low_memory in MODES.items():
+            with ctx.Pool(1) as pool:
+                results[name] = pool.apply(_measure, (low_memory, db_path, store_dir, args.model))
+
+    print(
+        f"{'mode':<12}{'vacancies':>10}{'RSS MB':>10}{'MB/100k':>10}"
+        f"{'matrix MB':>11}{'load s':>9}{'query ms':>10}"
+    )
+    for name, result in results.items():
+        per_100k = result["resident_mb"] / result["vacancies"] * 100_000 if result["vacancies"] else 0.0
+        print(
+            f"{name:<12}{result['vacancies']:>10}{result['resident_mb']:>10.1f}{per_100k:>10.1f}"
+            f"{result['matrix_mb']:>11.1f}{result['load_s']:>9.2f}{result['query_ms']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()